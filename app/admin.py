@@ -1,5 +1,8 @@
 from django.contrib import admin
+from django.utils import timezone
 from .models import *
+from .quiz import regrade_final_quiz
+from utils.db_routing import ReplicaAdminMixin
 
 # Register your models here.
 @admin.register(UserProfile)
@@ -22,6 +25,41 @@ class ModuleAdmin(admin.ModelAdmin):
     search_fields = ['name']
     
     
+@admin.register(MuxIngestJob)
+class MuxIngestJobAdmin(admin.ModelAdmin):
+    list_display = ['module__name', 'status', 'attempts', 'next_attempt_at', 'updated_at']
+    list_filter = ['status']
+    list_select_related = ['module']
+    search_fields = ['module__name']
+    readonly_fields = ['attempts', 'locked_at', 'last_error', 'mux_asset_id', 'created_at', 'updated_at']
+    actions = ['retry_now']
+
+    @admin.action(description="Retry selected jobs now")
+    def retry_now(self, request, queryset):
+        count = queryset.exclude(status='running').update(
+            status='pending',
+            attempts=0,
+            next_attempt_at=timezone.now(),
+            last_error=""
+        )
+        self.message_user(request, f"{count} job(s) scheduled for retry.")
+
+
+@admin.register(MuxWebhookEvent)
+class MuxWebhookEventAdmin(ReplicaAdminMixin, admin.ModelAdmin):
+    list_display = ['event_type', 'object_id', 'occurred_at', 'received_at', 'processed_at']
+    list_filter = ['event_type']
+    search_fields = ['event_id', 'object_id']
+    date_hierarchy = 'received_at'
+    show_full_result_count = False
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
 @admin.register(UserModuleProgress)
 class UserModuleProgressAdmin(admin.ModelAdmin):
     list_display = ['user__email', 'module__name', 'completed']
@@ -35,10 +73,34 @@ class ModuleQuizAdmin(admin.ModelAdmin):
     list_filter = ['module__name']
     search_fields = ['module__name', 'question']
     
+
+@admin.register(UserModuleQuizAnswer)
+class UserModuleQuizAnswerAdmin(ReplicaAdminMixin, admin.ModelAdmin):
+    list_display = ['user__email', 'question__question', 'selected_option', 'is_correct', 'created_at']
+    list_filter = ['is_correct']
+    list_select_related = ['user', 'question']
+    search_fields = ['user__email', 'question__question']
+    raw_id_fields = ['user', 'question']
+    date_hierarchy = 'created_at'
+    show_full_result_count = False
+
+    
 @admin.register(FinalQuiz)
 class FinalQuizAdmin(admin.ModelAdmin):
-    list_display = ['question']
+    list_display = ['question', 'category', 'difficulty']
+    list_filter = ['category', 'difficulty']
     search_fields = ['question']
+    actions = ['regrade_answers']
+
+    @admin.action(description="Re-grade stored answers to selected questions")
+    def regrade_answers(self, request, queryset):
+        report = regrade_final_quiz(question_ids=list(queryset.values_list('id', flat=True)))
+        self.message_user(
+            request,
+            f"{report['answers_changed']} answer(s) changed, {report['sessions_rescored']} session(s) rescored, "
+            f"{len(report['certificates_to_issue'])} certificate(s) to issue, "
+            f"{len(report['certificates_to_revoke'])} certificate(s) to revoke."
+        )
     
     
 @admin.register(QuizSession)
@@ -49,12 +111,46 @@ class QuizSessionAdmin(admin.ModelAdmin):
     
 
 @admin.register(UserQuizAnswer)
-class UserQuizAnswerAdmin(admin.ModelAdmin):
-    list_display = ['session__user__email', 'question__question', 'selected_option', 'is_correct']
-    list_filter = ['session__user__email', 'is_correct']
+class UserQuizAnswerAdmin(ReplicaAdminMixin, admin.ModelAdmin):
+    list_display = ['session__user__email', 'question__question', 'selected_option', 'is_correct', 'created_at']
+    list_filter = ['is_correct']
+    list_select_related = ['session__user', 'question']
     search_fields = ['session__user__email', 'question__question']
+    raw_id_fields = ['session', 'question']
+    date_hierarchy = 'created_at'
+    show_full_result_count = False
+
+
+@admin.register(ArchivedQuizAnswer)
+class ArchivedQuizAnswerAdmin(ReplicaAdminMixin, admin.ModelAdmin):
+    list_display = ['session_id', 'question_id', 'selected_option', 'is_correct', 'created_at', 'archived_at']
+    list_filter = ['is_correct']
+    search_fields = ['=session_id']
+    show_full_result_count = False
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
     
 
+@admin.register(QuestionStats)
+class QuestionStatsAdmin(ReplicaAdminMixin, admin.ModelAdmin):
+    list_display = ['question__question', 'attempts', 'correct', 'correct_rate_display', 'option_counts', 'updated_at']
+    list_select_related = ['question']
+    search_fields = ['question__question']
+    readonly_fields = ['question', 'attempts', 'correct', 'option_counts', 'updated_at']
+    ordering = ['question_id']
+
+    @admin.display(description="Correct rate")
+    def correct_rate_display(self, obj):
+        return f"{obj.correct_rate:.1f}%"
+
+    def has_add_permission(self, request):
+        return False
+
+
 @admin.register(Certificate)
 class CertificateAdmin(admin.ModelAdmin):
     list_display = ['user__email', 'certificate_id', 'issued_date', 'is_valid']
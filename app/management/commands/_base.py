@@ -0,0 +1,28 @@
+import time
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+class PollingCommand(BaseCommand):
+    """
+    Base for worker commands that run once, or every --interval seconds until stopped
+    Subclasses implement run_once(**options).
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=0,
+            help="Seconds to sleep between runs, 0 runs once and exits",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            self.run_once(**options)
+            if options["interval"] <= 0:
+                return
+            close_old_connections()
+            time.sleep(options["interval"])
+
+    def run_once(self, **options):
+        raise NotImplementedError("subclasses of PollingCommand must provide a run_once() method")
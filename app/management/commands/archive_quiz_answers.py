@@ -0,0 +1,30 @@
+from datetime import timedelta
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from app.quiz import archivable_quiz_answers, archive_quiz_answers
+
+class Command(BaseCommand):
+    help = "Move answers of finished final quiz attempts older than a threshold into the archive table"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--older-than-days",
+            type=int,
+            default=settings.QUIZ_ANSWER_ARCHIVE_AFTER_DAYS,
+            help="Archive answers created more than this many days ago",
+        )
+        parser.add_argument("--batch-size", type=int, default=5000, help="Answers moved per transaction")
+        parser.add_argument("--dry-run", action="store_true", help="Only report how many answers would be archived")
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options["older_than_days"])
+        if options["dry_run"]:
+            count = archivable_quiz_answers(cutoff).count()
+            self.stdout.write(f"{count} answer(s) created before {cutoff:%Y-%m-%d} would be archived")
+            return
+        total = 0
+        for archived in archive_quiz_answers(cutoff, batch_size=options["batch_size"]):
+            total += archived
+            self.stdout.write(f"Archived {total} answer(s)...")
+        self.stdout.write(self.style.SUCCESS(f"✔ Archived {total} answer(s) created before {cutoff:%Y-%m-%d}"))
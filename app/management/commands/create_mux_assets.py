@@ -1,23 +1,112 @@
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
+from django.conf import settings
 from django.core.management.base import BaseCommand
-from app.models import Module
-from app.services import create_mux_asset
+from django.utils import timezone
+from app.models import Module, MuxIngestJob
+from app.mux import (
+    claim_mux_ingest_job,
+    google_drive_download_url,
+    record_mux_ingest_failure,
+    request_mux_asset,
+    store_mux_asset,
+)
+from utils.rate_limit import TokenBucket
 
 class Command(BaseCommand):
     help = "Create Mux assets for all video modules without one"
 
-    def handle(self, *args, **kwargs):
-        modules = Module.objects.filter(module_type="video", mux_asset_id__isnull=True)
-        for module in modules:
-            self.stdout.write(f"Creating asset for {module.name}...")
-            video_url = f"https://drive.google.com/uc?id={module.google_drive_file_id}&export=download"
-            asset = create_mux_asset(video_url)
-            if asset:
-                asset_id = asset.data.id
-                playback_id = asset.data.playback_ids[0].id
-            else:
-                self.stdout.write(self.style.ERROR(f"❌ Failed to create Mux asset for {module.name}"))
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=4, help="Concurrent requests to Mux")
+        parser.add_argument("--rps", type=float, default=5, help="Maximum Mux requests per second, 0 for no limit")
+        parser.add_argument("--only-errored", action="store_true", help="Re-ingest video modules whose Mux status is errored")
+        parser.add_argument("--limit", type=int, help="Process at most this many modules")
+        parser.add_argument("--dry-run", action="store_true", help="Only list the modules that would be ingested")
+
+    def handle(self, *args, **options):
+        modules = Module.objects.filter(module_type="video")
+        if options["only_errored"]:
+            modules = modules.filter(mux_status="errored")
+        else:
+            modules = modules.filter(mux_asset_id__isnull=True)
+        modules = modules.order_by('id').values_list('id', 'name', 'google_drive_file_id')
+        if options["limit"]:
+            modules = modules[:options["limit"]]
+        modules = list(modules)
+
+        if options["dry_run"]:
+            for module_id, name, _ in modules:
+                self.stdout.write(f"Would create asset for {name} ({module_id})")
+            self.stdout.write(self.style.SUCCESS(f"✔ {len(modules)} module(s) would be ingested"))
+            return
+        if not settings.MUX_TOKEN_ID or not settings.MUX_TOKEN_SECRET:
+            self.stdout.write(self.style.ERROR("❌ Mux credentials are not configured"))
+            return
+
+        workers = max(options["workers"], 1)
+        if workers > settings.MUX_POOL_MAXSIZE:
+            self.stdout.write(self.style.WARNING(
+                f"--workers {workers} exceeds MUX_POOL_MAXSIZE ({settings.MUX_POOL_MAXSIZE}), extra connections will not be reused"
+            ))
+        limiter = TokenBucket(options["rps"])
+
+        def create(module_id, file_id):
+            limiter.acquire()
+            return request_mux_asset(google_drive_download_url(file_id), passthrough=str(module_id))
+
+        self.created = self.failed = self.skipped = 0
+        executor = ThreadPoolExecutor(max_workers=workers)
+        queued = iter(modules)
+        futures = {}
+        try:
+            # Jobs are claimed just before their request is queued, so a long run never
+            # holds a claim past MUX_INGEST_LOCK_TIMEOUT and the ingest worker skips them
+            self.submit(executor, create, queued, futures, workers * 2)
+            while futures:
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in done:
+                    self.store(future, *futures.pop(future))
+                self.submit(executor, create, queued, futures, workers * 2)
+        except KeyboardInterrupt:
+            # Save assets already requested from Mux so a rerun does not create duplicates
+            self.stdout.write(self.style.WARNING("Interrupted, saving in-flight requests..."))
+            cancelled = [future for future in futures if future.cancel()]
+            for future in as_completed(future for future in futures if not future.cancelled()):
+                self.store(future, *futures[future])
+            MuxIngestJob.objects.filter(module_id__in=[futures[future][0] for future in cancelled]).update(
+                status='pending',
+                next_attempt_at=timezone.now(),
+                locked_at=None
+            )
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+        self.stdout.write(self.style.SUCCESS(
+            f"✔ Created {self.created} Mux asset(s), {self.failed} failed, {self.skipped} skipped"
+        ))
+
+    def submit(self, executor, create, queued, futures, window):
+        # Modules whose job another worker is running are left to it
+        while len(futures) < window:
+            module = next(queued, None)
+            if module is None:
+                return
+            module_id, name, file_id = module
+            attempts = claim_mux_ingest_job(module_id)
+            if attempts is None:
+                self.skipped += 1
+                self.stdout.write(self.style.WARNING(f"Skipped {name}, its ingest job is already running"))
                 continue
-            module.mux_asset_id = asset_id
-            module.mux_playback_id = playback_id
-            module.save()
-            self.stdout.write(self.style.SUCCESS(f"✔ Created Mux asset for {module.name}"))
+            futures[executor.submit(create, module_id, file_id)] = (module_id, name, attempts)
+
+    def store(self, future, module_id, name, attempts):
+        # Assets are saved as each request finishes, so an interrupted run can simply be restarted
+        try:
+            asset = future.result()
+            MuxIngestJob.objects.filter(module_id=module_id).update(mux_asset_id=asset.data.id)
+            store_mux_asset(module_id, asset)
+        except Exception as e:
+            record_mux_ingest_failure(module_id, attempts, e)
+            self.failed += 1
+            self.stdout.write(self.style.ERROR(f"❌ Failed to create Mux asset for {name}: {e}"))
+            return
+        self.created += 1
+        self.stdout.write(self.style.SUCCESS(f"✔ Created Mux asset for {name}"))
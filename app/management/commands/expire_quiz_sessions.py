@@ -0,0 +1,25 @@
+from datetime import timedelta
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from app.models import QuizSession
+from app.quiz import submit_timed_final_quiz
+
+class Command(BaseCommand):
+    help = "Grade and close timed final quiz attempts whose deadline has passed"
+
+    def handle(self, *args, **kwargs):
+        cutoff = timezone.now() - timedelta(seconds=settings.FINAL_QUIZ_GRACE_SECONDS)
+        sessions = QuizSession.objects.filter(
+            completed_at__isnull=True,
+            expires_at__lt=cutoff
+        ).select_related('user')
+        expired = 0
+        for session in sessions:
+            result, certificate, error = submit_timed_final_quiz(session.user)
+            if error:
+                self.stdout.write(self.style.ERROR(f"❌ {session}: {error}"))
+                continue
+            expired += 1
+            self.stdout.write(f"Closed {session} with score {result['score']:.1f}%")
+        self.stdout.write(self.style.SUCCESS(f"✔ Closed {expired} expired quiz session(s)"))
@@ -0,0 +1,19 @@
+from app.mux import process_mux_webhook_events
+from ._base import PollingCommand
+
+class Command(PollingCommand):
+    help = "Apply queued Mux webhook events to their modules in the order Mux sent them"
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument("--batch-size", type=int, default=500, help="Events applied per transaction")
+
+    def run_once(self, **options):
+        total_applied = total_skipped = 0
+        while True:
+            applied, skipped = process_mux_webhook_events(batch_size=options["batch_size"])
+            if not applied and not skipped:
+                break
+            total_applied += applied
+            total_skipped += skipped
+        self.stdout.write(self.style.SUCCESS(f"✔ Applied {total_applied} event(s), skipped {total_skipped}"))
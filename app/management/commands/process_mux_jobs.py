@@ -0,0 +1,22 @@
+from collections import Counter
+from app.mux import process_mux_ingest_jobs
+from ._base import PollingCommand
+
+class Command(PollingCommand):
+    help = "Create Mux assets for queued video modules, retrying failures with exponential backoff"
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument("--limit", type=int, default=100, help="Maximum number of jobs to run per pass")
+
+    def run_once(self, **options):
+        statuses, error = process_mux_ingest_jobs(limit=options["limit"])
+        if error:
+            self.stdout.write(self.style.ERROR(f"❌ {error}"))
+            return
+        counts = Counter(statuses)
+        if counts["failed"]:
+            self.stdout.write(self.style.ERROR(f"❌ {counts['failed']} job(s) failed after the maximum number of attempts"))
+        self.stdout.write(self.style.SUCCESS(
+            f"✔ Ran {len(statuses)} job(s): {counts['succeeded']} succeeded, {counts['pending']} scheduled for retry"
+        ))
@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from app.quiz import rebuild_question_stats
+
+class Command(BaseCommand):
+    help = "Rebuild the per-question analytics from all stored final quiz answers"
+
+    def handle(self, *args, **kwargs):
+        self.stdout.write("Rebuilding question stats...")
+        count = rebuild_question_stats()
+        self.stdout.write(self.style.SUCCESS(f"✔ Rebuilt stats for {count} question(s)"))
@@ -0,0 +1,20 @@
+from app.mux import reconcile_mux_assets
+from ._base import PollingCommand
+
+class Command(PollingCommand):
+    help = "Sync module Mux statuses and playback ids from the Mux list-assets API"
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument("--page-size", type=int, default=100, help="Assets fetched per Mux request (max 100)")
+
+    def run_once(self, **options):
+        counts, error = reconcile_mux_assets(page_size=options["page_size"])
+        if error:
+            self.stdout.write(self.style.ERROR(f"❌ {error}"))
+            return
+        if counts["missing"]:
+            self.stdout.write(self.style.WARNING(f"{counts['missing']} module asset(s) were not found in Mux"))
+        self.stdout.write(self.style.SUCCESS(
+            f"✔ Checked {counts['checked']} asset(s), updated {counts['updated']} module(s)"
+        ))
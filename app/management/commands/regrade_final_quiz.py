@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+from app.quiz import regrade_final_quiz
+
+class Command(BaseCommand):
+    help = "Re-grade stored final quiz answers and session scores against the current answer key"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--question",
+            type=int,
+            action="append",
+            dest="question_ids",
+            help="Only re-grade answers to this question ID (repeatable), defaults to every question",
+        )
+        parser.add_argument("--chunk-size", type=int, default=10000, help="Width of the id range updated per transaction")
+
+    def handle(self, *args, **options):
+        self.stdout.write("Re-grading final quiz answers...")
+        report = regrade_final_quiz(question_ids=options["question_ids"], chunk_size=options["chunk_size"])
+        self.stdout.write(self.style.SUCCESS(
+            f"✔ {report['answers_changed']} answer(s) changed, {report['sessions_rescored']} session(s) rescored"
+        ))
+        if report["certificates_to_issue"]:
+            self.stdout.write(self.style.WARNING(
+                f"Passed without a valid certificate (user IDs): {', '.join(map(str, report['certificates_to_issue']))}"
+            ))
+        if report["certificates_to_revoke"]:
+            self.stdout.write(self.style.WARNING(
+                f"Valid certificate earned by an attempt that now fails (user IDs): {', '.join(map(str, report['certificates_to_revoke']))}"
+            ))
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.4 on 2026-10-19 01:05
+
+import datetime
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0012_module_mux_asset_id_module_mux_playback_id_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='usermoduleprogress',
+            name='watch_position',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name='otp',
+            name='expires_at',
+            field=models.DateTimeField(default=datetime.datetime(2026, 10, 19, 1, 15, 32, 849398, tzinfo=datetime.timezone.utc)),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.4 on 2026-10-19 01:10
+
+import datetime
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0013_usermoduleprogress_watch_position_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='finalquiz',
+            name='category',
+            field=models.CharField(default='general', max_length=100),
+        ),
+        migrations.AddField(
+            model_name='finalquiz',
+            name='difficulty',
+            field=models.CharField(choices=[('easy', 'Easy'), ('medium', 'Medium'), ('hard', 'Hard')], default='medium', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='quizsession',
+            name='issued_questions',
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.AlterField(
+            model_name='otp',
+            name='expires_at',
+            field=models.DateTimeField(default=datetime.datetime(2026, 10, 19, 1, 20, 46, 526045, tzinfo=datetime.timezone.utc)),
+        ),
+    ]
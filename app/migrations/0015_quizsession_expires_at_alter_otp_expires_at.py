@@ -0,0 +1,24 @@
+# Generated by Django 5.2.4 on 2026-10-19 01:15
+
+import datetime
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0014_finalquiz_category_finalquiz_difficulty_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='quizsession',
+            name='expires_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='otp',
+            name='expires_at',
+            field=models.DateTimeField(default=datetime.datetime(2026, 10, 19, 1, 25, 8, 732050, tzinfo=datetime.timezone.utc)),
+        ),
+    ]
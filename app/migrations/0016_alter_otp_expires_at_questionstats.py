@@ -0,0 +1,35 @@
+# Generated by Django 5.2.4 on 2026-10-19 01:16
+
+import datetime
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0015_quizsession_expires_at_alter_otp_expires_at'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='otp',
+            name='expires_at',
+            field=models.DateTimeField(default=datetime.datetime(2026, 10, 19, 1, 26, 56, 502747, tzinfo=datetime.timezone.utc)),
+        ),
+        migrations.CreateModel(
+            name='QuestionStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('correct', models.PositiveIntegerField(default=0)),
+                ('option_counts', models.JSONField(blank=True, default=dict)),
+                ('updated_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('question', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='stats', to='app.finalquiz')),
+            ],
+            options={
+                'verbose_name_plural': 'question stats',
+            },
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.4 on 2026-10-19 01:18
+
+import datetime
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0016_alter_otp_expires_at_questionstats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedQuizAnswer',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('session_id', models.BigIntegerField(db_index=True)),
+                ('question_id', models.BigIntegerField()),
+                ('selected_option', models.CharField(max_length=255)),
+                ('is_correct', models.BooleanField()),
+                ('created_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='otp',
+            name='expires_at',
+            field=models.DateTimeField(default=datetime.datetime(2026, 10, 19, 1, 28, 14, 541617, tzinfo=datetime.timezone.utc)),
+        ),
+        migrations.AddIndex(
+            model_name='userquizanswer',
+            index=models.Index(fields=['created_at'], name='app_userqui_created_a443fd_idx'),
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.4 on 2026-10-19 01:19
+
+import datetime
+from django.db import migrations, models
+
+
+def backfill_first_attempts(apps, schema_editor):
+    # Sessions that were only ever attempted once own all of their answers
+    QuizSession = apps.get_model('app', 'QuizSession')
+    UserQuizAnswer = apps.get_model('app', 'UserQuizAnswer')
+    UserQuizAnswer.objects.filter(
+        session__in=QuizSession.objects.filter(attempt_number=1)
+    ).update(attempt_number=1)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0017_archivedquizanswer_alter_otp_expires_at_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='archivedquizanswer',
+            name='attempt_number',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='quizsession',
+            name='total_questions',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='userquizanswer',
+            name='attempt_number',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='otp',
+            name='expires_at',
+            field=models.DateTimeField(default=datetime.datetime(2026, 10, 19, 1, 29, 41, 210815, tzinfo=datetime.timezone.utc)),
+        ),
+        migrations.RunPython(backfill_first_attempts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.4 on 2026-10-19 01:23
+
+import datetime
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0018_archivedquizanswer_attempt_number_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='otp',
+            name='expires_at',
+            field=models.DateTimeField(default=datetime.datetime(2026, 10, 19, 1, 33, 36, 348916, tzinfo=datetime.timezone.utc)),
+        ),
+        migrations.CreateModel(
+            name='UserModuleQuizAnswer',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('selected_option', models.CharField(max_length=255)),
+                ('is_correct', models.BooleanField()),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('question', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='answers', to='app.modulequiz')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='module_quiz_answers', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.4 on 2026-10-19 01:25
+
+import datetime
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0019_alter_otp_expires_at_usermodulequizanswer'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='otp',
+            name='expires_at',
+            field=models.DateTimeField(default=datetime.datetime(2026, 10, 19, 1, 35, 54, 283670, tzinfo=datetime.timezone.utc)),
+        ),
+        migrations.CreateModel(
+            name='MuxIngestJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('succeeded', 'Succeeded'), ('failed', 'Failed')], default='pending', max_length=20)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('next_attempt_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('locked_at', models.DateTimeField(blank=True, null=True)),
+                ('last_error', models.TextField(blank=True, default='')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('module', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='mux_ingest_job', to='app.module')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', 'next_attempt_at'], name='app_muxinge_status_9872b5_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.4 on 2026-10-19 01:32
+
+import datetime
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0020_alter_otp_expires_at_muxingestjob'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='otp',
+            name='expires_at',
+            field=models.DateTimeField(default=datetime.datetime(2026, 10, 19, 1, 42, 6, 882043, tzinfo=datetime.timezone.utc)),
+        ),
+        migrations.CreateModel(
+            name='MuxWebhookEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('event_id', models.CharField(max_length=255, unique=True)),
+                ('event_type', models.CharField(max_length=100)),
+                ('object_id', models.CharField(db_index=True, max_length=255)),
+                ('payload', models.JSONField()),
+                ('occurred_at', models.DateTimeField()),
+                ('received_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('processed_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['processed_at', 'occurred_at'], name='app_muxwebh_process_249f34_idx')],
+            },
+        ),
+    ]
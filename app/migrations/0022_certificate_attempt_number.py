@@ -0,0 +1,54 @@
+# Generated by Django 5.2.4 on 2026-10-19 02:44
+
+import datetime
+from django.db import migrations, models
+from django.db.models import Max
+
+
+def backfill_certificate_attempts(apps, schema_editor):
+    # The answers of the issuing attempt are saved just before its certificate is
+    # (re)issued, so it is the latest attempt answered by the issue date
+    Certificate = apps.get_model('app', 'Certificate')
+    answer_models = [apps.get_model('app', name) for name in ('UserQuizAnswer', 'ArchivedQuizAnswer')]
+    for certificate in Certificate.objects.select_related('quiz_session').iterator():
+        attempts = [
+            model.objects.filter(
+                session_id=certificate.quiz_session_id,
+                created_at__lte=certificate.issued_date
+            ).aggregate(attempt=Max('attempt_number'))['attempt']
+            for model in answer_models
+        ]
+        attempts = [attempt for attempt in attempts if attempt is not None]
+        if not attempts:
+            continue
+        certificate.attempt_number = max(attempts)
+        session = certificate.quiz_session
+        if certificate.attempt_number == session.attempt_number and session.total_questions:
+            certificate.total_questions = session.total_questions
+        certificate.save(update_fields=['attempt_number', 'total_questions'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0021_alter_otp_expires_at_muxwebhookevent'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='certificate',
+            name='attempt_number',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='certificate',
+            name='total_questions',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='otp',
+            name='expires_at',
+            field=models.DateTimeField(default=datetime.datetime(2026, 10, 19, 2, 54, 35, 430289, tzinfo=datetime.timezone.utc)),
+        ),
+        migrations.RunPython(backfill_certificate_attempts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.4 on 2026-10-19 03:14
+
+from django.db import migrations
+from django.db.models import F, Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_completed_at(apps, schema_editor):
+    # Submissions never set completed_at before timed attempts, so every session that
+    # was attempted and holds no open issued set was completed by its latest answer.
+    # Archived answers are always older than live ones, they only count when the
+    # whole session has been archived.
+    QuizSession = apps.get_model('app', 'QuizSession')
+    latest_answers = [
+        Subquery(
+            apps.get_model('app', name).objects.filter(session_id=OuterRef('pk'))
+            .order_by().values('session_id').annotate(latest=Max('created_at')).values('latest')
+        )
+        for name in ('UserQuizAnswer', 'ArchivedQuizAnswer')
+    ]
+    QuizSession.objects.filter(
+        attempt_number__gt=0,
+        completed_at__isnull=True,
+        issued_questions=[]
+    ).update(completed_at=Coalesce(*latest_answers, F('started_at')))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0022_certificate_attempt_number'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_completed_at, migrations.RunPython.noop),
+    ]
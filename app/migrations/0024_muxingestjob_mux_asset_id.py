@@ -0,0 +1,24 @@
+# Generated by Django 5.2.4 on 2026-10-19 03:20
+
+import datetime
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0023_backfill_quiz_session_completed_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='muxingestjob',
+            name='mux_asset_id',
+            field=models.CharField(blank=True, max_length=255, null=True),
+        ),
+        migrations.AlterField(
+            model_name='otp',
+            name='expires_at',
+            field=models.DateTimeField(default=datetime.datetime(2026, 10, 19, 3, 30, 20, 924311, tzinfo=datetime.timezone.utc)),
+        ),
+    ]
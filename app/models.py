@@ -57,8 +57,12 @@ class Module(models.Model):
     
     @property
     def mux_playback_url(self):
-        if self.mux_playback_id:
-            return f"https://stream.mux.com/{self.mux_playback_id}.m3u8"
+        return self.playback_url_for(self.mux_playback_id)
+
+    @staticmethod
+    def playback_url_for(mux_playback_id):
+        if mux_playback_id:
+            return f"https://stream.mux.com/{mux_playback_id}.m3u8"
         return None
     
     @property
@@ -66,10 +70,52 @@ class Module(models.Model):
         return self.mux_playback_id
     
     
+class MuxIngestJob(models.Model):
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('succeeded', 'Succeeded'),
+        ('failed', 'Failed'),
+    ]
+    
+    module = models.OneToOneField(Module, on_delete=models.CASCADE, related_name="mux_ingest_job")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="pending")
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True, default="")
+    mux_asset_id = models.CharField(max_length=255, blank=True, null=True)  # the asset created by this job, reused by its retries
+    created_at = models.DateTimeField(default=timezone.now)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        indexes = [models.Index(fields=['status', 'next_attempt_at'])]
+    
+    def __str__(self):
+        return f"{self.module.name} - {self.status}"
+    
+    
+class MuxWebhookEvent(models.Model):
+    event_id = models.CharField(max_length=255, unique=True)
+    event_type = models.CharField(max_length=100)
+    object_id = models.CharField(max_length=255, db_index=True)  # the Mux asset id
+    payload = models.JSONField()
+    occurred_at = models.DateTimeField()
+    received_at = models.DateTimeField(default=timezone.now)
+    processed_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        indexes = [models.Index(fields=['processed_at', 'occurred_at'])]
+    
+    def __str__(self):
+        return f"{self.event_type} - {self.object_id}"
+    
+    
 class UserModuleProgress(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="module_progress")
     module = models.ForeignKey(Module, on_delete=models.CASCADE)
     completed = models.BooleanField(default=False)
+    watch_position = models.PositiveIntegerField(default=0)  # seconds into the module video
     created_at = models.DateTimeField(default=timezone.now)
     updated_at = models.DateTimeField(default=timezone.now)
     
@@ -92,10 +138,29 @@ class ModuleQuiz(models.Model):
         return f"{self.module.name} - {self.question}"
     
     
+class UserModuleQuizAnswer(models.Model):
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="module_quiz_answers")
+    question = models.ForeignKey(ModuleQuiz, on_delete=models.CASCADE, related_name="answers")
+    selected_option = models.CharField(max_length=255)
+    is_correct = models.BooleanField()
+    created_at = models.DateTimeField(default=timezone.now)
+    
+    def __str__(self):
+        return f"{self.user.email} - {self.question.question} - {self.selected_option}"
+    
+    
 class FinalQuiz(models.Model):
+    DIFFICULTY_CHOICES = [
+        ('easy', 'Easy'),
+        ('medium', 'Medium'),
+        ('hard', 'Hard'),
+    ]
+    
     question = models.CharField(max_length=255)
     options = models.JSONField()
     correct_answer = models.CharField(max_length=255)
+    category = models.CharField(max_length=100, default="general")
+    difficulty = models.CharField(max_length=20, choices=DIFFICULTY_CHOICES, default="medium")
     created_at = models.DateTimeField(default=timezone.now)
     updated_at = models.DateTimeField(default=timezone.now)
     
@@ -108,7 +173,10 @@ class QuizSession(models.Model):
     attempt_number = models.PositiveIntegerField()
     score = models.IntegerField(default=0)
     passed = models.BooleanField(default=False)
+    total_questions = models.PositiveIntegerField(default=0)  # questions graded in the latest attempt
+    issued_questions = models.JSONField(default=list, blank=True)  # FinalQuiz ids issued for the current attempt
     started_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(null=True, blank=True)  # deadline of a timed attempt
     completed_at = models.DateTimeField(null=True, blank=True)
     
     class Meta:
@@ -123,16 +191,56 @@ class UserQuizAnswer(models.Model):
     question = models.ForeignKey(FinalQuiz, on_delete=models.CASCADE)
     selected_option = models.CharField(max_length=255)
     is_correct = models.BooleanField()
+    attempt_number = models.PositiveIntegerField(null=True, blank=True)
     created_at = models.DateTimeField(default=timezone.now)
     
+    class Meta:
+        indexes = [models.Index(fields=['created_at'])]
+    
     def save(self, *args, **kwargs):
-        self.is_correct = (self.selected_option == self.question.correct_answer)
+        # Graded answers already carry is_correct, only look up the key when it is missing
+        if self.is_correct is None:
+            self.is_correct = (self.selected_option == self.question.correct_answer)
         super().save(*args, **kwargs)
     
     def __str__(self):
         return f"{self.session.user.email} - {self.question.question}"
     
     
+class ArchivedQuizAnswer(models.Model):
+    """
+    Compact copy of UserQuizAnswer rows from completed sessions, moved out of the hot table
+    """
+    session_id = models.BigIntegerField(db_index=True)
+    question_id = models.BigIntegerField()
+    selected_option = models.CharField(max_length=255)
+    is_correct = models.BooleanField()
+    attempt_number = models.PositiveIntegerField(null=True, blank=True)
+    created_at = models.DateTimeField()
+    archived_at = models.DateTimeField(default=timezone.now)
+    
+    def __str__(self):
+        return f"Session {self.session_id} - Question {self.question_id}"
+
+
+class QuestionStats(models.Model):
+    question = models.OneToOneField(FinalQuiz, on_delete=models.CASCADE, related_name="stats")
+    attempts = models.PositiveIntegerField(default=0)
+    correct = models.PositiveIntegerField(default=0)
+    option_counts = models.JSONField(default=dict, blank=True)  # {selected_option: count}
+    updated_at = models.DateTimeField(default=timezone.now)
+    
+    class Meta:
+        verbose_name_plural = "question stats"
+    
+    def __str__(self):
+        return f"{self.question.question} - {self.attempts} attempts"
+    
+    @property
+    def correct_rate(self):
+        return (self.correct / self.attempts) * 100 if self.attempts > 0 else 0
+    
+    
 class Feedback(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     feedback = models.TextField()
@@ -146,6 +254,8 @@ class Certificate(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name="certificate")
     certificate_id = models.CharField(max_length=50, unique=True)
     quiz_session = models.ForeignKey(QuizSession, on_delete=models.CASCADE, related_name="certificate")
+    attempt_number = models.PositiveIntegerField(null=True, blank=True)  # the attempt that earned the certificate
+    total_questions = models.PositiveIntegerField(null=True, blank=True)  # questions graded in that attempt
     issued_date = models.DateTimeField(default=timezone.now)
     score = models.DecimalField(max_digits=5, decimal_places=2)
     is_valid = models.BooleanField(default=True)
@@ -0,0 +1,482 @@
+import base64
+import functools
+import hashlib
+import hmac
+import os
+import threading
+import time
+from datetime import timedelta
+import jwt
+from cryptography.hazmat.primitives import serialization
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Max, Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from utils.instrumentation import timed
+from utils.metrics import record_cache_lookup
+from .models import Module, MuxIngestJob, MuxWebhookEvent
+
+
+def google_drive_download_url(file_id):
+    return f"https://drive.google.com/uc?id={file_id}&export=download"
+
+
+_mux_api_client = None
+_mux_api_client_lock = threading.Lock()
+
+
+def get_mux_api_client():
+    """
+    Return the process-wide Mux ApiClient, created on first use
+    Its urllib3 pool keeps up to MUX_POOL_MAXSIZE connections to Mux open and is
+    safe to share between threads.
+    """
+    global _mux_api_client
+    if _mux_api_client is None:
+        with _mux_api_client_lock:
+            if _mux_api_client is None:
+                # Imported on first use, loading every mux_python API module slows down each process start
+                import mux_python
+                configuration = mux_python.Configuration()
+                configuration.host = settings.MUX_API_HOST
+                configuration.username = settings.MUX_TOKEN_ID
+                configuration.password = settings.MUX_TOKEN_SECRET
+                configuration.connection_pool_maxsize = settings.MUX_POOL_MAXSIZE
+                _mux_api_client = mux_python.ApiClient(configuration)
+    return _mux_api_client
+
+
+def reset_mux_api_client():
+    """
+    Drop the shared Mux client so the next call builds a new one from the current settings
+    """
+    global _mux_api_client
+    with _mux_api_client_lock:
+        _mux_api_client = None
+
+
+def _forget_mux_api_client_after_fork():
+    # A forked worker must not reuse the parent's sockets (or a lock held at fork time)
+    global _mux_api_client, _mux_api_client_lock
+    _mux_api_client = None
+    _mux_api_client_lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_forget_mux_api_client_after_fork)
+
+
+def get_mux_assets_api():
+    import mux_python
+    return mux_python.AssetsApi(get_mux_api_client())
+
+
+def mux_request_timeout():
+    """(connect, read) timeout in seconds passed to every Mux request"""
+    return (settings.MUX_CONNECT_TIMEOUT, settings.MUX_READ_TIMEOUT)
+
+
+def request_mux_asset(video_url, passthrough=None):
+    """
+    Create a Mux asset from a video URL
+    Raises ApiException (or a urllib3 error) when the request fails.
+    """
+    import mux_python
+    input_settings = mux_python.InputSettings(url=video_url)
+    with timed("mux"):
+        return get_mux_assets_api().create_asset(
+            mux_python.CreateAssetRequest(
+                input=[input_settings],
+                playback_policy=[
+                    mux_python.PlaybackPolicy.SIGNED if settings.MUX_PLAYBACK_POLICY == "signed"
+                    else mux_python.PlaybackPolicy.PUBLIC
+                ],
+                passthrough=passthrough,
+            ),
+            _request_timeout=mux_request_timeout()
+        )
+
+
+def get_mux_asset(asset_id):
+    """
+    Fetch a Mux asset by id
+    Raises ApiException (or a urllib3 error) when the request fails.
+    """
+    with timed("mux"):
+        return get_mux_assets_api().get_asset(asset_id, _request_timeout=mux_request_timeout())
+
+
+def find_mux_asset_id(passthrough, page_size=100):
+    """
+    Page through the list-assets API for an asset created with `passthrough`
+    Returns:
+        str: The asset id, or None when no asset carries the passthrough
+    """
+    assets_api = get_mux_assets_api()
+    cursor = None
+    while True:
+        with timed("mux"):
+            response = assets_api.list_assets(limit=page_size, cursor=cursor, _request_timeout=mux_request_timeout())
+        for asset in response.data or []:
+            if asset.passthrough == passthrough:
+                return asset.id
+        cursor = response.next_cursor
+        if not cursor or not response.data:
+            return None
+
+
+_playback_tokens = {}
+_playback_tokens_bucket = None
+_playback_tokens_lock = threading.Lock()
+
+
+@functools.lru_cache(maxsize=1)
+def _load_mux_signing_key(private_key):
+    if "BEGIN" not in private_key:
+        private_key = base64.b64decode(private_key).decode()
+    return serialization.load_pem_private_key(private_key.encode(), password=None)
+
+
+def get_mux_playback_token(playback_id, audience="v", now=None):
+    """
+    Return a signed Mux playback token for a playback id
+    Tokens are cached per (playback_id, audience, expiry bucket) in this process and
+    shared by every user until the bucket rolls over, so a dashboard render signs
+    nothing once the cache is warm.
+    Args:
+        playback_id: The Mux playback id
+        audience: "v" video, "t" thumbnail, "g" gif or "s" storyboard
+    Returns:
+        str: The RS256 JWT
+    """
+    global _playback_tokens_bucket
+    refresh = settings.MUX_PLAYBACK_TOKEN_REFRESH_SECONDS
+    bucket = int((time.time() if now is None else now) // refresh)
+    key = (playback_id, audience, bucket)
+    token = _playback_tokens.get(key)
+    record_cache_lookup("mux-playback-token", token is not None)
+    if token is None:
+        with timed("mux-sign"):
+            token = jwt.encode(
+                {
+                    "sub": playback_id,
+                    "aud": audience,
+                    "exp": (bucket + 1) * refresh + settings.MUX_PLAYBACK_TOKEN_TTL,
+                    "kid": settings.MUX_SIGNING_KEY_ID,
+                },
+                _load_mux_signing_key(settings.MUX_SIGNING_PRIVATE_KEY),
+                algorithm="RS256",
+                headers={"kid": settings.MUX_SIGNING_KEY_ID}
+            )
+        with _playback_tokens_lock:
+            if bucket != _playback_tokens_bucket:
+                # Tokens of earlier buckets are no longer handed out
+                _playback_tokens.clear()
+                _playback_tokens_bucket = bucket
+            _playback_tokens[key] = token
+    return token
+
+
+def enqueue_mux_ingest(module_id):
+    """
+    Queue Mux asset creation for a module
+    A module has at most one job, so enqueueing twice is a no-op.
+    """
+    MuxIngestJob.objects.bulk_create([MuxIngestJob(module_id=module_id)], ignore_conflicts=True)
+
+
+def store_mux_asset(module_id, asset):
+    """
+    Save a newly created Mux asset on its module and close the module's ingest job
+    The module is written with a targeted update() so no post_save signal fires.
+    """
+    playback_ids = asset.data.playback_ids or []
+    with transaction.atomic():
+        Module.objects.filter(pk=module_id).update(
+            mux_asset_id=asset.data.id,
+            mux_playback_id=playback_ids[0].id if playback_ids else None,
+            mux_status=asset.data.status or "pending",
+            updated_at=timezone.now()
+        )
+        MuxIngestJob.objects.filter(module_id=module_id).update(status='succeeded', locked_at=None, last_error="")
+
+
+def mux_ingest_retry_delay(attempts):
+    """Seconds to wait before retrying a job that has failed `attempts` times"""
+    return min(
+        settings.MUX_INGEST_RETRY_BASE_SECONDS * 2 ** (attempts - 1),
+        settings.MUX_INGEST_RETRY_MAX_SECONDS
+    )
+
+
+def claim_mux_ingest_job(module_id):
+    """
+    Claim a module's ingest job for a request made outside process_mux_ingest_jobs
+    The job is created when missing, whatever its status or schedule, unless another
+    worker holds a lock on it that has not expired.
+    Returns:
+        int: The job's attempt count including this one, or None when it is held elsewhere
+    """
+    enqueue_mux_ingest(module_id)
+    now = timezone.now()
+    stale = now - timedelta(seconds=settings.MUX_INGEST_LOCK_TIMEOUT)
+    claimed = MuxIngestJob.objects.filter(module_id=module_id).exclude(status='running', locked_at__gte=stale).update(
+        status='running',
+        attempts=F('attempts') + 1,
+        locked_at=now
+    )
+    if not claimed:
+        return None
+    return MuxIngestJob.objects.filter(module_id=module_id).values_list('attempts', flat=True).first()
+
+
+def record_mux_ingest_failure(module_id, attempts, error):
+    """
+    Release a module's ingest job after a failed attempt, scheduling a retry with backoff
+    After MUX_INGEST_MAX_ATTEMPTS the job fails and the module is marked as errored.
+    Returns:
+        str: The job's new status
+    """
+    status = 'failed' if attempts >= settings.MUX_INGEST_MAX_ATTEMPTS else 'pending'
+    MuxIngestJob.objects.filter(module_id=module_id).update(
+        status=status,
+        next_attempt_at=timezone.now() + timedelta(seconds=mux_ingest_retry_delay(attempts)),
+        locked_at=None,
+        last_error=str(error)
+    )
+    if status == 'failed':
+        Module.objects.filter(pk=module_id).update(mux_status='errored', updated_at=timezone.now())
+    return status
+
+
+def _due_mux_ingest_jobs(now):
+    # Running jobs whose lock has expired belong to a worker that died mid-request
+    stale = now - timedelta(seconds=settings.MUX_INGEST_LOCK_TIMEOUT)
+    return Q(status='pending', next_attempt_at__lte=now) | Q(status='running', locked_at__lt=stale)
+
+
+def run_mux_ingest_job(job_id):
+    """
+    Claim and run a single Mux ingest job
+    Failures are retried with exponential backoff until MUX_INGEST_MAX_ATTEMPTS,
+    after which the job fails and the module is marked as errored. The created
+    asset is recorded on the job before the module is updated, and a retry whose
+    predecessor died before recording it looks the asset up by its passthrough,
+    so a retry never creates a second asset.
+    Returns:
+        str: The job's new status, or None when the job is not due or another worker claimed it
+    """
+    now = timezone.now()
+    claimed = MuxIngestJob.objects.filter(_due_mux_ingest_jobs(now), pk=job_id).update(
+        status='running',
+        attempts=F('attempts') + 1,
+        locked_at=now
+    )
+    if not claimed:
+        return None
+    job = MuxIngestJob.objects.select_related('module').get(pk=job_id)
+    module = job.module
+    if not module.mux_asset_id:
+        try:
+            asset_id = job.mux_asset_id
+            if asset_id is None and job.attempts > 1:
+                asset_id = find_mux_asset_id(str(module.pk))
+            if asset_id is not None:
+                asset = get_mux_asset(asset_id)
+            else:
+                asset = request_mux_asset(
+                    google_drive_download_url(module.google_drive_file_id),
+                    passthrough=str(module.pk)
+                )
+                MuxIngestJob.objects.filter(pk=job_id).update(mux_asset_id=asset.data.id)
+            store_mux_asset(module.pk, asset)
+        except Exception as e:
+            return record_mux_ingest_failure(module.pk, job.attempts, e)
+    else:
+        MuxIngestJob.objects.filter(pk=job_id).update(status='succeeded', locked_at=None, last_error="")
+    return 'succeeded'
+
+
+def process_mux_ingest_jobs(limit=100):
+    """
+    Run the Mux ingest jobs that are due, oldest first
+    Args:
+        limit: Maximum number of jobs to run
+    Returns:
+        tuple: (list of resulting job statuses, error message or None)
+    """
+    if not settings.MUX_TOKEN_ID or not settings.MUX_TOKEN_SECRET:
+        return [], "Mux credentials are not configured."
+    job_ids = list(
+        MuxIngestJob.objects.filter(_due_mux_ingest_jobs(timezone.now()))
+        .order_by('next_attempt_at')
+        .values_list('id', flat=True)[:limit]
+    )
+    statuses = []
+    for job_id in job_ids:
+        status = run_mux_ingest_job(job_id)
+        if status:
+            statuses.append(status)
+    return statuses, None
+
+
+def reconcile_mux_assets(page_size=100):
+    """
+    Bring module Mux statuses in line with Mux, for webhooks that never arrived
+    Pages through the list-assets API by cursor, diffs every asset against the
+    modules that reference it and writes all changes with one bulk_update.
+    Args:
+        page_size: Assets requested per page (Mux allows at most 100)
+    Returns:
+        tuple: (dict with checked/updated/missing counts, error message or None)
+    """
+    if not settings.MUX_TOKEN_ID or not settings.MUX_TOKEN_SECRET:
+        return None, "Mux credentials are not configured."
+    modules = {
+        module.mux_asset_id: module
+        for module in Module.objects.filter(mux_asset_id__isnull=False).only('id', 'mux_asset_id', 'mux_playback_id', 'mux_status')
+    }
+    assets_api = get_mux_assets_api()
+    seen = set()
+    changed = []
+    cursor = None
+    while True:
+        with timed("mux"):
+            response = assets_api.list_assets(limit=page_size, cursor=cursor, _request_timeout=mux_request_timeout())
+        for asset in response.data or []:
+            module = modules.get(asset.id)
+            if module is None or asset.id in seen:
+                continue
+            seen.add(asset.id)
+            playback_id = asset.playback_ids[0].id if asset.playback_ids else module.mux_playback_id
+            if (asset.status, playback_id) != (module.mux_status, module.mux_playback_id):
+                module.mux_status = asset.status
+                module.mux_playback_id = playback_id
+                changed.append(module)
+        cursor = response.next_cursor
+        if not cursor or not response.data:
+            break
+    now = timezone.now()
+    for module in changed:
+        module.updated_at = now
+    Module.objects.bulk_update(changed, ['mux_status', 'mux_playback_id', 'updated_at'], batch_size=500)
+    return {"checked": len(seen), "updated": len(changed), "missing": len(modules) - len(seen)}, None
+
+
+def verify_mux_webhook_signature(body, header, now=None):
+    """
+    Check a `Mux-Signature` header (`t=<timestamp>,v1=<hmac>`) against the raw request body
+    Without MUX_WEBHOOK_SECRET every request fails, unless DEBUG is on.
+    Args:
+        body: The raw request body bytes
+        header: The Mux-Signature header value
+    Returns:
+        bool: Whether the signature is valid and recent
+    """
+    if not settings.MUX_WEBHOOK_SECRET:
+        return settings.DEBUG
+    parts = {}
+    for item in (header or "").split(","):
+        key, _, value = item.strip().partition("=")
+        parts.setdefault(key, []).append(value)
+    try:
+        timestamp = int(parts["t"][0])
+    except (KeyError, ValueError):
+        return False
+    now = time.time() if now is None else now
+    if abs(now - timestamp) > settings.MUX_WEBHOOK_TOLERANCE_SECONDS:
+        return False
+    expected = hmac.new(
+        settings.MUX_WEBHOOK_SECRET.encode(),
+        f"{timestamp}.".encode() + body,
+        hashlib.sha256
+    ).hexdigest()
+    return any(hmac.compare_digest(expected, signature) for signature in parts.get("v1", []))
+
+
+def record_mux_webhook_event(payload):
+    """
+    Append a Mux webhook event to the event table, ignoring redeliveries
+    Args:
+        payload: The decoded webhook body
+    Returns:
+        tuple: (whether the event was new, error message or None)
+    """
+    event_id = payload.get("id") if isinstance(payload, dict) else None
+    if not event_id:
+        return False, "Event id is missing."
+    data = payload.get("data") or {}
+    occurred_at = parse_datetime(payload.get("created_at") or "") or timezone.now()
+    _, created = MuxWebhookEvent.objects.get_or_create(
+        event_id=event_id,
+        defaults={
+            'event_type': payload.get("type") or "",
+            'object_id': (payload.get("object") or {}).get("id") or data.get("id") or "",
+            'payload': payload,
+            'occurred_at': occurred_at
+        }
+    )
+    return created, None
+
+
+# The webhook events apply_mux_webhook_event writes to modules, the rest are only recorded
+MUX_STATUS_EVENTS = ("video.asset.ready", "video.asset.errored")
+
+
+def apply_mux_webhook_event(event):
+    """
+    Apply one asset event to its module with a targeted update()
+    Returns:
+        int: The number of modules updated
+    """
+    data = event.payload.get("data") or {}
+    modules = Module.objects.filter(mux_asset_id=event.object_id)
+    if event.event_type == "video.asset.ready":
+        fields = {"mux_status": "ready", "updated_at": timezone.now()}
+        if data.get("playback_ids"):
+            fields["mux_playback_id"] = data["playback_ids"][0]["id"]
+        return modules.update(**fields)
+    if event.event_type == "video.asset.errored":
+        return modules.update(mux_status="errored", updated_at=timezone.now())
+    return 0
+
+
+def process_mux_webhook_events(batch_size=500):
+    """
+    Apply unprocessed webhook events in the order Mux created them
+    The batch is locked with SKIP LOCKED so several workers can run at once. A
+    status event older than one already applied to the same asset is marked
+    processed without being applied, so late redeliveries cannot roll a module
+    back. Events of other types are marked processed and never count as newer.
+    Returns:
+        tuple: (events applied, events skipped as stale or irrelevant)
+    """
+    applied = skipped = 0
+    with transaction.atomic():
+        events = list(
+            MuxWebhookEvent.objects.select_for_update(skip_locked=True)
+            .filter(processed_at__isnull=True)
+            .order_by('occurred_at', 'id')[:batch_size]
+        )
+        if not events:
+            return 0, 0
+        latest = dict(
+            MuxWebhookEvent.objects.filter(
+                processed_at__isnull=False,
+                event_type__in=MUX_STATUS_EVENTS,
+                object_id__in={event.object_id for event in events}
+            ).values('object_id').annotate(latest=Max('occurred_at')).values_list('object_id', 'latest')
+        )
+        for event in events:
+            if event.event_type not in MUX_STATUS_EVENTS or (
+                event.object_id in latest and event.occurred_at < latest[event.object_id]
+            ):
+                skipped += 1
+                continue
+            latest[event.object_id] = event.occurred_at
+            if apply_mux_webhook_event(event):
+                applied += 1
+            else:
+                skipped += 1
+        MuxWebhookEvent.objects.filter(pk__in=[event.pk for event in events]).update(processed_at=timezone.now())
+    return applied, skipped
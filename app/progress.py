@@ -0,0 +1,220 @@
+import atexit
+import logging
+import os
+import threading
+from django.conf import settings
+from django.db import connections, transaction
+from django.utils import timezone
+from .models import UserModuleProgress
+from .services import get_module_catalog
+
+logger = logging.getLogger(__name__)
+
+
+def get_module_progress_summary(user):
+    """
+    Return the completed/total module counts for a user
+    """
+    total_modules = len(get_module_catalog())
+    completed_modules = UserModuleProgress.objects.filter(user=user, completed=True).count()
+    percentage_completed = (completed_modules / total_modules) * 100 if total_modules > 0 else 0
+    return {
+        "completed_modules": completed_modules,
+        "total_modules": total_modules,
+        "percentage_completed": percentage_completed
+    }
+
+
+def apply_module_progress_events(user, events):
+    """
+    Apply a batch of progress events for a user in a single transaction
+    Args:
+        user: The user the events belong to
+        events: Validated events with module_id, completed and an optional client timestamp
+    Returns:
+        tuple: (applied module ids, skipped module ids)
+    """
+    now = timezone.now()
+    # Only the most recent event per module matters; client clocks are never trusted past now
+    latest = {}
+    for event in events:
+        timestamp = min(event.get('timestamp') or now, now)
+        current = latest.get(event['module_id'])
+        if current is None or timestamp >= current[1]:
+            latest[event['module_id']] = (event['completed'], timestamp)
+
+    with transaction.atomic():
+        existing = dict(
+            UserModuleProgress.objects.select_for_update()
+            .filter(user=user, module_id__in=latest.keys())
+            .values_list('module_id', 'updated_at')
+        )
+        rows = []
+        skipped = []
+        for module_id, (completed, timestamp) in latest.items():
+            # Events older than what the server already has are stale replays
+            if module_id in existing and existing[module_id] > timestamp:
+                skipped.append(module_id)
+                continue
+            rows.append(UserModuleProgress(
+                user=user,
+                module_id=module_id,
+                completed=completed,
+                updated_at=timestamp
+            ))
+        if rows:
+            UserModuleProgress.objects.bulk_create(
+                rows,
+                update_conflicts=True,
+                unique_fields=['user', 'module'],
+                update_fields=['completed', 'updated_at']
+            )
+    return [row.module_id for row in rows], skipped
+
+
+class WatchProgressBuffer:
+    """
+    Coalesce video heartbeats in memory and write the latest position per
+    (user, module) in batched upserts instead of one write per heartbeat
+    Completions are written as soon as they happen. Positions are written when
+    the buffer fills up and by a daemon thread every WATCH_PROGRESS_FLUSH_INTERVAL
+    seconds, so a killed worker loses at most one interval of positions.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._flusher = None
+        self._stopped = None
+
+    def record(self, user_id, module_id, position, duration):
+        """
+        Buffer a heartbeat, writing it straight away when it completes the module
+        Returns:
+            bool: Whether the module is now considered completed
+        """
+        self.start()
+        key = (user_id, module_id)
+        completed = duration > 0 and position / duration >= settings.WATCH_PROGRESS_COMPLETION_THRESHOLD
+        with self._lock:
+            previous = self._pending.get(key)
+            already_completed = previous is not None and previous[1]
+            completed = completed or already_completed
+            self._pending[key] = (int(position), completed)
+            should_flush = len(self._pending) >= settings.WATCH_PROGRESS_FLUSH_SIZE
+        if should_flush:
+            self.flush()
+        elif completed and not already_completed:
+            # The response reports the completion, so the dashboard must see it too
+            self._write({key: (int(position), True)})
+        return completed
+
+    def flush(self):
+        """
+        Write all buffered positions to UserModuleProgress
+        Returns:
+            int: The number of (user, module) positions written
+        """
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+        try:
+            self._write(pending)
+        except Exception:
+            self._requeue(pending)
+            raise
+        return len(pending)
+
+    def _requeue(self, pending):
+        """
+        Put a batch that failed to write back into the buffer for the next flush
+        Heartbeats that arrived since the batch was taken are newer and win, a
+        completion from either side is kept.
+        """
+        with self._lock:
+            for key, (position, completed) in pending.items():
+                newer = self._pending.get(key)
+                if newer is None:
+                    self._pending[key] = (position, completed)
+                else:
+                    self._pending[key] = (newer[0], newer[1] or completed)
+
+    def _write(self, pending):
+        now = timezone.now()
+        completed_rows = []
+        watching_rows = []
+        for (user_id, module_id), (position, completed) in pending.items():
+            row = UserModuleProgress(
+                user_id=user_id,
+                module_id=module_id,
+                watch_position=position,
+                completed=completed,
+                updated_at=now
+            )
+            (completed_rows if completed else watching_rows).append(row)
+        with transaction.atomic():
+            if completed_rows:
+                UserModuleProgress.objects.bulk_create(
+                    completed_rows,
+                    update_conflicts=True,
+                    unique_fields=['user', 'module'],
+                    update_fields=['watch_position', 'completed', 'updated_at']
+                )
+            if watching_rows:
+                # Never touch `completed` here so a rewatch does not undo a completion
+                UserModuleProgress.objects.bulk_create(
+                    watching_rows,
+                    update_conflicts=True,
+                    unique_fields=['user', 'module'],
+                    update_fields=['watch_position']
+                )
+
+    def start(self):
+        """
+        Start this process's flusher thread unless it is already running
+        """
+        if self._flusher is not None:
+            return
+        with self._lock:
+            if self._flusher is not None:
+                return
+            self._stopped = threading.Event()
+            self._flusher = threading.Thread(
+                target=self._flush_periodically,
+                args=(self._stopped,),
+                name="watch-progress-flusher",
+                daemon=True
+            )
+            self._flusher.start()
+
+    def stop(self):
+        """
+        Stop the flusher thread, buffered positions stay pending until the next flush()
+        """
+        with self._lock:
+            flusher, stopped = self._flusher, self._stopped
+            self._flusher = self._stopped = None
+        if flusher is not None:
+            stopped.set()
+            flusher.join()
+
+    def _flush_periodically(self, stopped):
+        while not stopped.wait(settings.WATCH_PROGRESS_FLUSH_INTERVAL):
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Failed to flush buffered watch progress")
+            finally:
+                # Connections are per thread, do not keep this one open between flushes
+                connections.close_all()
+
+    def _forget_after_fork(self):
+        # A forked worker has no flusher thread and must not flush its parent's heartbeats
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._flusher = self._stopped = None
+
+
+watch_progress_buffer = WatchProgressBuffer()
+atexit.register(watch_progress_buffer.flush)
+os.register_at_fork(after_in_child=watch_progress_buffer._forget_after_fork)
@@ -0,0 +1,645 @@
+import random
+from datetime import timedelta
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models import Case, Count, Exists, ExpressionWrapper, F, IntegerField, Max, Min, OuterRef, Q, Subquery, Value, When
+from django.db.models.functions import Coalesce, NullIf
+from django.db.models.lookups import GreaterThanOrEqual
+from django.utils import timezone
+from utils.metrics import record_cache_lookup
+from .models import ModuleQuiz, UserModuleQuizAnswer, UserModuleProgress, FinalQuiz, QuizSession, UserQuizAnswer, ArchivedQuizAnswer, Certificate, QuestionStats
+
+FINAL_QUIZ_ANSWER_KEY_CACHE_KEY = "final-quiz-answer-key"
+FINAL_QUIZ_INDEX_CACHE_KEY = "final-quiz-index"
+FINAL_QUIZ_STATE_CACHE_KEY = "final-quiz-state:{user_id}"
+MODULE_QUIZ_CACHE_KEY = "module-quiz:{module_id}"
+
+
+def get_module_quiz(module_id):
+    """
+    Return the questions and answer key of a module quiz, cached until one of its questions is saved or deleted
+    Returns:
+        dict: {"questions": [ModuleQuiz, ...], "answers": {question_id: correct_answer}, "ids_by_text": {question_text: question_id}}
+    """
+    cache_key = MODULE_QUIZ_CACHE_KEY.format(module_id=module_id)
+    module_quiz = cache.get(cache_key)
+    record_cache_lookup("module-quiz", module_quiz is not None)
+    if module_quiz is None:
+        questions = list(ModuleQuiz.objects.using(DEFAULT_DB_ALIAS).filter(module_id=module_id).order_by('id'))
+        module_quiz = {
+            "questions": questions,
+            "answers": {question.id: question.correct_answer for question in questions},
+            "ids_by_text": {question.question: question.id for question in questions}
+        }
+        cache.set(cache_key, module_quiz, settings.MODULE_QUIZ_CACHE_TIMEOUT)
+    return module_quiz
+
+
+def invalidate_module_quiz(module_id):
+    cache.delete(MODULE_QUIZ_CACHE_KEY.format(module_id=module_id))
+
+
+def submit_module_quiz(user, module_id, answers_data):
+    """
+    Grade a module quiz submission in memory and record it with a single bulk insert
+    A score of at least MODULE_QUIZ_PASS_MARK marks the module as completed.
+    Args:
+        user: The user submitting the quiz
+        module_id: The module the quiz belongs to
+        answers_data: The submitted answers
+    Returns:
+        tuple: (result dict, error message or None)
+    """
+    module_quiz = get_module_quiz(module_id)
+    if not module_quiz["answers"]:
+        return None, "This module has no quiz."
+    correct_count, graded_answers = grade_answers(module_quiz, answers_data)
+    total_questions = len(module_quiz["answers"])
+    score = (correct_count / total_questions) * 100
+    passed = score >= settings.MODULE_QUIZ_PASS_MARK
+    with transaction.atomic():
+        UserModuleQuizAnswer.objects.bulk_create([
+            UserModuleQuizAnswer(
+                user=user,
+                question_id=question_id,
+                selected_option=selected_option,
+                is_correct=is_correct
+            )
+            for question_id, selected_option, is_correct in graded_answers
+        ])
+        if passed:
+            UserModuleProgress.objects.update_or_create(
+                user=user,
+                module_id=module_id,
+                defaults={'completed': True, 'updated_at': timezone.now()}
+            )
+    result = {
+        "score": score,
+        "passed": passed,
+        "correct_answers": correct_count,
+        "total_questions": total_questions,
+        "module_completed": passed
+    }
+    return result, None
+
+
+def get_final_quiz_answer_key():
+    """
+    Return the final quiz answer key, cached until a question is saved or deleted
+    Returns:
+        dict: {"answers": {question_id: correct_answer}, "ids_by_text": {question_text: question_id}}
+    """
+    answer_key = cache.get(FINAL_QUIZ_ANSWER_KEY_CACHE_KEY)
+    record_cache_lookup("final-quiz-answer-key", answer_key is not None)
+    if answer_key is None:
+        answers = {}
+        ids_by_text = {}
+        for question_id, question, correct_answer in FinalQuiz.objects.values_list('id', 'question', 'correct_answer'):
+            answers[question_id] = correct_answer
+            ids_by_text[question] = question_id
+        answer_key = {"answers": answers, "ids_by_text": ids_by_text}
+        cache.set(FINAL_QUIZ_ANSWER_KEY_CACHE_KEY, answer_key, settings.FINAL_QUIZ_CACHE_TIMEOUT)
+    return answer_key
+
+
+def get_final_quiz_question_index():
+    """
+    Return the final quiz question ids grouped by category and difficulty, cached like the answer key
+    Returns:
+        dict: {"category:difficulty": [question_id, ...]}
+    """
+    index = cache.get(FINAL_QUIZ_INDEX_CACHE_KEY)
+    record_cache_lookup("final-quiz-index", index is not None)
+    if index is None:
+        index = {}
+        for question_id, category, difficulty in FinalQuiz.objects.order_by('id').values_list('id', 'category', 'difficulty'):
+            index.setdefault(f"{category}:{difficulty}", []).append(question_id)
+        cache.set(FINAL_QUIZ_INDEX_CACHE_KEY, index, settings.FINAL_QUIZ_CACHE_TIMEOUT)
+    return index
+
+
+def invalidate_final_quiz_cache():
+    cache.delete_many([FINAL_QUIZ_ANSWER_KEY_CACHE_KEY, FINAL_QUIZ_INDEX_CACHE_KEY])
+
+
+def sample_final_quiz_questions(per_group=None):
+    """
+    Pick the questions issued for one final quiz attempt
+    Args:
+        per_group: Questions to sample per (category, difficulty) group, defaults to FINAL_QUIZ_QUESTIONS_PER_GROUP
+    Returns:
+        list: The issued question ids, shuffled when sampling, in id order when the whole bank is issued
+    """
+    if per_group is None:
+        per_group = settings.FINAL_QUIZ_QUESTIONS_PER_GROUP
+    question_ids = []
+    for group_ids in get_final_quiz_question_index().values():
+        if per_group and len(group_ids) > per_group:
+            question_ids.extend(random.sample(group_ids, per_group))
+        else:
+            question_ids.extend(group_ids)
+    if per_group:
+        random.shuffle(question_ids)
+    else:
+        question_ids.sort()
+    return question_ids
+
+
+def grade_answers(answer_key, answers_data, issued_questions=None):
+    """
+    Grade submitted quiz answers against an answer key without touching the database
+    Args:
+        answer_key: The answer key returned by get_final_quiz_answer_key or get_module_quiz
+        answers_data: Submitted answers with a `question_id` (or the legacy `question` text) and `selected_option`
+        issued_questions: When given, only answers to these question ids are graded
+    Returns:
+        tuple: (correct answer count, list of (question_id, selected_option, is_correct))
+    """
+    answers = answer_key["answers"]
+    ids_by_text = answer_key["ids_by_text"]
+    allowed = set(issued_questions) if issued_questions else None
+    seen = set()
+    correct_count = 0
+    graded = []
+    for data in answers_data:
+        question_id = data.get('question_id')
+        if question_id is None:
+            question_id = ids_by_text.get(data.get('question'))
+        elif not isinstance(question_id, int):
+            try:
+                question_id = int(question_id)
+            except (TypeError, ValueError):
+                continue
+        correct_answer = answers.get(question_id)
+        # Only the first answer per question counts
+        if correct_answer is None or question_id in seen or (allowed is not None and question_id not in allowed):
+            continue
+        seen.add(question_id)
+        selected_option = data.get('selected_option')
+        is_correct = correct_answer == selected_option
+        if is_correct:
+            correct_count += 1
+        graded.append((question_id, selected_option, is_correct))
+    return correct_count, graded
+
+
+def has_open_final_quiz(quiz_session):
+    """Whether the session holds an issued set of questions that has not been submitted yet"""
+    return quiz_session is not None and bool(quiz_session.issued_questions) and quiz_session.completed_at is None
+
+
+def has_expired_final_quiz(quiz_session):
+    """Whether the session holds a timed attempt that was never submitted and whose deadline has passed"""
+    return has_open_final_quiz(quiz_session) and quiz_session.expires_at is not None and quiz_session.expires_at <= timezone.now()
+
+
+def get_issued_final_quiz(quiz_session):
+    """Return the FinalQuiz questions issued to a session in issue order, skipping deleted ones"""
+    questions = FinalQuiz.objects.in_bulk(quiz_session.issued_questions)
+    return [questions[question_id] for question_id in quiz_session.issued_questions if question_id in questions]
+
+
+def issue_final_quiz(user, timed=False):
+    """
+    Return the questions of the user's unfinished attempt, or sample and record new ones
+    An issued set is kept until it is submitted, so fetching the quiz again neither
+    writes nor re-rolls the questions, and a timed attempt keeps its deadline. A
+    timed attempt past its deadline is graded from its autosaved answers and counted
+    before anything new is issued. Starting a timed attempt over an unfinished
+    untimed set puts the deadline on the questions already issued.
+    Args:
+        user: The user taking the quiz
+        timed: Whether the attempt must be timed
+    Returns:
+        tuple: (quiz_session, issued FinalQuiz questions in order, error message or None)
+    """
+    quiz_session = QuizSession.objects.filter(user=user).first()
+    if has_expired_final_quiz(quiz_session):
+        submit_timed_final_quiz(user)
+        quiz_session = QuizSession.objects.filter(user=user).first()
+    if has_open_final_quiz(quiz_session) and (quiz_session.expires_at is not None or not timed):
+        return quiz_session, get_issued_final_quiz(quiz_session), None
+    with transaction.atomic():
+        get_user_model().objects.select_for_update().only('pk').get(pk=user.pk)
+        quiz_session = QuizSession.objects.filter(user=user).first()
+        if has_open_final_quiz(quiz_session) and (quiz_session.expires_at is not None or not timed):
+            # A concurrent request issued the questions while this one waited for the lock
+            return quiz_session, get_issued_final_quiz(quiz_session), None
+        now = timezone.now()
+        expires_at = now + timedelta(minutes=settings.FINAL_QUIZ_DURATION_MINUTES) if timed else None
+        if has_open_final_quiz(quiz_session):
+            quiz_session.started_at = now
+            quiz_session.expires_at = expires_at
+            quiz_session.save(update_fields=['started_at', 'expires_at'])
+            return quiz_session, get_issued_final_quiz(quiz_session), None
+        if quiz_session and quiz_session.attempt_number >= settings.FINAL_QUIZ_MAX_ATTEMPTS:
+            return None, [], f"You have reached the maximum number of attempts ({settings.FINAL_QUIZ_MAX_ATTEMPTS})."
+        question_ids = sample_final_quiz_questions()
+        questions = FinalQuiz.objects.in_bulk(question_ids)
+        question_ids = [question_id for question_id in question_ids if question_id in questions]
+        if quiz_session is None:
+            quiz_session = QuizSession(user=user, attempt_number=0)
+        quiz_session.issued_questions = question_ids
+        quiz_session.started_at = now
+        quiz_session.expires_at = expires_at
+        quiz_session.completed_at = None
+        quiz_session.save()
+    return quiz_session, [questions[question_id] for question_id in question_ids], None
+
+
+def start_timed_final_quiz(user):
+    """
+    Start a timed attempt whose state lives in the cache until it is submitted or expires
+    Starting again while the attempt is active returns it with its autosaved answers.
+    Returns:
+        tuple: (quiz_session, issued questions, error message or None)
+    """
+    quiz_session, questions, error = issue_final_quiz(user, timed=True)
+    if error:
+        return None, [], error
+    expires_at = quiz_session.expires_at.timestamp()
+    state = get_timed_final_quiz_state(user.pk)
+    if state is None or state["expires_at"] != expires_at:
+        state = {
+            "session_id": quiz_session.pk,
+            "question_ids": quiz_session.issued_questions,
+            "expires_at": expires_at,
+            "answers": {}
+        }
+        cache.set(
+            FINAL_QUIZ_STATE_CACHE_KEY.format(user_id=user.pk),
+            state,
+            max(int(expires_at - timezone.now().timestamp()), 0) + settings.FINAL_QUIZ_GRACE_SECONDS
+        )
+    return quiz_session, questions, None
+
+
+def get_timed_final_quiz_state(user_id):
+    return cache.get(FINAL_QUIZ_STATE_CACHE_KEY.format(user_id=user_id))
+
+
+def save_timed_final_quiz_answers(user_id, answers_data):
+    """
+    Autosave partial answers of an active timed attempt in the cache only
+    Returns:
+        tuple: (state or None, error message or None)
+    """
+    state = get_timed_final_quiz_state(user_id)
+    if state is None:
+        return None, "No active quiz session."
+    remaining = state["expires_at"] - timezone.now().timestamp()
+    if remaining <= 0:
+        return None, "The quiz session has expired."
+    issued = set(state["question_ids"])
+    for data in answers_data:
+        try:
+            question_id = int(data.get('question_id'))
+        except (TypeError, ValueError):
+            continue
+        if question_id in issued and data.get('selected_option') is not None:
+            state["answers"][question_id] = data['selected_option']
+    cache.set(
+        FINAL_QUIZ_STATE_CACHE_KEY.format(user_id=user_id),
+        state,
+        int(remaining) + settings.FINAL_QUIZ_GRACE_SECONDS
+    )
+    return state, None
+
+
+def submit_timed_final_quiz(user, answers_data=None):
+    """
+    Persist a timed attempt from its cached state plus any final answers
+    Answers arriving after the deadline and grace period are ignored, but the
+    attempt is still graded from what was autosaved.
+    Returns:
+        tuple: (result dict, newly issued certificate or None, error message or None)
+    """
+    quiz_session = QuizSession.objects.filter(user=user, completed_at__isnull=True, expires_at__isnull=False).first()
+    # Claim the attempt so concurrent submits (or the expiry job) persist it only once
+    if quiz_session is None or not QuizSession.objects.filter(
+        pk=quiz_session.pk,
+        completed_at__isnull=True
+    ).update(completed_at=timezone.now()):
+        return None, None, "No active quiz session."
+    state = get_timed_final_quiz_state(user.pk) or {"answers": {}}
+    answers = dict(state["answers"])
+    expired = timezone.now() > quiz_session.expires_at + timedelta(seconds=settings.FINAL_QUIZ_GRACE_SECONDS)
+    if answers_data and not expired:
+        for data in answers_data:
+            try:
+                answers[int(data.get('question_id'))] = data.get('selected_option')
+            except (TypeError, ValueError):
+                continue
+    result, certificate, error = submit_final_quiz(user, [
+        {"question_id": question_id, "selected_option": selected_option}
+        for question_id, selected_option in answers.items()
+    ])
+    cache.delete(FINAL_QUIZ_STATE_CACHE_KEY.format(user_id=user.pk))
+    if result:
+        result["expired"] = expired
+    return result, certificate, error
+
+
+def submit_final_quiz(user, answers_data):
+    """
+    Grade and record a final quiz submission as a single atomic unit
+    Submissions for the same user are serialized on a lock of the user row, the
+    attempt counter is incremented in SQL and capped at FINAL_QUIZ_MAX_ATTEMPTS,
+    and the certificate is issued at most once.
+    Args:
+        user: The user submitting the quiz
+        answers_data: The submitted answers
+    Returns:
+        tuple: (result dict, newly issued certificate or None, error message or None)
+    """
+    with transaction.atomic():
+        # QuizSession may not exist yet, so lock the user row instead of the session row
+        get_user_model().objects.select_for_update().only('pk').get(pk=user.pk)
+        quiz_session, created = QuizSession.objects.get_or_create(
+            user=user,
+            defaults={'attempt_number': 0, 'passed': False}
+        )
+        if has_open_final_quiz(quiz_session) and quiz_session.expires_at is not None:
+            # Timed attempts are graded by submit_timed_final_quiz, which enforces the deadline
+            return None, None, "A timed quiz is in progress, submit it with /quiz/submit."
+        incremented = QuizSession.objects.filter(
+            pk=quiz_session.pk,
+            attempt_number__lt=settings.FINAL_QUIZ_MAX_ATTEMPTS
+        ).update(attempt_number=F('attempt_number') + 1)
+        if not incremented:
+            return None, None, f"You have reached the maximum number of attempts ({settings.FINAL_QUIZ_MAX_ATTEMPTS})."
+        quiz_session.refresh_from_db(fields=['attempt_number'])
+
+        answer_key = get_final_quiz_answer_key()
+        issued_questions = quiz_session.issued_questions
+        correct_count, graded_answers = grade_answers(answer_key, answers_data, issued_questions=issued_questions)
+        if graded_answers:
+            UserQuizAnswer.objects.bulk_create([
+                UserQuizAnswer(
+                    session=quiz_session,
+                    question_id=question_id,
+                    selected_option=selected_option,
+                    is_correct=is_correct,
+                    attempt_number=quiz_session.attempt_number
+                )
+                for question_id, selected_option, is_correct in graded_answers
+            ])
+            record_question_stats(graded_answers)
+        # Clients that never fetched the quiz are graded against the whole bank, never
+        # against the number of answers they chose to send
+        total_questions = len(issued_questions) if issued_questions else len(answer_key["answers"])
+        score = (correct_count / total_questions) * 100 if total_questions > 0 else 0
+        passed = score >= 80
+        quiz_session.passed = passed
+        quiz_session.score = score
+        quiz_session.total_questions = total_questions
+        quiz_session.completed_at = timezone.now()
+        quiz_session.save(update_fields=['passed', 'score', 'total_questions', 'completed_at'])
+
+        certificate = None
+        if passed:
+            attempt = {
+                'quiz_session': quiz_session,
+                'attempt_number': quiz_session.attempt_number,
+                'total_questions': total_questions,
+                'score': score
+            }
+            certificate, issued = Certificate.objects.get_or_create(user=user, defaults=attempt)
+            if not issued and not certificate.is_valid:
+                # A revoked certificate is re-issued against the passing attempt
+                for field, value in attempt.items():
+                    setattr(certificate, field, value)
+                certificate.is_valid = True
+                certificate.issued_date = timezone.now()
+                certificate.save(update_fields=[*attempt, 'is_valid', 'issued_date'])
+                issued = True
+            if not issued:
+                certificate = None
+
+    result = {
+        "score": score,
+        "passed": passed,
+        "correct_answers": correct_count,
+        "total_questions": total_questions,
+        "attempt_number": quiz_session.attempt_number
+    }
+    return result, certificate, None
+
+
+def record_question_stats(graded_answers):
+    """
+    Fold freshly graded answers into the materialized QuestionStats rows
+    Must run inside the transaction that stores the answers.
+    Args:
+        graded_answers: List of (question_id, selected_option, is_correct)
+    """
+    deltas = {}
+    for question_id, selected_option, is_correct in graded_answers:
+        delta = deltas.setdefault(question_id, {"attempts": 0, "correct": 0, "options": {}})
+        delta["attempts"] += 1
+        delta["correct"] += int(is_correct)
+        delta["options"][selected_option] = delta["options"].get(selected_option, 0) + 1
+    QuestionStats.objects.bulk_create(
+        [QuestionStats(question_id=question_id) for question_id in deltas],
+        ignore_conflicts=True
+    )
+    now = timezone.now()
+    # Lock in a fixed order so concurrent submissions cannot deadlock
+    stats = list(QuestionStats.objects.select_for_update().filter(question_id__in=deltas).order_by('question_id'))
+    for stat in stats:
+        delta = deltas[stat.question_id]
+        stat.attempts += delta["attempts"]
+        stat.correct += delta["correct"]
+        for option, count in delta["options"].items():
+            stat.option_counts[option] = stat.option_counts.get(option, 0) + count
+        stat.updated_at = now
+    QuestionStats.objects.bulk_update(stats, ['attempts', 'correct', 'option_counts', 'updated_at'])
+
+
+def rebuild_question_stats(question_ids=None):
+    """
+    Recompute QuestionStats rows from the stored and archived answers
+    Args:
+        question_ids: Optional list of question IDs to rebuild, defaults to every question
+    Returns:
+        int: The number of questions with stats
+    """
+    stats = {}
+    now = timezone.now()
+    questions = FinalQuiz.objects.all()
+    if question_ids is not None:
+        questions = questions.filter(id__in=question_ids)
+    existing_ids = set(questions.values_list('id', flat=True))
+    for model in (UserQuizAnswer, ArchivedQuizAnswer):
+        answers = model.objects.all()
+        if question_ids is not None:
+            answers = answers.filter(question_id__in=existing_ids)
+        rows = (
+            answers.values('question_id', 'selected_option')
+            .annotate(total=Count('id'), correct=Count('id', filter=Q(is_correct=True)))
+            .order_by()
+        )
+        for row in rows:
+            if row['question_id'] not in existing_ids:
+                continue
+            stat = stats.setdefault(row['question_id'], QuestionStats(question_id=row['question_id'], updated_at=now))
+            stat.attempts += row['total']
+            stat.correct += row['correct']
+            stat.option_counts[row['selected_option']] = stat.option_counts.get(row['selected_option'], 0) + row['total']
+    with transaction.atomic():
+        stale = QuestionStats.objects.all()
+        if question_ids is not None:
+            stale = stale.filter(question_id__in=question_ids)
+        stale.delete()
+        QuestionStats.objects.bulk_create(stats.values())
+    return len(stats)
+
+
+def regrade_final_quiz(question_ids=None, chunk_size=10000):
+    """
+    Re-grade stored final quiz answers against the current answer key
+    Answers and session scores are corrected with set-based UPDATEs over
+    id-range chunks, each in its own transaction, so no rows are loaded into
+    Python. Only the answers of a session's latest attempt count towards its
+    score; archived attempts keep their recorded scores.
+    Args:
+        question_ids: Optional list of changed question IDs, defaults to every question
+        chunk_size: Width of the id range updated per transaction
+    Returns:
+        dict: Counts of changed answers and rescored sessions, plus the user IDs whose
+        latest attempt passes without a valid certificate, and whose valid certificate
+        was earned by an attempt that now fails
+    """
+    matches_key = Exists(FinalQuiz.objects.filter(
+        pk=OuterRef('question_id'),
+        correct_answer=OuterRef('selected_option')
+    ))
+    answers_changed = 0
+    for model in (UserQuizAnswer, ArchivedQuizAnswer):
+        answers = model.objects.all()
+        if question_ids is not None:
+            answers = answers.filter(question_id__in=question_ids)
+        for start, end in _id_ranges(answers, chunk_size):
+            chunk = answers.filter(id__gte=start, id__lt=end)
+            with transaction.atomic():
+                answers_changed += chunk.filter(is_correct=True).exclude(matches_key).update(is_correct=False)
+                answers_changed += chunk.filter(is_correct=False).filter(matches_key).update(is_correct=True)
+
+    attempt_answers = UserQuizAnswer.objects.filter(
+        session=OuterRef('pk'),
+        attempt_number=OuterRef('attempt_number')
+    ).order_by().values('session')
+    correct_count = Subquery(attempt_answers.annotate(n=Count('id', filter=Q(is_correct=True))).values('n'))
+    answered_count = Subquery(attempt_answers.annotate(n=Count('id')).values('n'))
+    # Sessions graded before total_questions was recorded fall back to the answer count
+    score = ExpressionWrapper(
+        correct_count * 100 / Coalesce(NullIf(F('total_questions'), 0), answered_count),
+        output_field=IntegerField()
+    )
+    sessions = QuizSession.objects.filter(completed_at__isnull=False).filter(Exists(attempt_answers))
+    if question_ids is not None:
+        sessions = sessions.filter(Exists(attempt_answers.filter(question_id__in=question_ids)))
+    sessions_rescored = 0
+    for start, end in _id_ranges(sessions, chunk_size):
+        with transaction.atomic():
+            sessions_rescored += sessions.filter(id__gte=start, id__lt=end).update(
+                score=score,
+                passed=Case(When(GreaterThanOrEqual(score, 80), then=Value(True)), default=Value(False))
+            )
+
+    if question_ids is None:
+        rebuild_question_stats()
+    else:
+        rebuild_question_stats(question_ids)
+
+    valid_certificates = Certificate.objects.filter(user=OuterRef('user'), is_valid=True)
+    # A session only keeps the score of its latest attempt, so a certificate is checked
+    # against the regraded answers of the attempt that earned it, wherever they are stored
+    certificate_correct = 0
+    certificate_answered = 0
+    for model in (UserQuizAnswer, ArchivedQuizAnswer):
+        issuing_answers = model.objects.filter(
+            session_id=OuterRef('quiz_session_id'),
+            attempt_number=OuterRef('attempt_number')
+        ).order_by().values('session_id')
+        certificate_correct += Coalesce(Subquery(issuing_answers.annotate(n=Count('id', filter=Q(is_correct=True))).values('n')), 0)
+        certificate_answered += Coalesce(Subquery(issuing_answers.annotate(n=Count('id')).values('n')), 0)
+    certificate_score = ExpressionWrapper(
+        certificate_correct * 100 / Coalesce(NullIf(F('total_questions'), 0), NullIf(certificate_answered, 0)),
+        output_field=IntegerField()
+    )
+    return {
+        "answers_changed": answers_changed,
+        "sessions_rescored": sessions_rescored,
+        "certificates_to_issue": list(
+            QuizSession.objects.filter(passed=True).exclude(Exists(valid_certificates))
+            .order_by('user_id').values_list('user_id', flat=True)
+        ),
+        "certificates_to_revoke": list(
+            Certificate.objects.filter(is_valid=True, attempt_number__isnull=False)
+            .annotate(regraded_score=certificate_score).filter(regraded_score__lt=80)
+            .order_by('user_id').values_list('user_id', flat=True)
+        ),
+    }
+
+
+def _id_ranges(queryset, size):
+    """Yield half-open (start, end) id ranges covering the rows of `queryset`"""
+    bounds = queryset.aggregate(low=Min('id'), high=Max('id'))
+    if bounds['low'] is None:
+        return
+    for start in range(bounds['low'], bounds['high'] + 1, size):
+        yield start, start + size
+
+
+def archivable_quiz_answers(cutoff):
+    """
+    Answers created before `cutoff` whose attempt is over
+    An attempt is over once the session has moved on to a later one or is not
+    holding an open issued set, so a user in the middle of an attempt only keeps
+    that attempt's answers in the hot table, and sessions from before issued sets
+    and completed_at existed are archived too.
+    Returns:
+        QuerySet: The matching UserQuizAnswer rows
+    """
+    return UserQuizAnswer.objects.filter(
+        Q(attempt_number__lt=F('session__attempt_number'))
+        | Q(session__completed_at__isnull=False)
+        | Q(session__issued_questions=[]),
+        created_at__lt=cutoff
+    )
+
+
+def archive_quiz_answers(cutoff, batch_size=5000):
+    """
+    Move the answers returned by archivable_quiz_answers(cutoff) into ArchivedQuizAnswer
+    Each batch is copied and deleted in its own short transaction so the hot
+    table is never locked for long.
+    Yields:
+        int: The number of answers archived in each batch
+    """
+    answers = archivable_quiz_answers(cutoff).order_by('id')
+    while True:
+        with transaction.atomic():
+            batch = list(answers.values(
+                'id', 'session_id', 'question_id', 'selected_option', 'is_correct', 'attempt_number', 'created_at'
+            )[:batch_size])
+            if not batch:
+                return
+            now = timezone.now()
+            ArchivedQuizAnswer.objects.bulk_create([
+                ArchivedQuizAnswer(
+                    session_id=row['session_id'],
+                    question_id=row['question_id'],
+                    selected_option=row['selected_option'],
+                    is_correct=row['is_correct'],
+                    attempt_number=row['attempt_number'],
+                    created_at=row['created_at'],
+                    archived_at=now
+                )
+                for row in batch
+            ])
+            UserQuizAnswer.objects.filter(id__in=[row['id'] for row in batch]).delete()
+        yield len(batch)
@@ -3,11 +3,56 @@ from rest_framework import status
 from django.contrib.auth import get_user_model
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
 from django.contrib.auth.password_validation import validate_password
+from django.conf import settings
+from django.db.models import QuerySet
 from .models import *
+from .mux import get_mux_playback_token
+from .services import get_module_catalog
 from utils.response import ResponseMixin
 
 User = get_user_model()
 
+
+class SparseFieldsetMixin:
+    """
+    Limit the serialized fields with a `?fields=` query parameter, e.g.
+    `?fields=completed,module.id`. Dotted paths narrow nested serializers
+    that also use this mixin.
+    """
+    fields_query_param = 'fields'
+
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop('fields', None)
+        super().__init__(*args, **kwargs)
+        if fields is None:
+            request = self.context.get('request')
+            fields = request.query_params.get(self.fields_query_param) if request is not None else None
+        if fields:
+            self.restrict_fields(self.parse_fields(fields))
+
+    @staticmethod
+    def parse_fields(fields):
+        """
+        Parse a comma separated list of dotted field paths into a nested dict
+        """
+        tree = {}
+        for path in fields.split(','):
+            node = tree
+            for name in path.strip().split('.'):
+                if name:
+                    node = node.setdefault(name, {})
+        return tree
+
+    def restrict_fields(self, tree):
+        for name in list(self.fields):
+            if name not in tree:
+                self.fields.pop(name)
+                continue
+            field = getattr(self.fields[name], 'child', self.fields[name])
+            if tree[name] and isinstance(field, SparseFieldsetMixin):
+                field.restrict_fields(tree[name])
+
+
 class UserProfileSerializer(serializers.ModelSerializer):
     email = serializers.EmailField(write_only=True)
     password = serializers.CharField(write_only=True)
@@ -111,30 +156,189 @@ class ChangePasswordSerializer(serializers.Serializer):
     new_password = serializers.CharField(max_length=128)
     
     
-class ModuleSerializer(serializers.ModelSerializer):
+class ModuleSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     mux_playback_url = serializers.SerializerMethodField()
     mux_playback = serializers.SerializerMethodField()
+    mux_playback_token = serializers.SerializerMethodField()
     class Meta:
         model = Module
-        fields = ['id', 'name', 'description', 'module_type', 'mux_playback_url', 'mux_playback']
+        fields = ['id', 'name', 'description', 'module_type', 'mux_playback_url', 'mux_playback', 'mux_playback_token']
         
     def get_mux_playback_url(self, obj):
+        token = self.get_mux_playback_token(obj)
+        if token:
+            return f"{obj.mux_playback_url}?token={token}"
         return obj.mux_playback_url
     
     def get_mux_playback(self, obj):
         return obj.mux_playback
+    
+    def get_mux_playback_token(self, obj):
+        # Only set in signed playback mode, pass it to Mux Player as `playback-token`
+        if settings.MUX_PLAYBACK_POLICY != "signed" or not obj.mux_playback_id:
+            return None
+        return get_mux_playback_token(obj.mux_playback_id)
 
-class UserModuleProgressSerializer(serializers.ModelSerializer):
+class UserModuleProgressSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     module = ModuleSerializer()
     class Meta:
         model = UserModuleProgress
-        fields = ['module', 'completed']
+        fields = ['module', 'completed', 'watch_position']
+
+
+class ValuesSerializer:
+    """
+    Read-only serializer for hot list endpoints that builds plain dicts from `.values()`
+    rows, skipping DRF's per-field machinery. Each subclass mirrors the output of a DRF
+    serializer (`Meta.fields` order included) and honours `?fields=` like
+    SparseFieldsetMixin.
+    Args:
+        fields: Comma separated (or pre-parsed) field paths, defaults to the `fields` query parameter
+        context: The serializer context, with the request
+        prefix: Lookup prefix of the columns when the rows belong to a related model
+    """
+    fields = []
+    columns = []
+
+    def __init__(self, fields=None, context=None, prefix=''):
+        self.context = context or {}
+        self.prefix = prefix
+        if fields is None:
+            request = self.context.get('request')
+            fields = request.query_params.get(SparseFieldsetMixin.fields_query_param) if request is not None else None
+        self.tree = SparseFieldsetMixin.parse_fields(fields) if isinstance(fields, str) else (fields or {})
+        self.output_fields = [name for name in self.fields if not self.tree or name in self.tree]
+
+    def get_columns(self):
+        return [self.prefix + column for column in self.columns]
+
+    def values(self, queryset):
+        return queryset.values(*self.get_columns())
+
+    def serialize(self, queryset):
+        """
+        Return the representation of every row of a queryset, or of already fetched `.values()` rows
+        """
+        rows = self.values(queryset) if isinstance(queryset, QuerySet) else queryset
+        return [self.to_representation(row) for row in rows]
+
+    def to_representation(self, row):
+        raise NotImplementedError
+
+
+class ModuleValuesSerializer(ValuesSerializer):
+    """
+    ModuleSerializer output from `.values()` rows
+    """
+    fields = ModuleSerializer.Meta.fields
+    columns = ['id', 'name', 'description', 'module_type', 'mux_playback_id']
+
+    def to_representation(self, row):
+        prefix = self.prefix
+        playback_id = row[prefix + 'mux_playback_id']
+        token = None
+        if settings.MUX_PLAYBACK_POLICY == "signed" and playback_id and (
+            'mux_playback_url' in self.output_fields or 'mux_playback_token' in self.output_fields
+        ):
+            token = get_mux_playback_token(playback_id)
+        playback_url = Module.playback_url_for(playback_id)
+        data = {
+            'id': row[prefix + 'id'],
+            'name': row[prefix + 'name'],
+            'description': row[prefix + 'description'],
+            'module_type': row[prefix + 'module_type'],
+            'mux_playback_url': f"{playback_url}?token={token}" if token else playback_url,
+            'mux_playback': playback_id,
+            'mux_playback_token': token,
+        }
+        if self.tree:
+            return {name: data[name] for name in self.output_fields}
+        return data
+
+
+class UserModuleProgressValuesSerializer(ValuesSerializer):
+    """
+    UserModuleProgressSerializer output from `.values()` rows, with the module columns joined in
+    """
+    fields = UserModuleProgressSerializer.Meta.fields
+    # `id` is selected for cursor pagination, it is not part of the output
+    columns = ['id', 'completed', 'watch_position']
+
+    def __init__(self, fields=None, context=None, prefix=''):
+        super().__init__(fields, context, prefix)
+        self.module = ModuleValuesSerializer(self.tree.get('module') or {}, self.context, prefix + 'module__')
+
+    def get_columns(self):
+        return super().get_columns() + self.module.get_columns()
+
+    def to_representation(self, row):
+        data = {}
+        if 'module' in self.output_fields:
+            data['module'] = self.module.to_representation(row)
+        if 'completed' in self.output_fields:
+            data['completed'] = row[self.prefix + 'completed']
+        if 'watch_position' in self.output_fields:
+            data['watch_position'] = row[self.prefix + 'watch_position']
+        return data
+
+
+class ModuleProgressEventSerializer(serializers.Serializer):
+    module_id = serializers.IntegerField()
+    completed = serializers.BooleanField(default=True)
+    timestamp = serializers.DateTimeField(required=False)
 
 
-class ModuleQuizSerializer(serializers.ModelSerializer):
+class ModuleProgressBatchSerializer(serializers.Serializer):
+    events = ModuleProgressEventSerializer(
+        many=True,
+        allow_empty=False,
+        max_length=settings.MODULE_PROGRESS_BATCH_MAX_EVENTS
+    )
+
+    def validate_events(self, events):
+        """
+        Validate the events against the cached module catalog
+        """
+        unknown_ids = sorted({event['module_id'] for event in events} - set(get_module_catalog()))
+        if unknown_ids:
+            raise serializers.ValidationError(
+                f"Unknown module ids: {', '.join(str(module_id) for module_id in unknown_ids)}"
+            )
+        return events
+
+
+class ModuleProgressBatchResultSerializer(serializers.Serializer):
+    applied = serializers.ListField(child=serializers.IntegerField())
+    skipped = serializers.ListField(child=serializers.IntegerField())
+    completed_modules = serializers.IntegerField()
+    total_modules = serializers.IntegerField()
+    percentage_completed = serializers.FloatField()
+
+
+class WatchHeartbeatSerializer(serializers.Serializer):
+    position = serializers.FloatField(min_value=0, max_value=settings.WATCH_PROGRESS_MAX_DURATION)
+    duration = serializers.FloatField(min_value=0, max_value=settings.WATCH_PROGRESS_MAX_DURATION)
+
+    def validate(self, attrs):
+        """
+        Clamp the position to the duration, players can report a position past the end
+        """
+        attrs['position'] = min(attrs['position'], attrs['duration'])
+        return attrs
+
+
+class ModuleQuizSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = ModuleQuiz
-        fields = ['id', 'module', 'question', 'options', 'correct_answer']
+        fields = ['id', 'module', 'question', 'options']
+
+
+class ModuleQuizResultSerializer(serializers.Serializer):
+    score = serializers.CharField()
+    passed = serializers.BooleanField()
+    correct_answers = serializers.IntegerField()
+    total_questions = serializers.IntegerField()
+    module_completed = serializers.BooleanField()
 
 
 class DashboardSerializer(serializers.Serializer):
@@ -148,14 +352,15 @@ class MarkModuleAsCompletedSerializer(serializers.Serializer):
     completed = serializers.BooleanField()
     
     
-class FinalQuizSerializer(serializers.ModelSerializer):
+class FinalQuizSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = FinalQuiz
-        fields = ['question', 'options']
+        fields = ['id', 'question', 'options']
 
 
 class FinalQuizSubmissionSerializer(serializers.Serializer):
-    question = serializers.CharField()
+    question_id = serializers.IntegerField(required=False)
+    question = serializers.CharField(required=False)
     selected_option = serializers.CharField()
 
 
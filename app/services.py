@@ -1,21 +1,24 @@
-import mux_python
-from mux_python.rest import ApiException
 from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from utils.metrics import record_cache_lookup
+from .models import Module
 
-def create_mux_asset(video_url):
-    configuration = mux_python.Configuration()
-    configuration.username = settings.MUX_TOKEN_ID
-    configuration.password = settings.MUX_TOKEN_SECRET
-    api_client = mux_python.ApiClient(configuration)
-    assets_api = mux_python.AssetsApi(api_client)
+MODULE_CATALOG_CACHE_KEY = "module-catalog"
 
-    try:
-        input_settings = mux_python.InputSettings(url=video_url)
-        asset = assets_api.create_asset(mux_python.CreateAssetRequest(
-            input=[input_settings],
-            playback_policy=[mux_python.PlaybackPolicy.PUBLIC],
-        ))
-        return asset
-    except ApiException as e:
-        print(f"Exception creating Mux asset: {e}")
-        return None
+
+def get_module_catalog():
+    """
+    Return a {module_id: module_type} map of all modules, cached until a module is saved or deleted
+    """
+    catalog = cache.get(MODULE_CATALOG_CACHE_KEY)
+    record_cache_lookup("module-catalog", catalog is not None)
+    if catalog is None:
+        # Cached entries outlive replication lag, so fill them from the primary
+        catalog = dict(Module.objects.using(DEFAULT_DB_ALIAS).order_by('id').values_list('id', 'module_type'))
+        cache.set(MODULE_CATALOG_CACHE_KEY, catalog, settings.MODULE_CATALOG_CACHE_TIMEOUT)
+    return catalog
+
+
+def invalidate_module_catalog():
+    cache.delete(MODULE_CATALOG_CACHE_KEY)
@@ -1,17 +1,31 @@
 # signals.py
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
-from .models import Module
-from .services import create_mux_asset
+from .models import Module, ModuleQuiz, FinalQuiz
+from .mux import enqueue_mux_ingest
+from .quiz import invalidate_final_quiz_cache, invalidate_module_quiz
+from .services import invalidate_module_catalog
 
 @receiver(post_save, sender=Module)
-def create_mux_asset_on_save(sender, instance, created, **kwargs):
+def enqueue_mux_ingest_on_create(sender, instance, created, **kwargs):
+    # Only queue the job here, `manage.py process_mux_jobs` talks to Mux
     if created and instance.module_type == "video" and instance.google_drive_file_id:
-        video_url = f"https://drive.google.com/uc?id={instance.google_drive_file_id}&export=download"
-        asset = create_mux_asset(video_url)
-        if asset:
-            instance.mux_asset_id = asset.data.id
-            if asset.data.playback_ids:
-                instance.mux_playback_id = asset.data.playback_ids[0].id
-                instance.mux_status = asset.data.status
-            instance.save()
+        enqueue_mux_ingest(instance.pk)
+
+
+@receiver(post_save, sender=Module)
+@receiver(post_delete, sender=Module)
+def invalidate_module_catalog_on_change(sender, instance, **kwargs):
+    invalidate_module_catalog()
+
+
+@receiver(post_save, sender=ModuleQuiz)
+@receiver(post_delete, sender=ModuleQuiz)
+def invalidate_module_quiz_on_change(sender, instance, **kwargs):
+    invalidate_module_quiz(instance.module_id)
+
+
+@receiver(post_save, sender=FinalQuiz)
+@receiver(post_delete, sender=FinalQuiz)
+def invalidate_final_quiz_cache_on_change(sender, instance, **kwargs):
+    invalidate_final_quiz_cache()
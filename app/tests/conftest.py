@@ -0,0 +1,32 @@
+import pytest
+from cryptography.hazmat.primitives.asymmetric import rsa
+from app.mux import reset_mux_api_client
+from fake_mux import FakeMux
+
+
+@pytest.fixture(scope="session")
+def signing_key():
+    return rsa.generate_private_key(public_exponent=65537, key_size=2048)
+
+
+@pytest.fixture
+def fake_mux(settings):
+    """
+    Point the shared Mux client at a local FakeMux server
+    """
+    server = FakeMux().start()
+    settings.MUX_API_HOST = server.url
+    settings.MUX_TOKEN_ID = "token-id"
+    settings.MUX_TOKEN_SECRET = "token-secret"
+    reset_mux_api_client()
+    yield server
+    reset_mux_api_client()
+    server.stop()
+
+
+@pytest.fixture(autouse=True)
+def primary_reads(settings):
+    """
+    Keep reads on the primary so tests pass with DB_REPLICA_HOST set, replica tests opt back in
+    """
+    settings.DATABASE_REPLICA_ALIAS = None
@@ -0,0 +1,120 @@
+"""
+In-process stand-in for the parts of the Mux Video API the app uses
+"""
+import json
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+ASSETS_PATH = "/video/v1/assets"
+
+
+class FakeMux:
+    """
+    Serve the Mux asset endpoints from memory on a random local port
+    Attributes:
+        assets: Stored assets by id, in creation order
+        requests: (method, path, client port) of every request received
+        failures: Status codes returned, one per request, before requests are served normally
+        delay: Seconds to wait before answering each request
+    """
+
+    def __init__(self):
+        self.assets = {}
+        self.requests = []
+        self.failures = []
+        self.delay = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self._server.server_port}"
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def add_asset(self, status="preparing", passthrough=None, playback_policy="public"):
+        asset_id = uuid.uuid4().hex
+        asset = {
+            "id": asset_id,
+            "status": status,
+            "created_at": str(int(time.time())),
+            "playback_ids": [{"id": uuid.uuid4().hex, "policy": playback_policy}],
+        }
+        if passthrough is not None:
+            asset["passthrough"] = passthrough
+        with self._lock:
+            self.assets[asset_id] = asset
+        return asset
+
+    def _handler_class(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            # Keep-alive, so tests can observe connection reuse
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def send_json(self, status, payload):
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def handle_request(self):
+                url = urlparse(self.path)
+                length = int(self.headers.get("Content-Length") or 0)
+                body = json.loads(self.rfile.read(length)) if length else {}
+                with fake._lock:
+                    fake.requests.append((self.command, url.path, self.client_address[1]))
+                    failure = fake.failures.pop(0) if fake.failures else None
+                if fake.delay:
+                    time.sleep(fake.delay)
+                if not self.headers.get("Authorization", "").startswith("Basic "):
+                    return self.send_json(401, {"error": {"type": "unauthorized", "messages": ["Unauthorized"]}})
+                if failure:
+                    return self.send_json(failure, {"error": {"type": "error", "messages": [f"Fake error {failure}"]}})
+                return self.route(url, body)
+
+            def route(self, url, body):
+                if url.path == ASSETS_PATH and self.command == "POST":
+                    policies = body.get("playback_policy") or ["public"]
+                    asset = fake.add_asset(passthrough=body.get("passthrough"), playback_policy=policies[0])
+                    return self.send_json(201, {"data": asset})
+                if url.path == ASSETS_PATH and self.command == "GET":
+                    query = parse_qs(url.query)
+                    limit = int(query.get("limit", ["25"])[0])
+                    if "cursor" in query:
+                        start = int(query["cursor"][0])
+                    else:
+                        start = (int(query.get("page", ["1"])[0]) - 1) * limit
+                    with fake._lock:
+                        assets = list(fake.assets.values())
+                    end = start + limit
+                    next_cursor = str(end) if end < len(assets) else None
+                    return self.send_json(200, {"data": assets[start:end], "next_cursor": next_cursor})
+                if url.path.startswith(ASSETS_PATH + "/") and self.command == "GET":
+                    asset = fake.assets.get(url.path.rsplit("/", 1)[-1])
+                    if asset is None:
+                        return self.send_json(404, {"error": {"type": "not_found", "messages": ["Not found"]}})
+                    return self.send_json(200, {"data": asset})
+                return self.send_json(404, {"error": {"type": "not_found", "messages": ["Not found"]}})
+
+            do_GET = handle_request
+            do_POST = handle_request
+
+        return Handler
@@ -0,0 +1,125 @@
+import pytest
+from django.conf import settings as django_settings
+from django.core.cache import cache
+from django.db import connections
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+from app.models import Module, UserModuleProgress, UserProfile
+from utils import db_routing
+from utils.db_routing import ReplicaRouter, reads_from
+
+has_replica = "replica" in django_settings.DATABASES
+
+
+class TestReplicaRouter:
+    @pytest.fixture(autouse=True)
+    def setup(self, settings):
+        settings.DATABASE_REPLICA_ALIAS = "replica"
+        self.router = ReplicaRouter()
+
+    def test_reads_use_primary_outside_replica_block(self):
+        assert self.router.db_for_read(Module) is None
+
+    def test_reads_use_replica_inside_block(self):
+        with reads_from("replica"):
+            assert self.router.db_for_read(Module) == "replica"
+        assert self.router.db_for_read(Module) is None
+
+    def test_writes_always_use_primary(self):
+        with reads_from("replica"):
+            assert self.router.db_for_write(Module) == "default"
+
+    def test_replica_is_not_migrated(self):
+        assert self.router.allow_migrate("default", "app") is True
+        assert self.router.allow_migrate("replica", "app") is False
+
+
+@pytest.mark.django_db
+class TestReplicaReadViews:
+    @pytest.fixture(autouse=True)
+    def setup(self, settings, django_user_model, monkeypatch):
+        cache.clear()
+        settings.DATABASE_REPLICA_ALIAS = "replica"
+        self.user = django_user_model.objects.create_user(email="replica@example.com", password="testpass123")
+        UserProfile.objects.create(user=self.user, first_name="Replica", last_name="Test", is_verified=True)
+        self.module = Module.objects.create(name="Intro", description="desc", module_type="video", google_drive_file_id="1234567890")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        # Record where each read would go but run it on the primary, so no second database is needed
+        self.reads = []
+        real_db_for_read = ReplicaRouter.db_for_read
+
+        def spy(router, model, **hints):
+            self.reads.append(real_db_for_read(router, model, **hints))
+            return None
+
+        monkeypatch.setattr(ReplicaRouter, "db_for_read", spy)
+
+    def get_dashboard(self):
+        self.reads.clear()
+        response = self.client.get(reverse("dashboard"))
+        assert response.status_code == 200
+        return set(self.reads)
+
+    def test_safe_reads_go_to_replica(self):
+        assert self.get_dashboard() == {"replica"}
+
+        self.reads.clear()
+        response = self.client.get(reverse("get-module", kwargs={"module_id": self.module.id}))
+        assert response.status_code == 200
+        assert set(self.reads) == {"replica"}
+
+    def test_unannotated_views_read_from_primary(self):
+        response = self.client.get(reverse("check-user-session"))
+        assert response.status_code == 200
+        assert "replica" not in self.reads
+
+    def test_reads_stick_to_primary_after_write(self):
+        response = self.client.post(reverse("mark-module-as-completed", kwargs={"module_id": self.module.id}))
+        assert response.status_code == 200
+        assert db_routing.wrote_recently(self.user.pk)
+        assert self.get_dashboard() == {None}
+
+        cache.delete(db_routing.RECENT_WRITE_CACHE_KEY.format(user_id=self.user.pk))
+        assert self.get_dashboard() == {"replica"}
+
+    def test_other_users_keep_reading_from_replica(self, django_user_model):
+        db_routing.mark_recent_write(self.user.pk)
+        other = django_user_model.objects.create_user(email="other@example.com", password="testpass123")
+        self.client.force_authenticate(user=other)
+        assert self.get_dashboard() == {"replica"}
+
+    def test_no_replica_configured(self, settings):
+        settings.DATABASE_REPLICA_ALIAS = None
+        assert self.get_dashboard() == {None}
+        self.client.post(reverse("mark-module-as-completed", kwargs={"module_id": self.module.id}))
+        assert not db_routing.wrote_recently(self.user.pk)
+
+
+@pytest.mark.skipif(not has_replica, reason="Set DB_REPLICA_HOST to run against a second database alias")
+# Committed data is needed, the replica connection cannot see the test transaction
+@pytest.mark.django_db(transaction=True, databases=["default", "replica"])
+class TestReplicaDatabase:
+    @pytest.fixture(autouse=True)
+    def setup(self, settings, django_user_model):
+        cache.clear()
+        settings.DATABASE_REPLICA_ALIAS = "replica"
+        self.user = django_user_model.objects.create_user(email="replica-db@example.com", password="testpass123")
+        self.module = Module.objects.create(name="Intro", description="desc", module_type="video", google_drive_file_id="1234567890")
+        UserModuleProgress.objects.create(user=self.user, module=self.module, completed=True)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def test_dashboard_queries_run_on_replica(self):
+        with CaptureQueriesContext(connections["replica"]) as replica_queries:
+            response = self.client.get(reverse("dashboard"))
+        assert response.status_code == 200
+        assert response.data["data"]["completed_modules"] == 1
+        assert any("app_usermoduleprogress" in query["sql"] for query in replica_queries)
+
+    def test_writes_run_on_primary(self):
+        with CaptureQueriesContext(connections["default"]) as primary_queries:
+            response = self.client.post(reverse("mark-module-as-completed", kwargs={"module_id": self.module.id}))
+        assert response.status_code == 200
+        assert any(query["sql"].startswith("UPDATE") for query in primary_queries)
@@ -0,0 +1,78 @@
+import base64
+import pytest
+from cryptography.hazmat.primitives import serialization
+from django.urls import reverse
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework.request import Request
+from app.models import Module, UserModuleProgress, UserProfile
+from app.serializers import (
+    ModuleSerializer,
+    ModuleValuesSerializer,
+    UserModuleProgressSerializer,
+    UserModuleProgressValuesSerializer,
+)
+
+FIELDS = [None, "", "id,name", "mux_playback_url", "module", "module.id,completed", "completed,module.mux_playback_token", "unknown"]
+
+
+def request_with_fields(fields):
+    query = {} if fields is None else {"fields": fields}
+    return Request(APIRequestFactory().get("/", query))
+
+
+@pytest.mark.django_db
+class TestValuesSerializers:
+    @pytest.fixture(autouse=True)
+    def setup(self, django_user_model):
+        self.user = django_user_model.objects.create_user(email="fast@example.com", password="testpass123")
+        modules = Module.objects.bulk_create([
+            Module(name="Intro", description="desc", module_type="video", mux_playback_id="playback-1"),
+            Module(name="Reading", description="", module_type="text"),
+            Module(name="Poster", description="Ünïcode", module_type="image", mux_playback_id="playback-2"),
+        ])
+        UserModuleProgress.objects.create(user=self.user, module=modules[0], completed=True, watch_position=120)
+        UserModuleProgress.objects.create(user=self.user, module=modules[2], completed=False)
+
+    def assert_same_output(self):
+        for fields in FIELDS:
+            context = {"request": request_with_fields(fields)}
+            modules = Module.objects.order_by("id")
+            assert ModuleValuesSerializer(context=context).serialize(modules) == \
+                ModuleSerializer(modules, many=True, context=context).data, fields
+            progress = UserModuleProgress.objects.filter(user=self.user).order_by("id")
+            assert UserModuleProgressValuesSerializer(context=context).serialize(progress) == \
+                UserModuleProgressSerializer(progress.select_related("module"), many=True, context=context).data, fields
+
+    def test_matches_drf_serializers(self):
+        self.assert_same_output()
+
+    def test_matches_drf_serializers_with_signed_playback(self, settings, signing_key):
+        pem = signing_key.private_bytes(
+            serialization.Encoding.PEM,
+            serialization.PrivateFormat.TraditionalOpenSSL,
+            serialization.NoEncryption()
+        )
+        settings.MUX_PLAYBACK_POLICY = "signed"
+        settings.MUX_SIGNING_KEY_ID = "signing-key"
+        settings.MUX_SIGNING_PRIVATE_KEY = base64.b64encode(pem).decode()
+        self.assert_same_output()
+
+    def test_explicit_fields_override_query(self):
+        context = {"request": request_with_fields("id")}
+        assert ModuleValuesSerializer(fields="name", context=context).serialize(Module.objects.order_by("id"))[0] == {"name": "Intro"}
+
+    def test_views_use_values_rows(self, django_assert_num_queries):
+        UserProfile.objects.create(user=self.user, first_name="Fast", last_name="Path", is_verified=True)
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+        modules = ModuleSerializer(Module.objects.order_by("id"), many=True).data
+        with django_assert_num_queries(2):
+            response = client.get(reverse("dashboard"))
+        assert response.data["data"]["modules"] == modules
+        assert response.data["data"]["total_modules"] == 3
+
+        response = client.get(reverse("module-progress"), {"page_size": 1, "fields": "completed"})
+        assert response.data["data"]["results"] == [{"completed": True}]
+        response = client.get(response.data["data"]["next"])
+        assert response.data["data"]["results"] == [{"completed": False}]
+        assert response.data["data"]["next"] is None
@@ -0,0 +1,98 @@
+import json
+import logging
+import pytest
+from django.urls import reverse
+from rest_framework.test import APIClient
+from app.models import Certificate, Module, QuizSession, UserProfile
+from utils.instrumentation import RequestTimings, logger, timed
+
+
+@pytest.fixture
+def performance_log(caplog):
+    # app.performance does not propagate to the root logger caplog listens on
+    logger.addHandler(caplog.handler)
+    caplog.set_level(logging.INFO, logger=logger.name)
+    yield caplog
+    logger.removeHandler(caplog.handler)
+
+
+def parse_server_timing(header):
+    metrics = {}
+    for metric in header.split(", "):
+        name, *params = metric.split(";")
+        metrics[name] = dict(param.split("=", 1) for param in params)
+    return metrics
+
+
+@pytest.mark.django_db
+class TestRequestTimingMiddleware:
+    @pytest.fixture(autouse=True)
+    def setup(self, settings, django_user_model):
+        settings.SERVER_TIMING_HEADER = True
+        settings.SLOW_REQUEST_THRESHOLD_MS = 60_000
+        self.user = django_user_model.objects.create_user(email="timing@example.com", password="testpass123")
+        UserProfile.objects.create(user=self.user, first_name="Timing", last_name="Test", is_verified=True)
+        Module.objects.create(name="Intro", description="desc", module_type="video", google_drive_file_id="1234567890")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def test_server_timing_header(self):
+        response = self.client.get(reverse("dashboard"))
+        assert response.status_code == 200
+        metrics = parse_server_timing(response["Server-Timing"])
+        assert list(metrics) == ["db", "app", "total"]
+        assert metrics["db"]["desc"] == '"2 queries"'
+        assert float(metrics["total"]["dur"]) >= float(metrics["db"]["dur"])
+
+    def test_external_calls_get_their_own_metric(self):
+        session = QuizSession.objects.create(user=self.user, attempt_number=1, score=100, passed=True)
+        certificate = Certificate.objects.create(user=self.user, quiz_session=session, score=100, is_valid=True)
+        response = self.client.get(reverse("certificate-download", kwargs={"certificate_id": certificate.certificate_id}))
+        assert response.status_code == 200
+        assert float(parse_server_timing(response["Server-Timing"])["pdf"]["dur"]) > 0
+
+    def test_header_can_be_disabled(self, settings):
+        settings.SERVER_TIMING_HEADER = False
+        response = self.client.get(reverse("dashboard"))
+        assert not response.has_header("Server-Timing")
+
+    def test_allowed_origins_may_read_timings(self):
+        response = self.client.get(reverse("dashboard"), HTTP_ORIGIN="http://localhost:3000")
+        assert response["Timing-Allow-Origin"] == "http://localhost:3000"
+        response = self.client.get(reverse("dashboard"), HTTP_ORIGIN="https://evil.example.com")
+        assert not response.has_header("Timing-Allow-Origin")
+
+    def test_every_request_is_logged(self, performance_log):
+        self.client.get(reverse("dashboard"))
+        [record] = performance_log.records
+        assert record.levelno == logging.INFO
+        line = json.loads(record.getMessage())
+        assert line["view"] == "dashboard"
+        assert line["status"] == 200
+        assert line["db_queries"] == 2
+        assert "top_queries" not in line
+
+    def test_slow_requests_log_top_queries(self, settings, performance_log):
+        settings.SLOW_REQUEST_THRESHOLD_MS = 0
+        settings.SLOW_REQUEST_TOP_QUERIES = 1
+        self.client.get(reverse("dashboard"))
+        [record] = performance_log.records
+        assert record.levelno == logging.WARNING
+        line = record.performance
+        assert line["slow"] is True
+        assert len(line["top_queries"]) == 1
+        assert line["top_queries"][0]["sql"].startswith("SELECT")
+
+
+class TestRequestTimings:
+    def test_keeps_the_slowest_queries(self):
+        timings = RequestTimings(top_queries=2)
+        for seconds, sql in [(0.1, "a"), (0.5, "b"), (0.2, "c"), (0.05, "d")]:
+            timings.record_query(sql, seconds)
+        assert timings.db_queries == 4
+        assert timings.db_seconds == pytest.approx(0.85)
+        assert timings.slowest_queries() == [(0.5, "b"), (0.2, "c")]
+
+    def test_timed_outside_a_request_is_a_no_op(self):
+        with timed("mux"):
+            pass
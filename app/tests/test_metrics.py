@@ -0,0 +1,94 @@
+import subprocess
+import sys
+import pytest
+from django.conf import settings
+from django.core.cache import cache
+from django.urls import reverse
+from prometheus_client import REGISTRY, CollectorRegistry, multiprocess
+from rest_framework.test import APIClient
+from app.models import Module, UserProfile
+from app.services import get_module_catalog
+from utils.email import validate_otp
+from utils.instrumentation import timed
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+@pytest.mark.django_db
+class TestMetricsEndpoint:
+    @pytest.fixture(autouse=True)
+    def setup(self, settings):
+        settings.METRICS_TOKEN = "metrics-token"
+        settings.METRICS_ALLOWED_IPS = ["127.0.0.1"]
+        self.client = APIClient()
+
+    def test_allowed_ip(self):
+        response = self.client.get("/metrics")
+        assert response.status_code == 200
+        assert response["Content-Type"].startswith("text/plain")
+        assert b"http_request_duration_seconds" in response.content
+
+    def test_other_ips_are_rejected(self, settings):
+        settings.METRICS_ALLOWED_IPS = ["10.0.0.0/8"]
+        assert self.client.get("/metrics").status_code == 403
+        assert self.client.get("/metrics", REMOTE_ADDR="10.1.2.3").status_code == 200
+
+    def test_token(self, settings):
+        settings.METRICS_ALLOWED_IPS = []
+        assert self.client.get("/metrics").status_code == 403
+        assert self.client.get("/metrics", HTTP_AUTHORIZATION="Bearer wrong").status_code == 403
+        assert self.client.get("/metrics", HTTP_AUTHORIZATION="Bearer metrics-token").status_code == 200
+
+    def test_requests_are_recorded_per_url_name(self, django_user_model):
+        user = django_user_model.objects.create_user(email="metrics@example.com", password="testpass123")
+        UserProfile.objects.create(user=user, first_name="Metrics", last_name="Test", is_verified=True)
+        Module.objects.create(name="Intro", description="desc", module_type="video", google_drive_file_id="1234567890")
+        self.client.force_authenticate(user=user)
+        labels = {"view": "dashboard", "method": "GET", "status": "200"}
+        before = sample("http_request_duration_seconds_count", **labels)
+        queries_before = sample("http_request_db_queries_sum", view="dashboard")
+
+        self.client.get(reverse("dashboard"))
+
+        assert sample("http_request_duration_seconds_count", **labels) == before + 1
+        assert sample("http_request_db_queries_sum", view="dashboard") == queries_before + 2
+        body = self.client.get("/metrics").content.decode()
+        assert 'http_request_duration_seconds_count{method="GET",status="200",view="dashboard"}' in body
+
+    def test_otp_verifications(self, django_user_model):
+        django_user_model.objects.create_user(email="otp-metrics@example.com", password="testpass123")
+        before = sample("otp_verifications_total", purpose="verify_email", result="invalid")
+        validate_otp("otp-metrics@example.com", "000000", require_verified=False)
+        assert sample("otp_verifications_total", purpose="verify_email", result="invalid") == before + 1
+
+    def test_cache_lookups(self):
+        cache.clear()
+        misses = sample("cache_lookups_total", cache="module-catalog", result="miss")
+        hits = sample("cache_lookups_total", cache="module-catalog", result="hit")
+        get_module_catalog()
+        get_module_catalog()
+        assert sample("cache_lookups_total", cache="module-catalog", result="miss") == misses + 1
+        assert sample("cache_lookups_total", cache="module-catalog", result="hit") == hits + 1
+
+    def test_external_calls_outside_requests(self):
+        before = sample("external_call_duration_seconds_count", operation="pdf")
+        with timed("pdf"):
+            pass
+        assert sample("external_call_duration_seconds_count", operation="pdf") == before + 1
+
+
+def test_multiprocess_mode_aggregates_processes(tmp_path):
+    # Each process writes its own samples; the collector sums them like /metrics does under gunicorn
+    script = "from utils.metrics import OTP_ISSUED; OTP_ISSUED.labels('verify_email', 'true').inc()"
+    for _ in range(2):
+        subprocess.run(
+            [sys.executable, "-c", script],
+            env={"PROMETHEUS_MULTIPROC_DIR": str(tmp_path)},
+            cwd=settings.BASE_DIR,
+            check=True,
+        )
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry, path=str(tmp_path))
+    assert registry.get_sample_value("otp_issued_total", {"purpose": "verify_email", "email_sent": "true"}) == 2
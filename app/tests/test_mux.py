@@ -0,0 +1,480 @@
+import base64
+import hashlib
+import hmac
+import json
+import jwt
+import pytest
+import time
+from datetime import timedelta
+from io import StringIO
+from types import SimpleNamespace
+from cryptography.hazmat.primitives import serialization
+from django.core.management import call_command
+from django.urls import reverse
+from rest_framework.test import APIClient
+from django.utils import timezone
+from mux_python.rest import ApiException
+from app import mux
+from app.models import Module, MuxIngestJob, MuxWebhookEvent, UserProfile
+from utils.rate_limit import TokenBucket
+
+
+def fake_asset(asset_id="asset-1", playback_id="playback-1"):
+    return SimpleNamespace(data=SimpleNamespace(
+        id=asset_id,
+        playback_ids=[SimpleNamespace(id=playback_id)],
+        status="preparing"
+    ))
+
+
+@pytest.mark.django_db
+class TestMuxIngestJobs:
+    @pytest.fixture(autouse=True)
+    def setup(self, settings, monkeypatch):
+        settings.MUX_TOKEN_ID = "token-id"
+        settings.MUX_TOKEN_SECRET = "token-secret"
+        settings.MUX_INGEST_MAX_ATTEMPTS = 3
+        settings.MUX_INGEST_RETRY_BASE_SECONDS = 30
+        self.calls = []
+        self.responses = []
+
+        def request_mux_asset(video_url, passthrough=None):
+            self.calls.append((video_url, passthrough))
+            response = self.responses.pop(0)
+            if isinstance(response, Exception):
+                raise response
+            return response
+
+        monkeypatch.setattr(mux, "request_mux_asset", request_mux_asset)
+        self.existing_assets = {}
+        monkeypatch.setattr(mux, "find_mux_asset_id", self.existing_assets.get)
+        monkeypatch.setattr(mux, "get_mux_asset", lambda asset_id: fake_asset(asset_id=asset_id))
+        self.module = Module.objects.create(name="Video", description="desc", module_type="video", google_drive_file_id="drive-1")
+        self.job = MuxIngestJob.objects.get(module=self.module)
+
+    def process(self):
+        call_command('process_mux_jobs', stdout=StringIO())
+        self.module.refresh_from_db()
+        self.job.refresh_from_db()
+
+    def test_saving_a_module_only_queues_a_job(self):
+        assert self.calls == []
+        assert self.job.status == "pending"
+        mux.enqueue_mux_ingest(self.module.pk)
+        assert MuxIngestJob.objects.filter(module=self.module).count() == 1
+        Module.objects.create(name="Text", description="desc", module_type="text")
+        assert MuxIngestJob.objects.count() == 1
+
+    def test_job_creates_asset_keyed_on_module(self):
+        self.responses.append(fake_asset())
+        self.process()
+        assert self.calls == [(mux.google_drive_download_url("drive-1"), str(self.module.pk))]
+        assert self.job.status == "succeeded"
+        assert self.module.mux_asset_id == "asset-1"
+        assert self.module.mux_playback_id == "playback-1"
+        assert self.module.mux_status == "preparing"
+
+    def test_transient_errors_are_retried_with_backoff(self):
+        self.responses.extend([ApiException(status=503, reason="Unavailable"), fake_asset()])
+        self.process()
+        assert self.job.status == "pending"
+        assert self.job.attempts == 1
+        assert "Unavailable" in self.job.last_error
+        assert self.job.next_attempt_at > timezone.now() + timedelta(seconds=25)
+
+        # Not due yet, so nothing runs
+        self.process()
+        assert len(self.calls) == 1
+
+        MuxIngestJob.objects.filter(pk=self.job.pk).update(next_attempt_at=timezone.now())
+        self.process()
+        assert self.job.status == "succeeded"
+        assert self.module.mux_asset_id == "asset-1"
+
+    def test_job_fails_after_max_attempts(self):
+        self.responses.extend([ApiException(status=500, reason="Error")] * 3)
+        for _ in range(3):
+            MuxIngestJob.objects.filter(pk=self.job.pk).update(next_attempt_at=timezone.now())
+            self.process()
+        assert self.job.status == "failed"
+        assert self.job.attempts == 3
+        assert self.module.mux_status == "errored"
+
+    def test_retry_delay_is_capped(self, settings):
+        settings.MUX_INGEST_RETRY_MAX_SECONDS = 600
+        assert [mux.mux_ingest_retry_delay(n) for n in (1, 2, 3, 6)] == [30, 60, 120, 600]
+
+    def test_stale_running_job_is_reclaimed(self, settings):
+        MuxIngestJob.objects.filter(pk=self.job.pk).update(
+            status="running",
+            locked_at=timezone.now() - timedelta(seconds=settings.MUX_INGEST_LOCK_TIMEOUT + 1)
+        )
+        self.responses.append(fake_asset())
+        self.process()
+        assert self.job.status == "succeeded"
+
+    def test_store_failure_is_retried_without_a_second_asset(self, monkeypatch):
+        store_mux_asset = mux.store_mux_asset
+
+        def fail(module_id, asset):
+            raise RuntimeError("database unavailable")
+
+        monkeypatch.setattr(mux, "store_mux_asset", fail)
+        self.responses.append(fake_asset())
+        self.process()
+        assert self.job.status == "pending"
+        assert self.job.locked_at is None
+        assert self.job.mux_asset_id == "asset-1"
+        assert "database unavailable" in self.job.last_error
+
+        monkeypatch.setattr(mux, "store_mux_asset", store_mux_asset)
+        MuxIngestJob.objects.filter(pk=self.job.pk).update(next_attempt_at=timezone.now())
+        self.process()
+        assert len(self.calls) == 1
+        assert self.job.status == "succeeded"
+        assert self.module.mux_asset_id == "asset-1"
+
+    def test_reclaimed_job_reuses_asset_created_before_the_worker_died(self, settings):
+        # The first attempt created the asset but died before recording it
+        MuxIngestJob.objects.filter(pk=self.job.pk).update(
+            status="running",
+            attempts=1,
+            locked_at=timezone.now() - timedelta(seconds=settings.MUX_INGEST_LOCK_TIMEOUT + 1)
+        )
+        self.existing_assets[str(self.module.pk)] = "asset-9"
+        self.process()
+        assert self.calls == []
+        assert self.job.status == "succeeded"
+        assert self.module.mux_asset_id == "asset-9"
+
+
+@pytest.mark.django_db
+class TestCreateMuxAssetsCommand:
+    @pytest.fixture(autouse=True)
+    def setup(self, settings, monkeypatch):
+        settings.MUX_TOKEN_ID = "token-id"
+        settings.MUX_TOKEN_SECRET = "token-secret"
+        self.calls = []
+        self.failing = set()
+
+        def request_mux_asset(video_url, passthrough=None):
+            self.calls.append(passthrough)
+            if passthrough in self.failing:
+                raise ApiException(status=503, reason="Unavailable")
+            return fake_asset(asset_id=f"asset-{passthrough}", playback_id=f"playback-{passthrough}")
+
+        monkeypatch.setattr("app.management.commands.create_mux_assets.request_mux_asset", request_mux_asset)
+        self.modules = [
+            Module.objects.create(name=f"Video {i}", description="desc", module_type="video", google_drive_file_id=f"drive-{i}")
+            for i in range(5)
+        ]
+
+    def run(self, *args):
+        out = StringIO()
+        call_command('create_mux_assets', '--rps', '0', *args, stdout=out)
+        return out.getvalue()
+
+    def test_creates_assets_concurrently_and_resumes(self):
+        self.failing.add(str(self.modules[2].pk))
+        output = self.run('--workers', '3')
+        assert "Created 4 Mux asset(s), 1 failed" in output
+        assert sorted(self.calls) == sorted(str(module.pk) for module in self.modules)
+        module = Module.objects.get(pk=self.modules[0].pk)
+        assert module.mux_asset_id == f"asset-{module.pk}"
+        assert module.mux_ingest_job.status == "succeeded"
+
+        self.failing.clear()
+        self.calls.clear()
+        self.run()
+        assert self.calls == [str(self.modules[2].pk)]
+        assert not Module.objects.filter(module_type="video", mux_asset_id__isnull=True).exists()
+
+    def test_skips_modules_whose_job_is_running(self):
+        MuxIngestJob.objects.filter(module=self.modules[0]).update(status="running", locked_at=timezone.now())
+        self.failing.add(str(self.modules[1].pk))
+        output = self.run()
+        assert "Created 3 Mux asset(s), 1 failed, 1 skipped" in output
+        assert str(self.modules[0].pk) not in self.calls
+        # A failed request releases the job for process_mux_jobs to retry
+        job = MuxIngestJob.objects.get(module=self.modules[1])
+        assert (job.status, job.attempts, job.locked_at) == ("pending", 1, None)
+        assert MuxIngestJob.objects.get(module=self.modules[2]).mux_asset_id == f"asset-{self.modules[2].pk}"
+
+    def test_dry_run_makes_no_requests(self):
+        output = self.run('--dry-run', '--limit', '2')
+        assert "2 module(s) would be ingested" in output
+        assert self.calls == []
+
+    def test_only_errored(self):
+        Module.objects.filter(pk=self.modules[1].pk).update(mux_asset_id="old", mux_status="errored")
+        self.run('--only-errored')
+        assert self.calls == [str(self.modules[1].pk)]
+        assert Module.objects.get(pk=self.modules[1].pk).mux_asset_id == f"asset-{self.modules[1].pk}"
+
+
+def test_token_bucket_limits_rate():
+    bucket = TokenBucket(rate=20, capacity=1)
+    start = time.monotonic()
+    for _ in range(5):
+        bucket.acquire()
+    assert time.monotonic() - start >= 0.19
+
+
+@pytest.mark.django_db
+class TestMuxApiClient:
+    def test_client_is_shared(self, fake_mux):
+        assert mux.get_mux_api_client() is mux.get_mux_api_client()
+        mux.reset_mux_api_client()
+        assert mux.get_mux_api_client().configuration.host == fake_mux.url
+
+    def test_ingest_job_against_fake_mux(self, fake_mux):
+        modules = [
+            Module.objects.create(name=f"Video {i}", description="desc", module_type="video", google_drive_file_id=f"drive-{i}")
+            for i in range(3)
+        ]
+        call_command('process_mux_jobs', stdout=StringIO())
+        assert MuxIngestJob.objects.filter(status="succeeded").count() == 3
+        by_passthrough = {asset["passthrough"]: asset for asset in fake_mux.assets.values()}
+        for module in modules:
+            module.refresh_from_db()
+            asset = by_passthrough[str(module.pk)]
+            assert module.mux_asset_id == asset["id"]
+            assert module.mux_playback_id == asset["playback_ids"][0]["id"]
+        # Every request went over the same pooled connection
+        assert len({port for _, _, port in fake_mux.requests}) == 1
+
+    def test_retried_job_finds_asset_by_passthrough(self, fake_mux, settings):
+        module = Module.objects.create(name="Video", description="desc", module_type="video")
+        fake_mux.add_asset()
+        asset = fake_mux.add_asset(passthrough=str(module.pk))
+        MuxIngestJob.objects.filter(module=module).update(
+            status="running",
+            attempts=1,
+            locked_at=timezone.now() - timedelta(seconds=settings.MUX_INGEST_LOCK_TIMEOUT + 1)
+        )
+        call_command('process_mux_jobs', stdout=StringIO())
+        module.refresh_from_db()
+        assert module.mux_asset_id == asset["id"]
+        assert "POST" not in [method for method, _, _ in fake_mux.requests]
+
+    def test_error_responses_are_retried(self, fake_mux):
+        fake_mux.failures.append(503)
+        module = Module.objects.create(name="Video", description="desc", module_type="video")
+        call_command('process_mux_jobs', stdout=StringIO())
+        job = MuxIngestJob.objects.get(module=module)
+        assert job.status == "pending"
+        assert "503" in job.last_error
+
+    def test_read_timeout(self, fake_mux, settings):
+        settings.MUX_READ_TIMEOUT = 0.2
+        fake_mux.delay = 1
+        module = Module.objects.create(name="Video", description="desc", module_type="video")
+        started = time.monotonic()
+        call_command('process_mux_jobs', stdout=StringIO())
+        assert time.monotonic() - started < 1
+        job = MuxIngestJob.objects.get(module=module)
+        assert job.status == "pending"
+        assert "timed out" in job.last_error.lower()
+
+
+@pytest.mark.django_db
+class TestMuxWebhook:
+    @pytest.fixture(autouse=True)
+    def setup(self, settings, client):
+        settings.MUX_WEBHOOK_SECRET = "webhook-secret"
+        self.client = client
+        self.module = Module.objects.create(
+            name="Video", description="desc", module_type="text", mux_asset_id="asset-1", mux_status="preparing"
+        )
+
+    def event(self, event_id, event_type, created_at, **data):
+        return {
+            "id": event_id,
+            "type": event_type,
+            "created_at": created_at,
+            "object": {"type": "asset", "id": "asset-1"},
+            "data": {"id": "asset-1", **data},
+        }
+
+    def post(self, payload, secret="webhook-secret", timestamp=None):
+        body = json.dumps(payload).encode()
+        timestamp = int(time.time()) if timestamp is None else timestamp
+        signature = hmac.new(secret.encode(), f"{timestamp}.".encode() + body, hashlib.sha256).hexdigest()
+        return self.client.post(
+            reverse('mux-webhook'),
+            body,
+            content_type="application/json",
+            HTTP_MUX_SIGNATURE=f"t={timestamp},v1={signature}"
+        )
+
+    def process(self):
+        call_command('process_mux_events', stdout=StringIO())
+        self.module.refresh_from_db()
+
+    def test_events_are_queued_then_applied(self):
+        ready = self.event("evt-1", "video.asset.ready", "2025-01-01T00:00:00Z", playback_ids=[{"id": "playback-1"}])
+        response = self.post(ready)
+        assert response.status_code == 200
+        self.module.refresh_from_db()
+        assert self.module.mux_status == "preparing"
+
+        self.process()
+        assert self.module.mux_status == "ready"
+        assert self.module.mux_playback_id == "playback-1"
+        assert MuxWebhookEvent.objects.get(event_id="evt-1").processed_at is not None
+
+    def test_redelivered_event_is_stored_once(self):
+        payload = self.event("evt-1", "video.asset.errored", "2025-01-01T00:00:00Z")
+        assert self.post(payload).status_code == 200
+        assert self.post(payload).status_code == 200
+        assert MuxWebhookEvent.objects.count() == 1
+
+    def test_events_are_applied_in_creation_order(self):
+        self.post(self.event("evt-2", "video.asset.ready", "2025-01-01T00:01:00Z"))
+        self.post(self.event("evt-1", "video.asset.errored", "2025-01-01T00:00:00Z"))
+        self.process()
+        assert self.module.mux_status == "ready"
+
+        # A late redelivery of an older event does not roll the module back
+        self.post(self.event("evt-0", "video.asset.errored", "2024-12-31T23:59:00Z"))
+        self.process()
+        assert self.module.mux_status == "ready"
+
+    def test_ignored_events_do_not_make_status_events_stale(self):
+        # Within one batch
+        self.post(self.event("evt-2", "video.asset.updated", "2025-01-01T00:01:00Z"))
+        self.post(self.event("evt-1", "video.asset.ready", "2025-01-01T00:00:00Z"))
+        self.process()
+        assert self.module.mux_status == "ready"
+
+        # And against events processed earlier
+        self.post(self.event("evt-4", "video.asset.static_renditions.ready", "2025-01-01T00:03:00Z"))
+        self.process()
+        self.post(self.event("evt-3", "video.asset.errored", "2025-01-01T00:02:00Z"))
+        self.process()
+        assert self.module.mux_status == "errored"
+
+    def test_invalid_or_stale_signature_is_rejected(self):
+        payload = self.event("evt-1", "video.asset.ready", "2025-01-01T00:00:00Z")
+        assert self.post(payload, secret="wrong").status_code == 400
+        assert self.post(payload, timestamp=int(time.time()) - 3600).status_code == 400
+        assert not MuxWebhookEvent.objects.exists()
+
+    def test_webhook_is_rejected_without_secret(self, settings):
+        settings.MUX_WEBHOOK_SECRET = None
+        response = self.client.post(
+            reverse('mux-webhook'),
+            self.event("evt-1", "video.asset.ready", "2025-01-01T00:00:00Z"),
+            content_type="application/json"
+        )
+        assert response.status_code == 503
+        assert not MuxWebhookEvent.objects.exists()
+
+    def test_signature_check_is_skipped_without_secret_in_debug(self, settings):
+        settings.MUX_WEBHOOK_SECRET = None
+        settings.DEBUG = True
+        response = self.client.post(
+            reverse('mux-webhook'),
+            self.event("evt-1", "video.asset.ready", "2025-01-01T00:00:00Z"),
+            content_type="application/json"
+        )
+        assert response.status_code == 200
+
+    def test_only_post_is_allowed(self):
+        assert self.client.get(reverse('mux-webhook')).status_code == 405
+
+
+@pytest.mark.django_db
+class TestMuxReconciliation:
+    def test_reconcile_pages_through_assets_and_bulk_updates(self, fake_mux, django_assert_max_num_queries):
+        assets = [fake_mux.add_asset(status="ready") for _ in range(4)] + [fake_mux.add_asset(status="errored")]
+        fake_mux.add_asset(status="ready")  # an asset no module references
+        modules = [
+            Module.objects.create(
+                name=f"Video {i}", description="desc", module_type="text",
+                mux_asset_id=asset["id"], mux_status="preparing"
+            )
+            for i, asset in enumerate(assets)
+        ]
+        Module.objects.filter(pk=modules[0].pk).update(mux_status="ready", mux_playback_id=assets[0]["playback_ids"][0]["id"])
+        lost = Module.objects.create(name="Lost", description="desc", module_type="text", mux_asset_id="deleted-asset")
+
+        out = StringIO()
+        with django_assert_max_num_queries(3):
+            call_command('reconcile_mux_assets', '--page-size', '2', stdout=out)
+
+        assert "Checked 5 asset(s), updated 4 module(s)" in out.getvalue()
+        assert "1 module asset(s) were not found" in out.getvalue()
+        assert [method for method, _, _ in fake_mux.requests] == ["GET"] * 3
+        statuses = dict(Module.objects.filter(pk__in=[m.pk for m in modules]).values_list('mux_asset_id', 'mux_status'))
+        assert statuses == {asset["id"]: asset["status"] for asset in assets}
+        assert Module.objects.get(pk=modules[1].pk).mux_playback_id == assets[1]["playback_ids"][0]["id"]
+        assert Module.objects.get(pk=lost.pk).mux_status == "pending"
+
+    def test_reconcile_without_changes_writes_nothing(self, fake_mux, django_assert_num_queries):
+        asset = fake_mux.add_asset(status="ready")
+        Module.objects.create(
+            name="Video", description="desc", module_type="text", mux_asset_id=asset["id"],
+            mux_status="ready", mux_playback_id=asset["playback_ids"][0]["id"]
+        )
+        with django_assert_num_queries(1):
+            call_command('reconcile_mux_assets', stdout=StringIO())
+
+
+@pytest.mark.django_db
+class TestSignedPlayback:
+    @pytest.fixture(autouse=True)
+    def setup(self, settings, signing_key, django_user_model):
+        pem = signing_key.private_bytes(
+            serialization.Encoding.PEM,
+            serialization.PrivateFormat.TraditionalOpenSSL,
+            serialization.NoEncryption()
+        )
+        settings.MUX_PLAYBACK_POLICY = "signed"
+        settings.MUX_SIGNING_KEY_ID = "signing-key"
+        settings.MUX_SIGNING_PRIVATE_KEY = base64.b64encode(pem).decode()
+        self.public_key = signing_key.public_key()
+        self.user = django_user_model.objects.create_user(email="signed@example.com", password="testpass123")
+        UserProfile.objects.create(user=self.user, first_name="Signed", last_name="Playback", is_verified=True)
+
+    def test_token_claims(self):
+        token = mux.get_mux_playback_token("playback-1", now=1_000_000)
+        assert jwt.get_unverified_header(token)["kid"] == "signing-key"
+        claims = jwt.decode(token, self.public_key, algorithms=["RS256"], audience="v", options={"verify_exp": False})
+        assert claims["sub"] == "playback-1"
+        refresh = 60 * 60
+        assert claims["exp"] == (1_000_000 // refresh + 1) * refresh + 6 * 60 * 60
+
+    def test_tokens_are_reused_within_a_bucket(self, monkeypatch):
+        calls = []
+        encode = jwt.encode
+        monkeypatch.setattr(mux.jwt, "encode", lambda *args, **kwargs: calls.append(1) or encode(*args, **kwargs))
+        first = mux.get_mux_playback_token("playback-2", now=2_000_000)
+        assert mux.get_mux_playback_token("playback-2", now=2_000_010) == first
+        assert mux.get_mux_playback_token("playback-2", audience="t", now=2_000_010) != first
+        assert mux.get_mux_playback_token("playback-2", now=2_000_000 + 60 * 60) != first
+        assert len(calls) == 3
+
+    def test_dashboard_serializes_signed_urls(self):
+        Module.objects.create(name="Video", description="desc", module_type="text", mux_playback_id="playback-3")
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+        module = client.get(reverse('dashboard')).data["data"]["modules"][0]
+        token = module["mux_playback_token"]
+        assert jwt.decode(token, self.public_key, algorithms=["RS256"], audience="v")["sub"] == "playback-3"
+        assert module["mux_playback_url"] == f"https://stream.mux.com/playback-3.m3u8?token={token}"
+
+    def test_public_mode_has_no_token(self, settings):
+        settings.MUX_PLAYBACK_POLICY = "public"
+        Module.objects.create(name="Video", description="desc", module_type="text", mux_playback_id="playback-4")
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+        module = client.get(reverse('dashboard')).data["data"]["modules"][0]
+        assert module["mux_playback_token"] is None
+        assert module["mux_playback_url"] == "https://stream.mux.com/playback-4.m3u8"
+
+    def test_assets_are_created_with_signed_policy(self, fake_mux):
+        Module.objects.create(name="Video", description="desc", module_type="video")
+        call_command('process_mux_jobs', stdout=StringIO())
+        asset, = fake_mux.assets.values()
+        assert asset["playback_ids"][0]["policy"] == "signed"
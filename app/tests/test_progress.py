@@ -0,0 +1,205 @@
+import pytest
+import threading
+from datetime import timedelta
+from django.core.cache import cache
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework import status
+from django.contrib.auth import get_user_model
+from app.models import Module, UserModuleProgress, UserProfile
+from app.progress import WatchProgressBuffer, watch_progress_buffer
+
+User = get_user_model()
+
+
+@pytest.mark.django_db
+class TestModuleProgressBatch:
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(email="progress@example.com", password="testpass123")
+        UserProfile.objects.create(user=self.user, first_name="Progress", last_name="Test", is_verified=True)
+        self.client.force_authenticate(user=self.user)
+        self.modules = [
+            Module.objects.create(name=f"Module {i}", description="desc", module_type="text")
+            for i in range(3)
+        ]
+
+    def test_batch_sync_applies_events(self):
+        events = [{"module_id": module.id} for module in self.modules[:2]]
+        response = self.client.post(reverse('module-progress-batch'), {"events": events}, format='json')
+        assert response.status_code == status.HTTP_200_OK
+        data = response.data["data"]
+        assert sorted(data["applied"]) == sorted(module.id for module in self.modules[:2])
+        assert data["completed_modules"] == 2
+        assert data["total_modules"] == 3
+        assert UserModuleProgress.objects.filter(user=self.user, completed=True).count() == 2
+
+    def test_batch_sync_rejects_unknown_modules(self):
+        events = [{"module_id": self.modules[0].id}, {"module_id": 999999}]
+        response = self.client.post(reverse('module-progress-batch'), {"events": events}, format='json')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert "999999" in response.data["errors"]["events"]
+        assert not UserModuleProgress.objects.filter(user=self.user).exists()
+
+    def test_batch_sync_skips_stale_events(self):
+        module = self.modules[0]
+        UserModuleProgress.objects.create(user=self.user, module=module, completed=True, updated_at=timezone.now())
+        stale = (timezone.now() - timedelta(days=1)).isoformat()
+        events = [{"module_id": module.id, "completed": False, "timestamp": stale}]
+        response = self.client.post(reverse('module-progress-batch'), {"events": events}, format='json')
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["data"]["skipped"] == [module.id]
+        assert UserModuleProgress.objects.get(user=self.user, module=module).completed is True
+
+    def test_batch_sync_keeps_latest_event_per_module(self):
+        module = self.modules[0]
+        now = timezone.now()
+        events = [
+            {"module_id": module.id, "completed": True, "timestamp": (now - timedelta(minutes=5)).isoformat()},
+            {"module_id": module.id, "completed": False, "timestamp": (now - timedelta(minutes=1)).isoformat()},
+        ]
+        response = self.client.post(reverse('module-progress-batch'), {"events": events}, format='json')
+        assert response.status_code == status.HTTP_200_OK
+        assert UserModuleProgress.objects.get(user=self.user, module=module).completed is False
+
+
+@pytest.mark.django_db
+class TestWatchHeartbeat:
+    @pytest.fixture(autouse=True)
+    def setup(self, settings):
+        cache.clear()
+        settings.WATCH_PROGRESS_FLUSH_INTERVAL = 3600
+        settings.WATCH_PROGRESS_FLUSH_SIZE = 1000
+        self.client = APIClient()
+        self.user = User.objects.create_user(email="heartbeat@example.com", password="testpass123")
+        UserProfile.objects.create(user=self.user, first_name="Heart", last_name="Beat", is_verified=True)
+        self.client.force_authenticate(user=self.user)
+        self.module = Module.objects.create(name="Video", description="desc", module_type="video")
+        yield
+        watch_progress_buffer.flush()
+
+    def heartbeat(self, position, duration=100):
+        return self.client.post(
+            reverse('module-heartbeat', kwargs={"module_id": self.module.id}),
+            {"position": position, "duration": duration},
+            format='json'
+        )
+
+    def test_heartbeats_are_coalesced_until_flush(self):
+        for position in (10, 20, 30):
+            response = self.heartbeat(position)
+            assert response.status_code == status.HTTP_202_ACCEPTED
+        assert not UserModuleProgress.objects.filter(user=self.user).exists()
+        assert watch_progress_buffer.flush() == 1
+        progress = UserModuleProgress.objects.get(user=self.user, module=self.module)
+        assert progress.watch_position == 30
+        assert progress.completed is False
+
+    def test_heartbeat_past_threshold_completes_module(self, settings):
+        settings.WATCH_PROGRESS_COMPLETION_THRESHOLD = 0.9
+        response = self.heartbeat(95)
+        assert response.data["data"]["completed"] is True
+        # Completions are written without waiting for a flush
+        assert UserModuleProgress.objects.get(user=self.user, module=self.module).completed is True
+        self.heartbeat(5)
+        watch_progress_buffer.flush()
+        progress = UserModuleProgress.objects.get(user=self.user, module=self.module)
+        assert progress.completed is True
+        assert progress.watch_position == 5
+
+    def test_flush_does_not_undo_completion(self):
+        UserModuleProgress.objects.create(user=self.user, module=self.module, completed=True)
+        self.heartbeat(10)
+        watch_progress_buffer.flush()
+        assert UserModuleProgress.objects.get(user=self.user, module=self.module).completed is True
+
+    def test_flusher_thread_flushes_every_interval(self, settings, monkeypatch):
+        settings.WATCH_PROGRESS_FLUSH_INTERVAL = 0.01
+        buffer = WatchProgressBuffer()
+        flushed = threading.Event()
+        monkeypatch.setattr(buffer, "flush", lambda: flushed.set() or 0)
+        buffer.start()
+        try:
+            assert flushed.wait(5)
+        finally:
+            buffer.stop()
+
+    def test_heartbeat_rejects_oversized_values(self):
+        response = self.heartbeat(1e15, duration=1e15)
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_heartbeat_position_is_clamped_to_duration(self):
+        response = self.heartbeat(500, duration=100)
+        assert response.status_code == status.HTTP_202_ACCEPTED
+        assert UserModuleProgress.objects.get(user=self.user, module=self.module).watch_position == 100
+
+    def test_failed_flush_requeues_positions(self, monkeypatch):
+        buffer = WatchProgressBuffer()
+        buffer.record(self.user.id, self.module.id, 10, 100)
+        write = buffer._write
+
+        def fail(pending):
+            raise RuntimeError("database unavailable")
+
+        monkeypatch.setattr(buffer, "_write", fail)
+        with pytest.raises(RuntimeError):
+            buffer.flush()
+        assert buffer._pending == {(self.user.id, self.module.id): (10, False)}
+        buffer.record(self.user.id, self.module.id, 20, 100)
+        monkeypatch.setattr(buffer, "_write", write)
+        try:
+            assert buffer.flush() == 1
+        finally:
+            buffer.stop()
+        assert UserModuleProgress.objects.get(user=self.user, module=self.module).watch_position == 20
+
+    def test_heartbeat_rejects_non_video_module(self):
+        module = Module.objects.create(name="Text", description="desc", module_type="text")
+        response = self.client.post(
+            reverse('module-heartbeat', kwargs={"module_id": module.id}),
+            {"position": 1, "duration": 10},
+            format='json'
+        )
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.mark.django_db
+class TestModuleProgressPagination:
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(email="pages@example.com", password="testpass123")
+        UserProfile.objects.create(user=self.user, first_name="Page", last_name="Test", is_verified=True)
+        self.client.force_authenticate(user=self.user)
+        for i in range(5):
+            module = Module.objects.create(name=f"Module {i}", description="desc", module_type="text")
+            UserModuleProgress.objects.create(user=self.user, module=module, completed=i % 2 == 0)
+
+    def test_cursor_pagination_walks_all_rows(self):
+        response = self.client.get(reverse('module-progress'), {"page_size": 2})
+        assert response.status_code == status.HTTP_200_OK
+        seen = []
+        data = response.data["data"]
+        while True:
+            seen.extend(item["module"]["id"] for item in data["results"])
+            if not data["next"]:
+                break
+            data = self.client.get(data["next"]).data["data"]
+        assert len(seen) == 5
+        assert seen == sorted(seen)
+
+    def test_sparse_fieldset(self):
+        response = self.client.get(reverse('module-progress'), {"fields": "completed,module.id"})
+        assert response.status_code == status.HTTP_200_OK
+        item = response.data["data"][0]
+        assert set(item) == {"completed", "module"}
+        assert set(item["module"]) == {"id"}
+
+    def test_sparse_fieldset_on_dashboard(self):
+        response = self.client.get(reverse('dashboard'), {"fields": "id,name"})
+        assert response.status_code == status.HTTP_200_OK
+        assert all(set(module) == {"id", "name"} for module in response.data["data"]["modules"])
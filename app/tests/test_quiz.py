@@ -0,0 +1,630 @@
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from io import StringIO
+from django.core.management import call_command
+from django.core.cache import cache
+from django.db import connection, connections
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework import status
+from django.contrib.auth import get_user_model
+from app.models import (
+    ArchivedQuizAnswer, Certificate, FinalQuiz, Module, ModuleQuiz, QuestionStats, QuizSession,
+    UserModuleProgress, UserModuleQuizAnswer, UserProfile, UserQuizAnswer,
+)
+from app.quiz import (
+    get_final_quiz_answer_key, get_timed_final_quiz_state, grade_answers, issue_final_quiz, sample_final_quiz_questions,
+)
+
+User = get_user_model()
+
+
+@pytest.mark.django_db
+class TestFinalQuizGrading:
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(email="quiz@example.com", password="testpass123")
+        UserProfile.objects.create(user=self.user, first_name="Quiz", last_name="Test", is_verified=True)
+        self.client.force_authenticate(user=self.user)
+        self.questions = [
+            FinalQuiz.objects.create(question=f"Q{i}", options=["A", "B", "C"], correct_answer="A")
+            for i in range(5)
+        ]
+
+    def test_submit_by_question_id(self):
+        answers = [{"question_id": q.id, "selected_option": "A"} for q in self.questions]
+        response = self.client.post(reverse('final-quiz'), answers, format='json')
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["data"]["correct_answers"] == 5
+        assert response.data["data"]["passed"] is True
+        assert UserQuizAnswer.objects.filter(session__user=self.user, is_correct=True).count() == 5
+
+    def test_submit_by_question_text_fallback(self):
+        answers = [{"question": q.question, "selected_option": "B"} for q in self.questions]
+        response = self.client.post(reverse('final-quiz'), answers, format='json')
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["data"]["correct_answers"] == 0
+        assert response.data["data"]["passed"] is False
+
+    def test_submit_without_fetching_is_graded_against_the_bank(self):
+        answers = [{"question_id": self.questions[0].id, "selected_option": "A"}]
+        response = self.client.post(reverse('final-quiz'), answers, format='json')
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["data"]["total_questions"] == 5
+        assert response.data["data"]["score"] == "20.0%"
+        assert response.data["data"]["passed"] is False
+        assert not Certificate.objects.filter(user=self.user).exists()
+
+    def test_answer_key_is_invalidated_on_save(self):
+        question = self.questions[0]
+        assert get_final_quiz_answer_key()["answers"][question.id] == "A"
+        question.correct_answer = "B"
+        question.save()
+        assert get_final_quiz_answer_key()["answers"][question.id] == "B"
+        question.delete()
+        assert question.question not in get_final_quiz_answer_key()["ids_by_text"]
+
+    def test_grade_ignores_unknown_questions(self):
+        answer_key = {"answers": {1: "A"}, "ids_by_text": {"Q1": 1}}
+        correct_count, graded = grade_answers(answer_key, [
+            {"question_id": "1", "selected_option": "A"},
+            {"question_id": 2, "selected_option": "A"},
+            {"question": "missing", "selected_option": "A"},
+        ])
+        assert correct_count == 1
+        assert graded == [(1, "A", True)]
+
+
+@pytest.mark.django_db
+class TestFinalQuizSampling:
+    @pytest.fixture(autouse=True)
+    def setup(self, settings):
+        cache.clear()
+        settings.FINAL_QUIZ_QUESTIONS_PER_GROUP = 2
+        self.client = APIClient()
+        self.user = User.objects.create_user(email="sampling@example.com", password="testpass123")
+        UserProfile.objects.create(user=self.user, first_name="Sample", last_name="Test", is_verified=True)
+        self.client.force_authenticate(user=self.user)
+        for category in ("phishing", "passwords"):
+            for difficulty in ("easy", "hard"):
+                for i in range(4):
+                    FinalQuiz.objects.create(
+                        question=f"{category} {difficulty} {i}",
+                        options=["A", "B", "C", "D"],
+                        correct_answer="A",
+                        category=category,
+                        difficulty=difficulty
+                    )
+
+    def test_sample_per_group(self):
+        question_ids = sample_final_quiz_questions()
+        assert len(question_ids) == 8
+        groups = FinalQuiz.objects.filter(id__in=question_ids).values_list('category', 'difficulty')
+        assert sorted(set(groups)) == sorted({(c, d) for c in ("phishing", "passwords") for d in ("easy", "hard")})
+
+    def test_whole_bank_when_sampling_disabled(self, settings):
+        settings.FINAL_QUIZ_QUESTIONS_PER_GROUP = 0
+        assert sample_final_quiz_questions() == sorted(FinalQuiz.objects.values_list('id', flat=True))
+
+    def test_get_issues_questions_and_post_grades_only_issued(self):
+        response = self.client.get(reverse('final-quiz'))
+        assert response.status_code == status.HTTP_200_OK
+        exam_data = response.data["data"]["exam_data"]
+        assert len(exam_data) == 8
+        assert all(sorted(item["options"]) == ["A", "B", "C", "D"] for item in exam_data)
+        session = QuizSession.objects.get(user=self.user)
+        assert session.issued_questions == [item["id"] for item in exam_data]
+
+        issued = set(session.issued_questions)
+        not_issued = FinalQuiz.objects.exclude(id__in=issued).first()
+        answers = [{"question_id": item["id"], "selected_option": "A"} for item in exam_data[:4]]
+        answers.append({"question_id": not_issued.id, "selected_option": "A"})
+        response = self.client.post(reverse('final-quiz'), answers, format='json')
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["data"]["correct_answers"] == 4
+        assert response.data["data"]["total_questions"] == 8
+        assert response.data["data"]["attempt_number"] == 1
+
+    def test_get_keeps_the_unfinished_issued_set(self, django_assert_num_queries):
+        first = self.client.get(reverse('final-quiz')).data["data"]["exam_data"]
+        session = QuizSession.objects.get(user=self.user)
+        # No lock or write, just the session and its questions
+        with django_assert_num_queries(2):
+            again = issue_final_quiz(self.user)
+        assert [question.id for question in again[1]] == session.issued_questions
+        second = self.client.get(reverse('final-quiz')).data["data"]["exam_data"]
+        assert sorted(item["id"] for item in second) == sorted(item["id"] for item in first)
+        assert QuizSession.objects.get(user=self.user).started_at == session.started_at
+
+        answers = [{"question_id": item["id"], "selected_option": "A"} for item in first]
+        assert self.client.post(reverse('final-quiz'), answers, format='json').status_code == status.HTTP_200_OK
+        # Only a submitted attempt makes room for a new sample
+        self.client.get(reverse('final-quiz'))
+        reissued = QuizSession.objects.get(user=self.user)
+        assert reissued.completed_at is None
+        assert reissued.started_at > session.started_at
+
+
+@pytest.mark.django_db
+class TestFinalQuizAttempts:
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(email="attempts@example.com", password="testpass123")
+        UserProfile.objects.create(user=self.user, first_name="Attempt", last_name="Test", is_verified=True)
+        self.client.force_authenticate(user=self.user)
+        self.question = FinalQuiz.objects.create(question="Q1", options=["A", "B"], correct_answer="A")
+
+    def submit(self, option):
+        return self.client.post(
+            reverse('final-quiz'),
+            [{"question_id": self.question.id, "selected_option": option}],
+            format='json'
+        )
+
+    def test_attempt_cap_is_enforced_on_submit(self, settings):
+        settings.FINAL_QUIZ_MAX_ATTEMPTS = 2
+        assert self.submit("B").data["data"]["attempt_number"] == 1
+        assert self.submit("B").data["data"]["attempt_number"] == 2
+        response = self.submit("A")
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert "maximum number of attempts" in response.data["message"]
+        session = QuizSession.objects.get(user=self.user)
+        assert session.attempt_number == 2
+        assert session.answers.count() == 2
+
+    def test_certificate_is_issued_once(self):
+        first = self.submit("A")
+        assert "certificate" in first.data["data"]
+        second = self.submit("A")
+        assert second.status_code == status.HTTP_200_OK
+        assert "certificate" not in second.data["data"]
+        assert Certificate.objects.filter(user=self.user).count() == 1
+        assert QuizSession.objects.get(user=self.user).completed_at is not None
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.skipif(connection.vendor != "postgresql", reason="row locks need a server database")
+class TestFinalQuizConcurrency:
+    def test_parallel_submissions_respect_attempt_cap(self, settings):
+        user = User.objects.create_user(email="parallel@example.com", password="testpass123")
+        UserProfile.objects.create(user=user, first_name="Parallel", last_name="Test", is_verified=True)
+        question = FinalQuiz.objects.create(question="Q1", options=["A", "B"], correct_answer="A")
+
+        def submit(_):
+            client = APIClient()
+            client.force_authenticate(user=user)
+            try:
+                return client.post(
+                    reverse('final-quiz'),
+                    [{"question_id": question.id, "selected_option": "A"}],
+                    format='json'
+                ).status_code
+            finally:
+                connections.close_all()
+
+        with ThreadPoolExecutor(max_workers=12) as executor:
+            status_codes = list(executor.map(submit, range(12)))
+
+        assert status_codes.count(status.HTTP_200_OK) == settings.FINAL_QUIZ_MAX_ATTEMPTS
+        session = QuizSession.objects.get(user=user)
+        assert session.attempt_number == settings.FINAL_QUIZ_MAX_ATTEMPTS
+        assert session.answers.count() == settings.FINAL_QUIZ_MAX_ATTEMPTS
+        assert Certificate.objects.filter(user=user).count() == 1
+
+
+@pytest.mark.django_db
+class TestTimedFinalQuiz:
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(email="timed@example.com", password="testpass123")
+        UserProfile.objects.create(user=self.user, first_name="Timed", last_name="Test", is_verified=True)
+        self.client.force_authenticate(user=self.user)
+        self.questions = [
+            FinalQuiz.objects.create(question=f"Q{i}", options=["A", "B"], correct_answer="A")
+            for i in range(5)
+        ]
+
+    def test_autosave_stays_in_cache_until_submit(self):
+        response = self.client.post(reverse('final-quiz-start'))
+        assert response.status_code == status.HTTP_201_CREATED
+        exam_data = response.data["data"]["exam_data"]
+        answers = [{"question_id": item["id"], "selected_option": "A"} for item in exam_data[:3]]
+        response = self.client.put(reverse('final-quiz-answers'), answers, format='json')
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["data"]["saved_answers"] == 3
+        assert not UserQuizAnswer.objects.exists()
+
+        final = [{"question_id": exam_data[3]["id"], "selected_option": "A"}]
+        response = self.client.post(reverse('final-quiz-submit'), final, format='json')
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["data"]["correct_answers"] == 4
+        assert response.data["data"]["expired"] is False
+        assert UserQuizAnswer.objects.count() == 4
+        assert QuizSession.objects.get(user=self.user).completed_at is not None
+
+        response = self.client.post(reverse('final-quiz-submit'), [], format='json')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_expired_session_is_graded_from_autosave(self):
+        exam_data = self.client.post(reverse('final-quiz-start')).data["data"]["exam_data"]
+        answers = [{"question_id": item["id"], "selected_option": "A"} for item in exam_data[:2]]
+        self.client.put(reverse('final-quiz-answers'), answers, format='json')
+        QuizSession.objects.filter(user=self.user).update(expires_at=timezone.now() - timedelta(minutes=5))
+
+        call_command('expire_quiz_sessions', stdout=StringIO())
+
+        session = QuizSession.objects.get(user=self.user)
+        assert session.completed_at is not None
+        assert session.attempt_number == 1
+        assert session.score == 40
+        assert get_timed_final_quiz_state(self.user.pk) is None
+
+    def test_autosave_without_active_session(self):
+        response = self.client.put(reverse('final-quiz-answers'), [], format='json')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_start_returns_the_active_attempt(self):
+        started = self.client.post(reverse('final-quiz-start')).data["data"]
+        answers = [{"question_id": item["id"], "selected_option": "A"} for item in started["exam_data"][:2]]
+        self.client.put(reverse('final-quiz-answers'), answers, format='json')
+
+        restarted = self.client.post(reverse('final-quiz-start')).data["data"]
+        assert restarted["expires_at"] == started["expires_at"]
+        assert [item["id"] for item in restarted["exam_data"]] == [item["id"] for item in started["exam_data"]]
+        assert len(get_timed_final_quiz_state(self.user.pk)["answers"]) == 2
+        assert QuizSession.objects.get(user=self.user).attempt_number == 0
+
+    def test_start_after_the_deadline_counts_the_expired_attempt(self):
+        exam_data = self.client.post(reverse('final-quiz-start')).data["data"]["exam_data"]
+        answers = [{"question_id": item["id"], "selected_option": "A"} for item in exam_data[:2]]
+        self.client.put(reverse('final-quiz-answers'), answers, format='json')
+        QuizSession.objects.filter(user=self.user).update(expires_at=timezone.now() - timedelta(minutes=5))
+
+        response = self.client.post(reverse('final-quiz-start'))
+        assert response.status_code == status.HTTP_201_CREATED
+        session = QuizSession.objects.get(user=self.user)
+        assert session.attempt_number == 1
+        assert session.score == 40
+        assert session.completed_at is None
+        assert session.expires_at > timezone.now()
+        assert get_timed_final_quiz_state(self.user.pk)["answers"] == {}
+
+    def test_get_during_a_timed_attempt_keeps_it(self):
+        started = self.client.post(reverse('final-quiz-start')).data["data"]
+        response = self.client.get(reverse('final-quiz'))
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["data"]["expires_at"] == started["expires_at"]
+        assert [item["id"] for item in response.data["data"]["exam_data"]] == [item["id"] for item in started["exam_data"]]
+
+        answers = [{"question_id": item["id"], "selected_option": "A"} for item in started["exam_data"]]
+        response = self.client.post(reverse('final-quiz'), answers, format='json')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        response = self.client.post(reverse('final-quiz-submit'), answers, format='json')
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["data"]["correct_answers"] == 5
+
+    def test_start_puts_a_deadline_on_fetched_questions(self):
+        fetched = self.client.get(reverse('final-quiz')).data["data"]
+        assert fetched["expires_at"] is None
+        started = self.client.post(reverse('final-quiz-start')).data["data"]
+        assert started["expires_at"] is not None
+        assert sorted(item["id"] for item in started["exam_data"]) == sorted(item["id"] for item in fetched["exam_data"])
+
+    def test_malformed_answers_are_rejected_before_the_attempt_is_claimed(self):
+        self.client.post(reverse('final-quiz-start'))
+        for body in (["x"], [{"question_id": self.questions[0].id, "selected_option": ["A"]}], {"answers": []}):
+            assert self.client.put(reverse('final-quiz-answers'), body, format='json').status_code == status.HTTP_400_BAD_REQUEST
+            response = self.client.post(reverse('final-quiz-submit'), body, format='json')
+            assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.data["errors"] == {"general": "Expected a list of items but got type \"dict\"."}
+        session = QuizSession.objects.get(user=self.user)
+        assert session.completed_at is None
+        assert session.attempt_number == 0
+        assert self.client.post(reverse('final-quiz-submit')).status_code == status.HTTP_200_OK
+
+
+@pytest.mark.django_db
+class TestQuestionStats:
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        cache.clear()
+        self.questions = [
+            FinalQuiz.objects.create(question=f"Q{i}", options=["A", "B", "C"], correct_answer="A")
+            for i in range(2)
+        ]
+        self.users = []
+        for i in range(3):
+            user = User.objects.create_user(email=f"stats{i}@example.com", password="testpass123")
+            UserProfile.objects.create(user=user, first_name="Stats", last_name=str(i), is_verified=True)
+            self.users.append(user)
+
+    def submit(self, user, options):
+        client = APIClient()
+        client.force_authenticate(user=user)
+        answers = [
+            {"question_id": question.id, "selected_option": option}
+            for question, option in zip(self.questions, options)
+        ]
+        return client.post(reverse('final-quiz'), answers, format='json')
+
+    def test_stats_are_updated_on_submit_and_match_rebuild(self):
+        self.submit(self.users[0], ["A", "B"])
+        self.submit(self.users[1], ["A", "C"])
+        self.submit(self.users[2], ["B", "A"])
+
+        stats = QuestionStats.objects.get(question=self.questions[0])
+        assert stats.attempts == 3
+        assert stats.correct == 2
+        assert stats.option_counts == {"A": 2, "B": 1}
+        assert round(stats.correct_rate) == 67
+
+        incremental = {
+            s.question_id: (s.attempts, s.correct, s.option_counts)
+            for s in QuestionStats.objects.all()
+        }
+        call_command('rebuild_question_stats', stdout=StringIO())
+        rebuilt = {
+            s.question_id: (s.attempts, s.correct, s.option_counts)
+            for s in QuestionStats.objects.all()
+        }
+        assert rebuilt == incremental
+
+
+@pytest.mark.django_db
+class TestQuizAnswerArchival:
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        self.question = FinalQuiz.objects.create(question="Q1", options=["A", "B"], correct_answer="A")
+        self.old_session = self.create_session("old@example.com", completed=True)
+        self.open_session = self.create_session("open@example.com", completed=False)
+        old = timezone.now() - timedelta(days=400)
+        for session in (self.old_session, self.open_session):
+            for option in ("A", "B", "A"):
+                UserQuizAnswer.objects.create(
+                    session=session,
+                    question=self.question,
+                    selected_option=option,
+                    is_correct=option == "A",
+                    attempt_number=1,
+                    created_at=old
+                )
+        UserQuizAnswer.objects.create(session=self.old_session, question=self.question, selected_option="A", is_correct=True)
+
+    def create_session(self, email, completed):
+        user = User.objects.create_user(email=email, password="testpass123")
+        return QuizSession.objects.create(
+            user=user,
+            attempt_number=1,
+            issued_questions=[self.question.id],
+            completed_at=timezone.now() if completed else None
+        )
+
+    def test_archives_only_old_answers_of_finished_attempts(self):
+        call_command('archive_quiz_answers', '--older-than-days', '180', '--batch-size', '2', stdout=StringIO())
+        assert ArchivedQuizAnswer.objects.filter(session_id=self.old_session.id).count() == 3
+        assert UserQuizAnswer.objects.filter(session=self.old_session).count() == 1
+        assert UserQuizAnswer.objects.filter(session=self.open_session).count() == 3
+
+    def test_open_attempt_does_not_hold_back_earlier_attempts(self):
+        QuizSession.objects.filter(pk=self.open_session.pk).update(attempt_number=2)
+        call_command('archive_quiz_answers', stdout=StringIO())
+        assert not UserQuizAnswer.objects.filter(session=self.open_session).exists()
+        assert ArchivedQuizAnswer.objects.filter(session_id=self.open_session.id).count() == 3
+
+    def test_archives_legacy_sessions(self):
+        legacy_session = QuizSession.objects.create(
+            user=User.objects.create_user(email="legacy@example.com", password="testpass123"),
+            attempt_number=1
+        )
+        UserQuizAnswer.objects.create(
+            session=legacy_session,
+            question=self.question,
+            selected_option="A",
+            is_correct=True,
+            created_at=timezone.now() - timedelta(days=400)
+        )
+        out = StringIO()
+        call_command('archive_quiz_answers', '--dry-run', stdout=out)
+        assert "4 answer(s)" in out.getvalue()
+        call_command('archive_quiz_answers', stdout=StringIO())
+        assert ArchivedQuizAnswer.objects.filter(session_id=legacy_session.id).count() == 1
+
+    def test_dry_run_moves_nothing(self):
+        out = StringIO()
+        call_command('archive_quiz_answers', '--dry-run', stdout=out)
+        assert "3 answer(s)" in out.getvalue()
+        assert not ArchivedQuizAnswer.objects.exists()
+
+    def test_rebuild_stats_includes_archive(self):
+        call_command('archive_quiz_answers', stdout=StringIO())
+        call_command('rebuild_question_stats', stdout=StringIO())
+        stats = QuestionStats.objects.get(question=self.question)
+        assert stats.attempts == 7
+        assert stats.option_counts == {"A": 5, "B": 2}
+
+
+@pytest.mark.django_db
+class TestFinalQuizRegrade:
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        cache.clear()
+        self.questions = [
+            FinalQuiz.objects.create(question=f"Q{i}", options=["A", "B"], correct_answer="A")
+            for i in range(2)
+        ]
+        self.users = {}
+        for name in ("alice", "bob", "carol"):
+            user = User.objects.create_user(email=f"{name}@example.com", password="testpass123")
+            UserProfile.objects.create(user=user, first_name=name, last_name="Regrade", is_verified=True)
+            self.users[name] = user
+
+    def submit(self, user, options):
+        client = APIClient()
+        client.force_authenticate(user=user)
+        answers = [
+            {"question_id": question.id, "selected_option": option}
+            for question, option in zip(self.questions, options)
+        ]
+        return client.post(reverse('final-quiz'), answers, format='json')
+
+    def test_regrade_after_answer_key_change(self):
+        self.submit(self.users["alice"], ["A", "A"])
+        self.submit(self.users["bob"], ["B", "A"])
+        self.submit(self.users["carol"], ["B", "B"])
+        self.submit(self.users["carol"], ["B", "A"])
+        assert Certificate.objects.filter(user=self.users["alice"], is_valid=True).exists()
+
+        FinalQuiz.objects.filter(pk=self.questions[0].pk).update(correct_answer="B")
+        out = StringIO()
+        call_command('regrade_final_quiz', '--question', str(self.questions[0].pk), '--chunk-size', '2', stdout=out)
+
+        assert not UserQuizAnswer.objects.filter(question=self.questions[0], selected_option="A", is_correct=True).exists()
+        assert UserQuizAnswer.objects.filter(question=self.questions[0], selected_option="B", is_correct=False).count() == 0
+        scores = {
+            session.user.email: (session.score, session.passed)
+            for session in QuizSession.objects.select_related('user')
+        }
+        assert scores["alice@example.com"] == (50, False)
+        assert scores["bob@example.com"] == (100, True)
+        # Only carol's latest attempt counts towards her score
+        assert scores["carol@example.com"] == (100, True)
+        assert "4 answer(s) changed" in out.getvalue()
+        assert QuestionStats.objects.get(question=self.questions[0]).correct == 3
+
+    def test_regrade_reports_certificate_changes(self):
+        from app.quiz import regrade_final_quiz
+        self.submit(self.users["alice"], ["A", "A"])
+        self.submit(self.users["bob"], ["B", "A"])
+        FinalQuiz.objects.filter(pk=self.questions[0].pk).update(correct_answer="B")
+        report = regrade_final_quiz()
+        assert report["certificates_to_issue"] == [self.users["bob"].id]
+        assert report["certificates_to_revoke"] == [self.users["alice"].id]
+
+    def test_revocation_follows_the_attempt_that_earned_the_certificate(self):
+        from app.quiz import archive_quiz_answers, regrade_final_quiz
+        carol = self.users["carol"]
+        self.submit(carol, ["A", "A"])
+        self.submit(carol, ["B", "B"])
+        certificate = Certificate.objects.get(user=carol)
+        assert (certificate.attempt_number, certificate.total_questions) == (1, 2)
+        # The failed retake does not undo the certificate earned by the first attempt
+        assert regrade_final_quiz()["certificates_to_revoke"] == []
+
+        list(archive_quiz_answers(timezone.now() + timedelta(days=1)))
+        FinalQuiz.objects.filter(pk=self.questions[0].pk).update(correct_answer="B")
+        assert regrade_final_quiz()["certificates_to_revoke"] == [carol.id]
+
+    def test_regrade_rescores_sessions_from_before_completed_at(self):
+        from importlib import import_module
+        from django.apps import apps
+        from app.quiz import regrade_final_quiz
+        migration = import_module('app.migrations.0023_backfill_quiz_session_completed_at')
+        alice = self.users["alice"]
+        # A session graded by the old submit: attempted, passed, but never given completed_at
+        session = QuizSession.objects.create(user=alice, attempt_number=1, score=100, passed=True)
+        answered_at = timezone.now() - timedelta(days=30)
+        for question in self.questions:
+            UserQuizAnswer.objects.create(
+                session=session,
+                question=question,
+                selected_option="A",
+                is_correct=True,
+                attempt_number=1,
+                created_at=answered_at
+            )
+        migration.backfill_completed_at(apps, None)
+        session.refresh_from_db()
+        assert session.completed_at == answered_at
+
+        FinalQuiz.objects.filter(pk=self.questions[0].pk).update(correct_answer="B")
+        report = regrade_final_quiz()
+        session.refresh_from_db()
+        assert report["sessions_rescored"] == 1
+        assert (session.score, session.passed) == (50, False)
+        assert report["certificates_to_issue"] == []
+
+    def test_save_with_grade_skips_answer_key_lookup(self, django_assert_num_queries):
+        session = QuizSession.objects.create(user=self.users["alice"], attempt_number=1)
+        with django_assert_num_queries(1):
+            UserQuizAnswer.objects.create(session=session, question_id=self.questions[0].pk, selected_option="B", is_correct=False)
+
+
+@pytest.mark.django_db
+class TestModuleQuiz:
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(email="modulequiz@example.com", password="testpass123")
+        UserProfile.objects.create(user=self.user, first_name="Module", last_name="Quiz", is_verified=True)
+        self.client.force_authenticate(user=self.user)
+        self.module = Module.objects.create(name="Phishing", description="desc", module_type="text")
+        self.questions = [
+            ModuleQuiz.objects.create(module=self.module, question=f"Q{i}", options=["A", "B"], correct_answer="A")
+            for i in range(5)
+        ]
+        self.url = reverse('get-module-quiz', kwargs={"module_id": self.module.id})
+
+    def submit(self, options):
+        answers = [
+            {"question_id": question.id, "selected_option": option}
+            for question, option in zip(self.questions, options)
+        ]
+        return self.client.post(self.url, answers, format='json')
+
+    def test_get_hides_answers_and_is_cached(self, django_assert_num_queries):
+        self.client.get(self.url)
+        with django_assert_num_queries(0):
+            response = self.client.get(self.url)
+        assert response.status_code == status.HTTP_200_OK
+        assert len(response.data["data"]) == 5
+        assert all("correct_answer" not in item for item in response.data["data"])
+
+    def test_passing_submission_completes_module(self):
+        response = self.submit(["A", "A", "A", "A", "B"])
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["data"]["score"] == "80.0%"
+        assert response.data["data"]["passed"] is True
+        assert UserModuleQuizAnswer.objects.filter(user=self.user).count() == 5
+        assert UserModuleProgress.objects.get(user=self.user, module=self.module).completed is True
+
+    def test_failing_submission_does_not_complete_module(self):
+        response = self.submit(["A", "B", "B", "B", "B"])
+        assert response.data["data"]["passed"] is False
+        assert UserModuleQuizAnswer.objects.filter(user=self.user, is_correct=True).count() == 1
+        assert not UserModuleProgress.objects.filter(user=self.user, module=self.module).exists()
+
+    def test_answer_key_change_invalidates_cache(self):
+        self.client.get(self.url)
+        for question in self.questions:
+            question.correct_answer = "B"
+            question.save()
+        response = self.submit(["B"] * 5)
+        assert response.data["data"]["correct_answers"] == 5
+
+    def test_unknown_module_and_empty_quiz(self):
+        missing = self.client.post(reverse('get-module-quiz', kwargs={"module_id": 999999}), [], format='json')
+        assert missing.status_code == status.HTTP_404_NOT_FOUND
+        empty = Module.objects.create(name="Empty", description="desc", module_type="text")
+        response = self.client.post(
+            reverse('get-module-quiz', kwargs={"module_id": empty.id}),
+            [{"question_id": 1, "selected_option": "A"}],
+            format='json'
+        )
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_malformed_answers_are_rejected(self):
+        question_id = self.questions[0].id
+        for body in ([], ["x"], [{"question_id": question_id}], [{"question_id": question_id, "selected_option": ["A"]}]):
+            response = self.client.post(self.url, body, format='json')
+            assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.data["errors"] == {"0": {"selected_option": "Not a valid string."}}
+        assert not UserModuleQuizAnswer.objects.exists()
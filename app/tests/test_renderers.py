@@ -0,0 +1,102 @@
+import io
+import json
+import uuid
+import pytest
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from django.urls import reverse
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from app.models import Module, UserModuleProgress, UserProfile
+from utils import renderers
+from utils.renderers import ORJSONParser, ORJSONRenderer
+
+PAYLOAD = {
+    "status": "success",
+    "message": gettext_lazy("Certificate retrieved successfully."),
+    "data": {
+        "score": Decimal("85.50"),
+        "issued_at": datetime(2025, 7, 1, 12, 30, 15, 123456, tzinfo=dt_timezone.utc),
+        "local_time": datetime(2025, 7, 1, 12, 30, tzinfo=dt_timezone(timedelta(hours=2))),
+        "issued_date": date(2025, 7, 1),
+        "duration": timedelta(minutes=90),
+        "certificate_id": uuid.UUID("12345678-1234-5678-1234-567812345678"),
+        "option_counts": {1: 4, 2: 0},
+        "name": "Zoë",
+        "modules": [{"id": 1, "completed": True, "watch_position": None}],
+    },
+}
+
+
+class TestORJSONRenderer:
+    def test_matches_drf_json_renderer(self):
+        expected = JSONRenderer().render(PAYLOAD)
+        rendered = ORJSONRenderer().render(PAYLOAD)
+        assert isinstance(rendered, bytes)
+        assert json.loads(rendered) == json.loads(expected)
+        assert b'"2025-07-01T12:30:15.123456Z"' in rendered
+        assert b'"score":85.5' in rendered
+
+    def test_none_renders_empty_body(self):
+        assert ORJSONRenderer().render(None) == b''
+
+    def test_indent_falls_back_to_stdlib(self):
+        rendered = ORJSONRenderer().render({"a": 1}, "application/json; indent=4")
+        assert rendered == b'{\n    "a": 1\n}'
+
+    def test_integers_wider_than_64_bits_fall_back_to_stdlib(self):
+        data = {"id": 2 ** 64, "negative": -(2 ** 70)}
+        assert ORJSONRenderer().render(data) == JSONRenderer().render(data)
+
+    def test_falls_back_without_orjson(self, monkeypatch):
+        monkeypatch.setattr(renderers, "orjson", None)
+        assert ORJSONRenderer().render(PAYLOAD) == JSONRenderer().render(PAYLOAD)
+
+
+class TestORJSONParser:
+    def test_parses_utf8_body(self):
+        body = json.dumps({"answers": [{"question_id": 1, "selected_option": "Zoë"}]}).encode()
+        assert ORJSONParser().parse(io.BytesIO(body)) == {"answers": [{"question_id": 1, "selected_option": "Zoë"}]}
+
+    def test_invalid_json_raises_parse_error(self):
+        with pytest.raises(ParseError):
+            ORJSONParser().parse(io.BytesIO(b'{"answers": '))
+
+    def test_rejects_nan(self):
+        with pytest.raises(ParseError):
+            ORJSONParser().parse(io.BytesIO(b'{"score": NaN}'))
+
+    def test_other_encodings_fall_back_to_stdlib(self):
+        body = json.dumps({"name": "Zoë"}, ensure_ascii=False).encode("latin-1")
+        assert ORJSONParser().parse(io.BytesIO(body), parser_context={"encoding": "latin-1"}) == {"name": "Zoë"}
+
+
+@pytest.mark.django_db
+class TestJSONResponses:
+    @pytest.fixture(autouse=True)
+    def setup(self, django_user_model):
+        self.user = django_user_model.objects.create_user(email="renderer@example.com", password="testpass123")
+        UserProfile.objects.create(user=self.user, first_name="Render", last_name="Test", is_verified=True)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def test_module_progress_is_rendered_with_orjson(self):
+        module = Module.objects.create(name="Intro", description="desc", module_type="video", google_drive_file_id="1234567890")
+        UserModuleProgress.objects.create(user=self.user, module=module, completed=True)
+        response = self.client.get(reverse("module-progress"))
+        assert response.status_code == 200
+        assert response["Content-Type"] == "application/json"
+        assert response.content == ORJSONRenderer().render(response.data)
+        assert json.loads(response.content) == json.loads(JSONRenderer().render(response.data))
+
+    def test_json_request_bodies_are_parsed(self):
+        module = Module.objects.create(name="Intro", description="desc", module_type="video", google_drive_file_id="1234567890")
+        response = self.client.post(
+            reverse("module-progress-batch"),
+            data=json.dumps({"events": [{"module_id": module.id, "completed": True}]}),
+            content_type="application/json",
+        )
+        assert response.status_code == 200
+        assert UserModuleProgress.objects.filter(user=self.user, module=module, completed=True).exists()
@@ -0,0 +1,23 @@
+import subprocess
+import sys
+from django.conf import settings
+
+# Heavy dependencies that are only imported when first used
+LAZY_MODULES = ("reportlab", "sendgrid", "mux_python")
+
+
+def test_startup_does_not_import_heavy_dependencies():
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import django; django.setup(); import core.urls"],
+        cwd=settings.BASE_DIR,
+        capture_output=True,
+        text=True,
+    )
+    assert result.returncode == 0, result.stderr
+    imported = {
+        line.split("|")[-1].strip()
+        for line in result.stderr.splitlines()
+        if line.startswith("import time:")
+    }
+    assert "core.urls" in imported
+    assert sorted(module for module in imported if module.split(".")[0] in LAZY_MODULES) == []
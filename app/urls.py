@@ -14,10 +14,15 @@ urlpatterns = [
     path('change-password', ChangePasswordView.as_view(), name='change-password'),
     path('dashboard', DashboardView.as_view(), name='dashboard'),
     path('module-progress', UserModuleProgressView.as_view(), name='module-progress'),
+    path('module-progress/batch', ModuleProgressBatchView.as_view(), name='module-progress-batch'),
     path('module/<int:module_id>', GetModuleView.as_view(), name='get-module'),
     path('module/<int:module_id>/complete', MarkModuleAsCompletedView.as_view(), name='mark-module-as-completed'),
-    path('module/<int:module_id>/quiz', GetModuleQuizView.as_view(), name='get-module-quiz'),
+    path('module/<int:module_id>/heartbeat', WatchHeartbeatView.as_view(), name='module-heartbeat'),
+    path('module/<int:module_id>/quiz', ModuleQuizView.as_view(), name='get-module-quiz'),
     path('quiz', FinalQuizView.as_view(), name='final-quiz'),
+    path('quiz/start', FinalQuizStartView.as_view(), name='final-quiz-start'),
+    path('quiz/answers', FinalQuizAnswersView.as_view(), name='final-quiz-answers'),
+    path('quiz/submit', FinalQuizSubmitView.as_view(), name='final-quiz-submit'),
     path('certificate', CertificateView.as_view(), name='certificate'),
     path('certificate/<str:certificate_id>/download', CertificateDownloadView.as_view(), name='certificate-download'),
     path('session', CheckUserSessionView.as_view(), name='check-user-session'),
@@ -6,15 +6,36 @@ from drf_spectacular.utils import extend_schema, extend_schema_view, OpenApiPara
 from .models import *
 from .serializers import *
 from utils.response import ResponseMixin
+from utils.db_routing import ReplicaReadMixin
+from utils.instrumentation import timed
+from utils.metrics import metrics_access_allowed, render_metrics
+from utils.pagination import IdCursorPagination
 from django.contrib.auth import get_user_model
 from utils.email import send_otp, send_reset_password_otp, validate_otp
+from .mux import record_mux_webhook_event, verify_mux_webhook_signature
+from .progress import apply_module_progress_events, get_module_progress_summary, watch_progress_buffer
+from .quiz import (
+    get_module_quiz,
+    issue_final_quiz,
+    save_timed_final_quiz_answers,
+    start_timed_final_quiz,
+    submit_final_quiz,
+    submit_module_quiz,
+    submit_timed_final_quiz,
+)
+from .services import get_module_catalog
 from rest_framework.views import APIView
 from django.http import Http404, HttpResponse, JsonResponse
-from utils.certificate_generator import CertificateGenerator
 from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET, require_POST
+from django.utils import timezone
+from django.conf import settings
 import json
+import logging
+import random
 
 User = get_user_model()
+logger = logging.getLogger(__name__)
 
 @extend_schema_view(
     post=extend_schema(
@@ -444,7 +465,7 @@ class ChangePasswordView(APIView, ResponseMixin):
         tags = ['Dashboard']
     )
 )
-class DashboardView(APIView, ResponseMixin):
+class DashboardView(ReplicaReadMixin, APIView, ResponseMixin):
     """
     Dashboard View
     """
@@ -459,17 +480,17 @@ class DashboardView(APIView, ResponseMixin):
             Response: The response object
         """
         user = request.user
-        modules = Module.objects.all().order_by('id')
+        modules = ModuleValuesSerializer(context={'request': request}).serialize(Module.objects.order_by('id'))
         try:
             user_progress = UserModuleProgress.objects.filter(user=user).select_related('module')
             completed_modules = user_progress.filter(completed=True).count()
         except UserModuleProgress.DoesNotExist:
             completed_modules = 0
-        total_modules = modules.count()
+        total_modules = len(modules)
         percentage_completed = (completed_modules / total_modules) * 100 if total_modules > 0 else 0
         return self.success_response(
             {
-                "modules": ModuleSerializer(modules, many=True).data,
+                "modules": modules,
                 "completed_modules": completed_modules,
                 "total_modules": total_modules,
                 "percentage_completed": percentage_completed
@@ -487,7 +508,7 @@ class DashboardView(APIView, ResponseMixin):
         tags = ['Module']
     )
 )
-class GetModuleView(APIView, ResponseMixin):
+class GetModuleView(ReplicaReadMixin, APIView, ResponseMixin):
     """
     Get Module View
     """
@@ -511,7 +532,7 @@ class GetModuleView(APIView, ResponseMixin):
                 status_code=status.HTTP_404_NOT_FOUND
             )
         return self.success_response(
-            {"module": ModuleSerializer(module).data},
+            {"module": ModuleSerializer(module, context={'request': request}).data},
             message="Module fetched successfully.",
             status_code=status.HTTP_200_OK
         )
@@ -551,6 +572,7 @@ class MarkModuleAsCompletedView(APIView, ResponseMixin):
         user = request.user
         user_progress, created = UserModuleProgress.objects.get_or_create(user=user, module=module)
         user_progress.completed = True
+        user_progress.updated_at = timezone.now()
         user_progress.save()
         return self.success_response(
             {"module": ModuleSerializer(module).data, "completed": True},
@@ -561,16 +583,22 @@ class MarkModuleAsCompletedView(APIView, ResponseMixin):
 @extend_schema_view(
     get=extend_schema(
         summary="User Module Progress",
-        description="Get user module progress",
+        description="Get user module progress. Pass `page_size` or `cursor` for cursor pagination and `fields` (e.g. `completed,module.id`) for a sparse fieldset",
+        parameters=[
+            OpenApiParameter('cursor', OpenApiTypes.STR, description="Pagination cursor from a previous page"),
+            OpenApiParameter('page_size', OpenApiTypes.INT, description="Number of results per page"),
+            OpenApiParameter('fields', OpenApiTypes.STR, description="Comma separated fields to include"),
+        ],
         responses={200: UserModuleProgressSerializer},
         tags = ['Module']
     )
 )
-class UserModuleProgressView(APIView, ResponseMixin):
+class UserModuleProgressView(ReplicaReadMixin, APIView, ResponseMixin):
     """
     User Module Progress View
     """
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = IdCursorPagination
     
     def get(self, request, *args, **kwargs):
         """
@@ -581,33 +609,136 @@ class UserModuleProgressView(APIView, ResponseMixin):
             Response: The response object
         """
         user = request.user
-        try:
-            user_progress = UserModuleProgress.objects.filter(user=user).select_related('module')
-            serializer = UserModuleProgressSerializer(user_progress, many=True)
-        except UserModuleProgress.DoesNotExist:
-            return self.error_response(
-                None,
-                message="User module progress not found.",
-                status_code=status.HTTP_404_NOT_FOUND
+        user_progress = UserModuleProgress.objects.filter(user=user)
+        serializer = UserModuleProgressValuesSerializer(context={'request': request})
+        paginator = self.pagination_class()
+        if not paginator.is_requested(request):
+            return self.success_response(
+                serializer.serialize(user_progress),
+                message="User module progress fetched successfully.",
+                status_code=status.HTTP_200_OK
             )
+        page = paginator.paginate_queryset(serializer.values(user_progress), request, view=self)
         return self.success_response(
-            serializer.data,
+            paginator.get_paginated_data(serializer.serialize(page)),
             message="User module progress fetched successfully.",
             status_code=status.HTTP_200_OK
         )
         
         
+@extend_schema_view(
+    post=extend_schema(
+        summary="Batch Module Progress Sync",
+        description="Apply a batch of module progress events recorded offline",
+        request=ModuleProgressBatchSerializer,
+        responses={200: ModuleProgressBatchResultSerializer},
+        tags = ['Module']
+    )
+)
+class ModuleProgressBatchView(APIView, ResponseMixin):
+    """
+    Module Progress Batch View - Sync progress recorded by offline clients
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    serializer_class = ModuleProgressBatchSerializer
+    
+    def post(self, request, *args, **kwargs):
+        """
+        Apply a batch of module progress events
+        Args:
+            request: The request object with the progress events
+        Returns:
+            Response: The response object with the updated progress summary
+        """
+        serializer = self.serializer_class(data=request.data)
+        if not serializer.is_valid():
+            return self.error_response(
+                self.format_serializer_errors(serializer.errors),
+                message="Invalid data",
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
+        user = request.user
+        applied, skipped = apply_module_progress_events(user, serializer.validated_data['events'])
+        return self.success_response(
+            {
+                "applied": applied,
+                "skipped": skipped,
+                **get_module_progress_summary(user)
+            },
+            message="Module progress synced successfully.",
+            status_code=status.HTTP_200_OK
+        )
+        
+        
+@extend_schema_view(
+    post=extend_schema(
+        summary="Video Watch Heartbeat",
+        description="Record how far into a video module the user is",
+        request=WatchHeartbeatSerializer,
+        tags = ['Module']
+    )
+)
+class WatchHeartbeatView(APIView, ResponseMixin):
+    """
+    Watch Heartbeat View - Buffered video watch progress
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    serializer_class = WatchHeartbeatSerializer
+    
+    def post(self, request, *args, **kwargs):
+        """
+        Record a video watch heartbeat
+        Args:
+            request: The request object with the playback position and video duration in seconds
+        Returns:
+            Response: The response object
+        """
+        module_id = kwargs.get('module_id')
+        if get_module_catalog().get(module_id) != "video":
+            return self.error_response(
+                None,
+                message="Video module not found.",
+                status_code=status.HTTP_404_NOT_FOUND
+            )
+        serializer = self.serializer_class(data=request.data)
+        if not serializer.is_valid():
+            return self.error_response(
+                self.format_serializer_errors(serializer.errors),
+                message="Invalid data",
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
+        position = serializer.validated_data['position']
+        completed = watch_progress_buffer.record(
+            request.user.id,
+            module_id,
+            position,
+            serializer.validated_data['duration']
+        )
+        return self.success_response(
+            {"module_id": module_id, "position": int(position), "completed": completed},
+            message="Heartbeat recorded.",
+            status_code=status.HTTP_202_ACCEPTED
+        )
+
+
 @extend_schema_view(
     get=extend_schema(
         summary="Get Module Quiz",
-        description="Get a module quiz",
+        description="Get a module quiz. Correct answers are not included, submit answers to have them graded",
         responses={200: ModuleQuizSerializer},
         tags = ['Module']
+    ),
+    post=extend_schema(
+        summary="Submit Module Quiz",
+        description="Submit module quiz answers and get results. A passing score marks the module as completed",
+        request=FinalQuizSubmissionSerializer(many=True),
+        responses={200: ModuleQuizResultSerializer},
+        tags = ['Module']
     )
 )
-class GetModuleQuizView(APIView, ResponseMixin):
+class ModuleQuizView(ReplicaReadMixin, APIView, ResponseMixin):
     """
-    Get Module Quiz View
+    Module Quiz View - Get a module quiz and grade submitted answers
     """
     permission_classes = [permissions.IsAuthenticated]
     
@@ -620,27 +751,106 @@ class GetModuleQuizView(APIView, ResponseMixin):
             Response: The response object
         """
         module_id = kwargs.get('module_id')
-        try:
-            module = get_object_or_404(Module, id=module_id)
-        except Http404:
+        if module_id not in get_module_catalog():
             return self.error_response(
                 None,
                 message="Module not found.",
                 status_code=status.HTTP_404_NOT_FOUND
             )
-        module_quiz = ModuleQuiz.objects.filter(module=module).select_related('module').order_by('id')
-        serializer = ModuleQuizSerializer(module_quiz, many=True)
+        module_quiz = get_module_quiz(module_id)
+        serializer = ModuleQuizSerializer(module_quiz["questions"], many=True, context={'request': request})
         return self.success_response(
             serializer.data,
             message="Module quiz fetched successfully.",
             status_code=status.HTTP_200_OK
         )
+    
+    def post(self, request, *args, **kwargs):
+        """
+        Submit Module Quiz Answers
+        Args:
+            request: The request object with a list of answers
+        Returns:
+            Response: The response object with score and result
+        """
+        module_id = kwargs.get('module_id')
+        if module_id not in get_module_catalog():
+            return self.error_response(
+                None,
+                message="Module not found.",
+                status_code=status.HTTP_404_NOT_FOUND
+            )
+        answers_data, errors = validate_quiz_answers(request.data, allow_empty=False)
+        if errors:
+            return self.error_response(
+                errors,
+                message="Invalid answers",
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
+        result, error = submit_module_quiz(request.user, module_id, answers_data)
+        if error:
+            return self.error_response(
+                None,
+                message=error,
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
+        return self.success_response(
+            {**result, "score": f"{result['score']:.1f}%"},
+            message="Module quiz submitted successfully." + (" Module completed!" if result["passed"] else ""),
+            status_code=status.HTTP_200_OK
+        )
         
 
+def validate_quiz_answers(data, allow_empty=True):
+    """
+    Validate a list of submitted quiz answers before any quiz state is touched
+    Returns:
+        tuple: (validated answers or None, errors keyed by answer index or None)
+    """
+    serializer = FinalQuizSubmissionSerializer(data=data, many=True, allow_empty=allow_empty)
+    if serializer.is_valid():
+        return serializer.validated_data, None
+    if isinstance(serializer.errors, dict):
+        # The body is not a list
+        return None, ResponseMixin.format_serializer_errors(serializer.errors)
+    return None, {
+        str(index): ResponseMixin.format_serializer_errors(errors)
+        for index, errors in enumerate(serializer.errors) if errors
+    }
+
+
+def serialize_exam_data(questions, request):
+    """
+    Serialize issued final quiz questions, shuffling options when questions are sampled
+    """
+    exam_data = FinalQuizSerializer(questions, many=True, context={'request': request}).data
+    if settings.FINAL_QUIZ_QUESTIONS_PER_GROUP:
+        for item in exam_data:
+            if isinstance(item.get('options'), list):
+                item['options'] = random.sample(item['options'], len(item['options']))
+    return exam_data
+
+
+def final_quiz_result_data(result, certificate, request):
+    """
+    Build the response data for a graded final quiz attempt
+    """
+    response_data = {
+        "score": f"{result['score']:.1f}%",
+        "passed": result["passed"],
+        "correct_answers": result["correct_answers"],
+        "total_questions": result["total_questions"],
+        "attempt_number": result["attempt_number"]
+    }
+    if certificate:
+        response_data["certificate"] = CertificateSerializer(certificate, context={'request': request}).data
+    return response_data
+
+
 @extend_schema_view(
     get=extend_schema(
         summary="Get Final Quiz",
-        description="Get final quiz questions",
+        description="Get the questions of the current final quiz attempt. They stay the same, with the deadline of a timed attempt, until the attempt is submitted",
         responses={200: FinalQuizSerializer}
     ),
     post=extend_schema(
@@ -664,22 +874,19 @@ class FinalQuizView(APIView, ResponseMixin):
         Returns:
             Response: The response object
         """
-        try:
-            quiz_session = QuizSession.objects.get(user=request.user)
-            if quiz_session.attempt_number >= 5:
-                return self.error_response(
-                    None,
-                    message="You have reached the maximum number of attempts (5).",
-                    status_code=status.HTTP_400_BAD_REQUEST
-                )
-        except QuizSession.DoesNotExist:
-            pass
-        final_quiz = FinalQuiz.objects.all().order_by('id')
-        serializer = FinalQuizSerializer(final_quiz, many=True)
+        quiz_session, questions, error = issue_final_quiz(request.user)
+        if error:
+            return self.error_response(
+                None,
+                message=error,
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
+        exam_data = serialize_exam_data(questions, request)
         return self.success_response(
             {
-               "max_attempts": 5,
-               "exam_data": serializer.data 
+               "max_attempts": settings.FINAL_QUIZ_MAX_ATTEMPTS,
+               "expires_at": quiz_session.expires_at,
+               "exam_data": exam_data
             },
             message="Final quiz fetched successfully.",
             status_code=status.HTTP_200_OK
@@ -703,74 +910,17 @@ class FinalQuizView(APIView, ResponseMixin):
                 status_code=status.HTTP_400_BAD_REQUEST
             )
         try:
-            quiz_session, created = QuizSession.objects.get_or_create(
-                user=user,
-                defaults={'attempt_number': 1, 'passed': False}
-            )
-            if not created:
-                quiz_session.attempt_number += 1
-                quiz_session.save(update_fields=['attempt_number'])
-                
-            final_quiz_questions = {
-                quiz.question: quiz 
-                for quiz in FinalQuiz.objects.all()
-            }
-            correct_count = 0
-            user_answers_to_create = []
-            for data in answers_data:
-                question_text = data.get('question')
-                selected_option = data.get('selected_option')
-                # Use the prefetched data instead of querying individually
-                final_quiz_obj = final_quiz_questions.get(question_text)
-                if final_quiz_obj:
-                    is_correct = final_quiz_obj.correct_answer == selected_option
-                    if is_correct:
-                        correct_count += 1
-                    user_answers_to_create.append(
-                        UserQuizAnswer(
-                            session=quiz_session,
-                            question=final_quiz_obj,
-                            selected_option=selected_option,
-                            is_correct=is_correct
-                        )
-                    )
-            if user_answers_to_create:
-                UserQuizAnswer.objects.bulk_create(user_answers_to_create)
-            total_questions = len(answers_data)
-            score = (correct_count / total_questions) * 100 if total_questions > 0 else 0
-            passed = score >= 80
-            quiz_session.passed = passed
-            quiz_session.score = score
-            quiz_session.save(update_fields=['passed', 'score'])
-            # Auto-generate certificate if passed
-            certificate_data = None
-            if passed:
-                try:
-                    if not Certificate.objects.filter(user=user, is_valid=True).exists():
-                        certificate = Certificate.objects.create(
-                            user=user,
-                            quiz_session=quiz_session,
-                            score=score
-                        )
-                        certificate_data = CertificateSerializer(certificate, context={'request': request}).data
-                except Exception as e:
-                    return self.error_response(
-                        f"{e}",
-                        "Certificate Generation failed",
-                        status_code=status.HTTP_400_BAD_REQUEST
-                    )
-            response_data = {
-                "score": f"{score:.1f}%",
-                "passed": passed,
-                "correct_answers": correct_count,
-                "total_questions": total_questions,
-                "attempt_number": quiz_session.attempt_number
-            }
-            if certificate_data:
-                response_data["certificate"] = certificate_data
+            result, certificate, error = submit_final_quiz(user, answers_data)
+            if error:
+                return self.error_response(
+                    None,
+                    message=error,
+                    status_code=status.HTTP_400_BAD_REQUEST
+                )
+            response_data = final_quiz_result_data(result, certificate, request)
             return self.success_response(
                 response_data,
-                message="Final Exam submitted successfully." + (" Certificate generated!" if passed else ""),
+                message="Final Exam submitted successfully." + (" Certificate generated!" if result["passed"] else ""),
                 status_code=status.HTTP_200_OK
             )
         except Exception as e:
@@ -781,6 +931,137 @@ class FinalQuizView(APIView, ResponseMixin):
             )
 
 
+@extend_schema_view(
+    post=extend_schema(
+        summary="Start Timed Final Quiz",
+        description="Start a timed final quiz attempt and get the issued questions. While an attempt is active the same attempt is returned",
+        responses={201: FinalQuizSerializer}
+    )
+)
+class FinalQuizStartView(APIView, ResponseMixin):
+    """
+    Final Quiz Start View - Start a timed attempt
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def post(self, request, *args, **kwargs):
+        """
+        Start a timed final quiz attempt
+        Args:
+            request: The request object
+        Returns:
+            Response: The response object with the issued questions and deadline
+        """
+        quiz_session, questions, error = start_timed_final_quiz(request.user)
+        if error:
+            return self.error_response(
+                None,
+                message=error,
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
+        return self.success_response(
+            {
+                "max_attempts": settings.FINAL_QUIZ_MAX_ATTEMPTS,
+                "expires_at": quiz_session.expires_at,
+                "exam_data": serialize_exam_data(questions, request)
+            },
+            message="Final quiz started.",
+            status_code=status.HTTP_201_CREATED
+        )
+
+
+@extend_schema_view(
+    put=extend_schema(
+        summary="Autosave Final Quiz Answers",
+        description="Save partial answers of the active timed final quiz attempt",
+        request=FinalQuizSubmissionSerializer(many=True)
+    )
+)
+class FinalQuizAnswersView(APIView, ResponseMixin):
+    """
+    Final Quiz Answers View - Autosave answers of a timed attempt
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def put(self, request, *args, **kwargs):
+        """
+        Autosave partial answers
+        Args:
+            request: The request object with a list of answers
+        Returns:
+            Response: The response object
+        """
+        answers_data, errors = validate_quiz_answers(request.data)
+        if errors:
+            return self.error_response(
+                errors,
+                message="Invalid answers",
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
+        state, error = save_timed_final_quiz_answers(request.user.pk, answers_data)
+        if error:
+            return self.error_response(
+                None,
+                message=error,
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
+        return self.success_response(
+            {
+                "saved_answers": len(state["answers"]),
+                "total_questions": len(state["question_ids"]),
+                "remaining_seconds": max(int(state["expires_at"] - timezone.now().timestamp()), 0)
+            },
+            message="Answers saved.",
+            status_code=status.HTTP_200_OK
+        )
+
+
+@extend_schema_view(
+    post=extend_schema(
+        summary="Submit Timed Final Quiz",
+        description="Submit the active timed final quiz attempt",
+        request=FinalQuizSubmissionSerializer(many=True),
+        responses={200: FinalQuizResultSerializer}
+    )
+)
+class FinalQuizSubmitView(APIView, ResponseMixin):
+    """
+    Final Quiz Submit View - Grade and persist a timed attempt
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def post(self, request, *args, **kwargs):
+        """
+        Submit the active timed attempt
+        Args:
+            request: The request object with optional final answers
+        Returns:
+            Response: The response object with score and result
+        """
+        # An empty body submits the autosaved answers only
+        answers_data, errors = validate_quiz_answers(request.data or [])
+        if errors:
+            return self.error_response(
+                errors,
+                message="Invalid answers",
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
+        result, certificate, error = submit_timed_final_quiz(request.user, answers_data)
+        if error:
+            return self.error_response(
+                None,
+                message=error,
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
+        response_data = final_quiz_result_data(result, certificate, request)
+        response_data["expired"] = result["expired"]
+        return self.success_response(
+            response_data,
+            message="Final Exam submitted successfully." + (" Certificate generated!" if result["passed"] else ""),
+            status_code=status.HTTP_200_OK
+        )
+
+
 @extend_schema_view(
     get=extend_schema(
         summary="Get User Certificate",
@@ -789,7 +1070,7 @@ class FinalQuizView(APIView, ResponseMixin):
         tags=['Certificate']
     )
 )
-class CertificateView(APIView, ResponseMixin):
+class CertificateView(ReplicaReadMixin, APIView, ResponseMixin):
     """
     Certificate View - Retrieve user certificates (auto-generated when quiz passed)
     """
@@ -827,7 +1108,7 @@ class CertificateView(APIView, ResponseMixin):
         tags=['Certificate']
     )
 )
-class CertificateDownloadView(APIView):
+class CertificateDownloadView(ReplicaReadMixin, APIView):
     """
     Certificate Download View - Returns actual PDF file
     """
@@ -856,6 +1137,8 @@ class CertificateDownloadView(APIView):
             )
         
         try:
+            # ReportLab is imported on the first download rather than when the URLconf loads
+            from utils.certificate_generator import CertificateGenerator
             generator = CertificateGenerator()
             certificate_data = {
                 'user_name': f"{certificate.user.user_profile.first_name} {certificate.user.user_profile.last_name}",
@@ -865,7 +1148,8 @@ class CertificateDownloadView(APIView):
                 'certificate_id': certificate.certificate_id
             }
             
-            pdf_content = generator.generate_certificate_pdf(certificate_data)
+            with timed("pdf"):
+                pdf_content = generator.generate_certificate_pdf(certificate_data)
             response = HttpResponse(
                 pdf_content,
                 content_type='application/pdf'
@@ -963,32 +1247,32 @@ class LogoutView(APIView, ResponseMixin):
     
     
 @csrf_exempt
+@require_POST
 def mux_webhook(request):
-    if request.method == "POST":
+    """
+    Verify and queue a Mux webhook event, `manage.py process_mux_events` applies it
+    """
+    if not settings.MUX_WEBHOOK_SECRET and not settings.DEBUG:
+        # Unsigned events could change any module's Mux status, so fail closed
+        logger.error("MUX_WEBHOOK_SECRET is not set, rejecting Mux webhook")
+        return JsonResponse({"status": "error", "message": "Webhook verification is not configured."}, status=503)
+    if not verify_mux_webhook_signature(request.body, request.headers.get("Mux-Signature")):
+        return JsonResponse({"status": "error", "message": "Invalid signature."}, status=400)
+    try:
         payload = json.loads(request.body)
-        event_type = payload.get("type")
-        data = payload.get("data", {})
-
-        if event_type == "video.asset.ready":
-            asset_id = data.get("id")
-            playback_ids = data.get("playback_ids", [])
-            if asset_id:
-                try:
-                    module = Module.objects.get(mux_asset_id=asset_id)
-                    module.mux_status = "ready"
-                    if playback_ids:
-                        module.mux_playback_id = playback_ids[0]["id"]
-                    module.save()
-                except Module.DoesNotExist:
-                    pass
-        elif event_type == "video.asset.errored":
-            asset_id = data.get("id")
-            
-            try:
-                module = Module.objects.get(mux_asset_id=asset_id)
-                module.mux_status = "errored"
-                module.save()
-            except Module.DoesNotExist:
-                pass
-
-        return JsonResponse({"status": "ok"})
\ No newline at end of file
+    except ValueError:
+        return JsonResponse({"status": "error", "message": "Invalid JSON."}, status=400)
+    created, error = record_mux_webhook_event(payload)
+    if error:
+        return JsonResponse({"status": "error", "message": error}, status=400)
+    return JsonResponse({"status": "ok"})
+
+@require_GET
+def metrics(request):
+    """
+    Prometheus metrics, for `Authorization: Bearer <METRICS_TOKEN>` or METRICS_ALLOWED_IPS
+    """
+    if not metrics_access_allowed(request):
+        return HttpResponse("Forbidden", status=403, content_type="text/plain")
+    body, content_type = render_metrics()
+    return HttpResponse(body, content_type=content_type)
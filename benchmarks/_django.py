@@ -0,0 +1,58 @@
+"""
+Shared setup for the benchmark scripts.
+
+Benchmarks that need the database run against a throwaway test database
+created from DATABASES['default'], the same way the test suite does.
+"""
+import os
+import sys
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings")
+
+import django
+
+django.setup()
+
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+
+@contextmanager
+def test_database():
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+
+
+def measure(func, seconds=2.0):
+    """
+    Call func repeatedly for about `seconds` and return the calls per second
+    """
+    func()
+    calls = 0
+    start = time.perf_counter()
+    elapsed = 0
+    while elapsed < seconds:
+        func()
+        calls += 1
+        elapsed = time.perf_counter() - start
+    return calls / elapsed
+
+
+def report(title, rows):
+    """
+    Print rows of (label, calls per second) relative to the first row
+    """
+    print(title)
+    baseline = rows[0][1]
+    for label, rate in rows:
+        print(f"  {label:<40} {rate:>12,.1f}/s  {rate / baseline:>6.2f}x")
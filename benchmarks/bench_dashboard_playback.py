@@ -0,0 +1,64 @@
+"""
+Dashboard module serialization with public playback ids versus signed playback
+tokens, signing on every render versus reusing the per-process token cache.
+
+    python benchmarks/bench_dashboard_playback.py
+"""
+import base64
+
+from _django import measure, report, test_database
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from django.test.utils import override_settings
+
+from app import mux
+from app.models import Module
+from app.serializers import ModuleSerializer
+
+
+def signing_settings():
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    pem = key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.TraditionalOpenSSL,
+        serialization.NoEncryption()
+    )
+    return {
+        "MUX_PLAYBACK_POLICY": "signed",
+        "MUX_SIGNING_KEY_ID": "benchmark-key",
+        "MUX_SIGNING_PRIVATE_KEY": base64.b64encode(pem).decode(),
+    }
+
+
+def main():
+    signed = signing_settings()
+    with test_database():
+        for size in (50, 100, 200):
+            Module.objects.all().delete()
+            Module.objects.bulk_create([
+                Module(name=f"Module {i}", description="desc", module_type="video", mux_playback_id=f"playback{i:04d}")
+                for i in range(size)
+            ])
+            modules = list(Module.objects.order_by('id'))
+
+            def render():
+                return ModuleSerializer(modules, many=True).data
+
+            def render_uncached():
+                mux._playback_tokens.clear()
+                return render()
+
+            public = measure(render)
+            with override_settings(**signed):
+                sign_every_render = measure(render_uncached)
+                cached = measure(render)
+            report(f"{size} modules", [
+                ("public playback ids", public),
+                ("signed, sign on every render", sign_every_render),
+                ("signed, cached tokens", cached),
+            ])
+
+
+if __name__ == "__main__":
+    main()
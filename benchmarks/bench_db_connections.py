@@ -0,0 +1,53 @@
+"""
+Per-request database cost under each connection mode: a new connection per
+request, persistent connections with and without health checks, and (when
+psycopg 3 is installed) a connection pool.
+
+Each simulated request fires request_started/request_finished, exactly like a
+real request, and runs one query in between. Run it against the database and
+network path used in production, since connection setup cost is dominated by
+TCP, TLS and authentication.
+
+    python benchmarks/bench_db_connections.py
+"""
+import importlib.util
+
+from _django import measure, report
+
+from django.core import signals
+from django.db import connection
+
+
+def request():
+    signals.request_started.send(sender=None)
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1")
+    signals.request_finished.send(sender=None)
+
+
+def configure(pool=None, **options):
+    connection.close()
+    connection.settings_dict.update(options)
+    connection.settings_dict['OPTIONS'].pop('pool', None)
+    if pool:
+        connection.settings_dict['OPTIONS']['pool'] = pool
+
+
+def main():
+    rows = []
+    configure(CONN_MAX_AGE=0, CONN_HEALTH_CHECKS=False)
+    rows.append(("new connection per request", measure(request)))
+    configure(CONN_MAX_AGE=60, CONN_HEALTH_CHECKS=False)
+    rows.append(("persistent (CONN_MAX_AGE=60)", measure(request)))
+    configure(CONN_MAX_AGE=60, CONN_HEALTH_CHECKS=True)
+    rows.append(("persistent + CONN_HEALTH_CHECKS", measure(request)))
+    if connection.Database.__name__ == "psycopg" and importlib.util.find_spec("psycopg_pool"):
+        configure(CONN_MAX_AGE=0, CONN_HEALTH_CHECKS=False, pool={'min_size': 2, 'max_size': 4})
+        rows.append(("psycopg pool", measure(request)))
+    else:
+        print('(install "psycopg[pool]" to include the pool mode)')
+    report(f"requests with one query ({connection.vendor}, {connection.settings_dict['HOST'] or 'local socket'})", rows)
+
+
+if __name__ == "__main__":
+    main()
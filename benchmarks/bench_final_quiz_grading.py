@@ -0,0 +1,51 @@
+"""
+Final quiz grading throughput: the per-submission table scan keyed by question
+text versus the cached answer key keyed by question id.
+
+    python benchmarks/bench_final_quiz_grading.py
+"""
+import random
+
+from _django import measure, report, test_database
+
+from app.models import FinalQuiz
+from app.quiz import get_final_quiz_answer_key, grade_answers, invalidate_final_quiz_cache
+
+OPTIONS = ["A", "B", "C", "D"]
+
+
+def legacy_grade(answers_data):
+    final_quiz_questions = {quiz.question: quiz for quiz in FinalQuiz.objects.all()}
+    correct_count = 0
+    for data in answers_data:
+        final_quiz_obj = final_quiz_questions.get(data.get('question'))
+        if final_quiz_obj and final_quiz_obj.correct_answer == data.get('selected_option'):
+            correct_count += 1
+    return correct_count
+
+
+def main():
+    with test_database():
+        for size in (100, 250, 500):
+            FinalQuiz.objects.all().delete()
+            FinalQuiz.objects.bulk_create([
+                FinalQuiz(
+                    question=f"Question {i}: which option describes control {i} best?",
+                    options=OPTIONS,
+                    correct_answer=random.choice(OPTIONS)
+                )
+                for i in range(size)
+            ])
+            invalidate_final_quiz_cache()
+            questions = list(FinalQuiz.objects.values('id', 'question'))
+            by_text = [{"question": q["question"], "selected_option": random.choice(OPTIONS)} for q in questions]
+            by_id = [{"question_id": q["id"], "selected_option": random.choice(OPTIONS)} for q in questions]
+            report(f"{size} questions", [
+                ("scan FinalQuiz, match by text", measure(lambda: legacy_grade(by_text))),
+                ("cached answer key, match by text", measure(lambda: grade_answers(get_final_quiz_answer_key(), by_text))),
+                ("cached answer key, match by id", measure(lambda: grade_answers(get_final_quiz_answer_key(), by_id))),
+            ])
+
+
+if __name__ == "__main__":
+    main()
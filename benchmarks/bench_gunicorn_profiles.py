@@ -0,0 +1,125 @@
+"""
+Compare gunicorn profiles from gunicorn.conf.py: time until the first request
+is served, memory of the master and workers (PSS, so pages shared copy-on-write
+by preload are split between processes) and requests per second from a few
+concurrent clients against the admin login page, which renders a template
+without querying the database.
+
+Each profile starts its own gunicorn on a free local port with the current
+environment (SECRET_KEY, DB_* ...). Memory figures need Linux /proc.
+
+    python benchmarks/bench_gunicorn_profiles.py
+"""
+import importlib.util
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+PATH = "/admin/login/"
+CLIENTS = 8
+SECONDS = 3.0
+
+PROFILES = [
+    ("sync x4", {"GUNICORN_WORKER_CLASS": "sync", "GUNICORN_WORKERS": "4", "GUNICORN_PRELOAD": "false"}),
+    ("sync x4, preload", {"GUNICORN_WORKER_CLASS": "sync", "GUNICORN_WORKERS": "4", "GUNICORN_PRELOAD": "true"}),
+    ("gthread 2x4, preload", {
+        "GUNICORN_WORKER_CLASS": "gthread", "GUNICORN_WORKERS": "2", "GUNICORN_THREADS": "4", "GUNICORN_PRELOAD": "true",
+    }),
+]
+if importlib.util.find_spec("uvicorn"):
+    PROFILES.append(("uvicorn x4, preload", {"GUNICORN_WORKER_CLASS": "uvicorn", "GUNICORN_WORKERS": "4", "GUNICORN_PRELOAD": "true"}))
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def get(url):
+    with urllib.request.urlopen(url, timeout=10) as response:
+        response.read()
+
+
+def wait_until_serving(url, timeout=60):
+    start = time.perf_counter()
+    while time.perf_counter() - start < timeout:
+        try:
+            get(url)
+            return time.perf_counter() - start
+        except (urllib.error.URLError, ConnectionError):
+            time.sleep(0.02)
+    raise RuntimeError(f"gunicorn did not answer {url} within {timeout}s")
+
+
+def pss_mb(pid):
+    """
+    Proportional set size of a process and its children in MB
+    """
+    pids = [pid]
+    try:
+        pids += [int(child) for child in Path(f"/proc/{pid}/task/{pid}/children").read_text().split()]
+        total = 0
+        for process in pids:
+            for line in Path(f"/proc/{process}/smaps_rollup").read_text().splitlines():
+                if line.startswith("Pss:"):
+                    total += int(line.split()[1])
+    except OSError:
+        return None
+    return total / 1024
+
+
+def throughput(url):
+    counts = [0] * CLIENTS
+    deadline = time.perf_counter() + SECONDS
+
+    def client(index):
+        while time.perf_counter() < deadline:
+            get(url)
+            counts[index] += 1
+
+    threads = [threading.Thread(target=client, args=(index,)) for index in range(CLIENTS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return sum(counts) / SECONDS
+
+
+def run(label, env):
+    port = free_port()
+    url = f"http://127.0.0.1:{port}{PATH}"
+    process = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "--config", "gunicorn.conf.py"],
+        cwd=BASE_DIR,
+        env={**os.environ, **env, "GUNICORN_BIND": f"127.0.0.1:{port}", "GUNICORN_LOG_LEVEL": "warning"},
+    )
+    try:
+        first_response = wait_until_serving(url)
+        # Let every worker finish booting before measuring
+        throughput(url)
+        rate = throughput(url)
+        memory = pss_mb(process.pid)
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+    memory = f"{memory:>8.1f} MB" if memory is not None else "     n/a"
+    print(f"  {label:<24} first response {first_response:>6.2f}s  memory {memory}  {rate:>8,.1f} req/s")
+
+
+def main():
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings")
+    print(f"gunicorn profiles, {CLIENTS} clients on GET {PATH}")
+    for label, env in PROFILES:
+        run(label, env)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Startup cost of a Django process: wall time of `django.setup()` plus loading the
+URLconf (which imports every view), measured in fresh interpreters, and the
+slowest imports reported by `python -X importtime`.
+
+ReportLab, SendGrid and mux_python are imported on first use, so none of them
+should show up here; app/tests/test_startup.py guards that.
+
+    python benchmarks/bench_import_time.py
+"""
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+STARTUP = "import django; django.setup(); import core.urls"
+RUNS = 10
+LAZY_MODULES = ("reportlab", "sendgrid", "mux_python")
+
+
+def start(*flags):
+    return subprocess.run(
+        [sys.executable, *flags, "-c", STARTUP],
+        cwd=BASE_DIR,
+        env={**os.environ, "DJANGO_SETTINGS_MODULE": "core.settings"},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+
+def parse_importtime(stderr):
+    """
+    Return (cumulative microseconds, module) for every line of -X importtime output,
+    nested imports keep the indentation importtime gives them
+    """
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, module = line.split("|")
+        rows.append((int(cumulative), module[1:].rstrip()))
+    return rows
+
+
+def main():
+    timings = []
+    for _ in range(RUNS):
+        started = time.perf_counter()
+        start()
+        timings.append(time.perf_counter() - started)
+    print(f"django.setup() + URLconf: median {statistics.median(timings) * 1000:.0f} ms over {RUNS} runs")
+
+    rows = parse_importtime(start("-X", "importtime").stderr)
+    print("slowest top-level imports (cumulative):")
+    for cumulative, module in sorted((row for row in rows if not row[1].startswith(" ")), reverse=True)[:10]:
+        print(f"  {module:<40} {cumulative / 1000:>8.1f} ms")
+    loaded = sorted({module.strip() for _, module in rows if module.strip().split(".")[0] in LAZY_MODULES})
+    print(f"lazy modules imported at startup: {', '.join(loaded) or 'none'}")
+
+
+if __name__ == "__main__":
+    main()
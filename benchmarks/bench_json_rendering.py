@@ -0,0 +1,55 @@
+"""
+Rendering the ResponseMixin envelope of the dashboard and module-progress
+endpoints with DRF's stdlib JSONRenderer versus the orjson ORJSONRenderer.
+Payloads are built by the real serializers, so only the encoding step is timed.
+
+    python benchmarks/bench_json_rendering.py
+"""
+from _django import measure, report, test_database
+
+from django.contrib.auth import get_user_model
+from rest_framework.renderers import JSONRenderer
+
+from app.models import Module, UserModuleProgress
+from app.serializers import ModuleSerializer, UserModuleProgressSerializer
+from utils.renderers import ORJSONRenderer
+from utils.response import ResponseMixin
+
+
+def main():
+    with test_database():
+        user = get_user_model().objects.create_user(email="bench@example.com", password="benchpass123")
+        for size in (50, 200):
+            Module.objects.all().delete()
+            modules = Module.objects.bulk_create([
+                Module(name=f"Module {i}", description="desc " * 20, module_type="video", mux_playback_id=f"playback{i:04d}")
+                for i in range(size)
+            ])
+            UserModuleProgress.objects.bulk_create([
+                UserModuleProgress(user=user, module=module, completed=i % 2 == 0, watch_position=i * 10)
+                for i, module in enumerate(modules)
+            ])
+            payloads = {
+                "dashboard": ResponseMixin.success_response({
+                    "modules": ModuleSerializer(Module.objects.order_by('id'), many=True).data,
+                    "completed_modules": size // 2,
+                    "total_modules": size,
+                    "percentage_completed": 50.0,
+                }).data,
+                "module progress": ResponseMixin.success_response(
+                    UserModuleProgressSerializer(
+                        UserModuleProgress.objects.filter(user=user).select_related('module'), many=True
+                    ).data
+                ).data,
+            }
+            for name, payload in payloads.items():
+                stdlib, fast = JSONRenderer(), ORJSONRenderer()
+                size_kb = len(stdlib.render(payload)) / 1024
+                report(f"{name}, {size} modules ({size_kb:.0f} KB)", [
+                    ("JSONRenderer (stdlib json)", measure(lambda: stdlib.render(payload))),
+                    ("ORJSONRenderer", measure(lambda: fast.render(payload))),
+                ])
+
+
+if __name__ == "__main__":
+    main()
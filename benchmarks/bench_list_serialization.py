@@ -0,0 +1,54 @@
+"""
+DRF ModelSerializers versus the `.values()` serializers for the dashboard module
+list and the module-progress list, each timed from the queryset to a list of
+dicts (query included), with and without a `?fields=` sparse fieldset.
+
+    python benchmarks/bench_list_serialization.py
+"""
+from _django import measure, report, test_database
+
+from django.contrib.auth import get_user_model
+
+from app.models import Module, UserModuleProgress
+from app.serializers import (
+    ModuleSerializer,
+    ModuleValuesSerializer,
+    UserModuleProgressSerializer,
+    UserModuleProgressValuesSerializer,
+)
+
+
+def main():
+    with test_database():
+        user = get_user_model().objects.create_user(email="bench@example.com", password="benchpass123")
+        for size in (50, 200):
+            Module.objects.all().delete()
+            modules = Module.objects.bulk_create([
+                Module(name=f"Module {i}", description="desc " * 20, module_type="video", mux_playback_id=f"playback{i:04d}")
+                for i in range(size)
+            ])
+            UserModuleProgress.objects.bulk_create([
+                UserModuleProgress(user=user, module=module, completed=i % 2 == 0, watch_position=i * 10)
+                for i, module in enumerate(modules)
+            ])
+            module_list = Module.objects.order_by('id')
+            progress = UserModuleProgress.objects.filter(user=user)
+            report(f"dashboard modules, {size} modules", [
+                ("ModuleSerializer", measure(lambda: ModuleSerializer(module_list.all(), many=True).data)),
+                ("ModuleValuesSerializer", measure(lambda: ModuleValuesSerializer().serialize(module_list.all()))),
+            ])
+            report(f"module progress, {size} modules", [
+                ("UserModuleProgressSerializer", measure(
+                    lambda: UserModuleProgressSerializer(progress.select_related('module'), many=True).data
+                )),
+                ("UserModuleProgressValuesSerializer", measure(
+                    lambda: UserModuleProgressValuesSerializer().serialize(progress.all())
+                )),
+                ("  ... with fields=completed,module.id", measure(
+                    lambda: UserModuleProgressValuesSerializer(fields="completed,module.id").serialize(progress.all())
+                )),
+            ])
+
+
+if __name__ == "__main__":
+    main()
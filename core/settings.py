@@ -11,9 +11,11 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
 from pathlib import Path
+import importlib.util
 import os
 import dotenv
 from datetime import timedelta
+from django.core.exceptions import ImproperlyConfigured
 
 dotenv.load_dotenv()
 
@@ -29,6 +31,29 @@ SECRET_KEY = os.getenv("SECRET_KEY")
 
 MUX_TOKEN_ID = os.getenv("MUX_TOKEN_ID")
 MUX_TOKEN_SECRET = os.getenv("MUX_TOKEN_SECRET")
+MUX_API_HOST = os.getenv("MUX_API_HOST", "https://api.mux.com")
+# One shared client per process keeps up to MUX_POOL_MAXSIZE connections open
+MUX_POOL_MAXSIZE = int(os.getenv("MUX_POOL_MAXSIZE", 10))
+MUX_CONNECT_TIMEOUT = float(os.getenv("MUX_CONNECT_TIMEOUT", 5))
+MUX_READ_TIMEOUT = float(os.getenv("MUX_READ_TIMEOUT", 30))
+# "signed" creates assets with a signed playback policy and serializes modules with
+# playback tokens signed by MUX_SIGNING_KEY_ID / MUX_SIGNING_PRIVATE_KEY (base64 PEM as
+# downloaded from Mux). Tokens are shared by all users and renewed every
+# MUX_PLAYBACK_TOKEN_REFRESH_SECONDS, staying valid at least MUX_PLAYBACK_TOKEN_TTL seconds.
+MUX_PLAYBACK_POLICY = os.getenv("MUX_PLAYBACK_POLICY", "public")
+MUX_SIGNING_KEY_ID = os.getenv("MUX_SIGNING_KEY_ID")
+MUX_SIGNING_PRIVATE_KEY = os.getenv("MUX_SIGNING_PRIVATE_KEY")
+MUX_PLAYBACK_TOKEN_TTL = int(os.getenv("MUX_PLAYBACK_TOKEN_TTL", 6 * 60 * 60))
+MUX_PLAYBACK_TOKEN_REFRESH_SECONDS = int(os.getenv("MUX_PLAYBACK_TOKEN_REFRESH_SECONDS", 60 * 60))
+# Required in production: without it /webhooks/mux answers 503 (and skips verification only with DEBUG on)
+MUX_WEBHOOK_SECRET = os.getenv("MUX_WEBHOOK_SECRET")
+MUX_WEBHOOK_TOLERANCE_SECONDS = int(os.getenv("MUX_WEBHOOK_TOLERANCE_SECONDS", 5 * 60))
+
+# Mux ingestion runs as retried background jobs, see `manage.py process_mux_jobs`
+MUX_INGEST_MAX_ATTEMPTS = int(os.getenv("MUX_INGEST_MAX_ATTEMPTS", 8))
+MUX_INGEST_RETRY_BASE_SECONDS = int(os.getenv("MUX_INGEST_RETRY_BASE_SECONDS", 30))
+MUX_INGEST_RETRY_MAX_SECONDS = int(os.getenv("MUX_INGEST_RETRY_MAX_SECONDS", 60 * 60))
+MUX_INGEST_LOCK_TIMEOUT = int(os.getenv("MUX_INGEST_LOCK_TIMEOUT", 10 * 60))
 
 # SECURITY WARNING: don't run with debug turned on in production!
 DEBUG = False
@@ -59,6 +84,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # First, so the timings cover every other middleware
+    'utils.instrumentation.RequestTimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
@@ -66,6 +93,7 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'utils.db_routing.PrimaryStickinessMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -101,15 +129,85 @@ DATABASES = {
     #     'NAME': BASE_DIR / 'db.sqlite3',
     # }
     'default': {
-        'ENGINE': 'django.db.backends.postgresql_psycopg2',
+        'ENGINE': 'django.db.backends.postgresql',
         'NAME': os.getenv("DB_NAME"),
         'USER': os.getenv("DB_USER"),
         'PASSWORD': os.getenv("DB_PASSWORD"),
         'HOST': os.getenv("DB_HOST"),
         'PORT': os.getenv("DB_PORT"),
+        'OPTIONS': {},
     }
 }
 
+# DB_CONNECTION_MODE picks how connections are reused:
+#   persistent - each worker thread keeps its connection for DB_CONN_MAX_AGE seconds (default)
+#   pool       - a psycopg 3 connection pool per process (needs `pip install "psycopg[pool]"`)
+#   pgbouncer  - persistent connections to PgBouncer in transaction pooling mode
+DB_CONNECTION_MODE = os.getenv("DB_CONNECTION_MODE", "persistent")
+DATABASES['default']['CONN_HEALTH_CHECKS'] = os.getenv("DB_CONN_HEALTH_CHECKS", "true").lower() == "true"
+
+if DB_CONNECTION_MODE == "pool":
+    if importlib.util.find_spec("psycopg_pool") is None:
+        raise ImproperlyConfigured('DB_CONNECTION_MODE=pool requires psycopg 3: pip install "psycopg[pool]"')
+    # Django rejects persistent connections together with a pool
+    DATABASES['default']['CONN_MAX_AGE'] = 0
+    DATABASES['default']['OPTIONS']['pool'] = {
+        'min_size': int(os.getenv("DB_POOL_MIN_SIZE", 2)),
+        'max_size': int(os.getenv("DB_POOL_MAX_SIZE", 10)),
+        'timeout': float(os.getenv("DB_POOL_TIMEOUT", 10)),
+    }
+elif DB_CONNECTION_MODE in ("persistent", "pgbouncer"):
+    DATABASES['default']['CONN_MAX_AGE'] = int(os.getenv("DB_CONN_MAX_AGE", 60))
+    if DB_CONNECTION_MODE == "pgbouncer":
+        # Server-side cursors and prepared statements do not survive transaction pooling
+        DATABASES['default']['DISABLE_SERVER_SIDE_CURSORS'] = True
+        if importlib.util.find_spec("psycopg") is not None:
+            DATABASES['default']['OPTIONS']['prepare_threshold'] = None
+else:
+    raise ImproperlyConfigured(f"Unknown DB_CONNECTION_MODE {DB_CONNECTION_MODE!r}")
+
+# Read replica: set DB_REPLICA_HOST to serve read-only views (see ReplicaReadMixin) from a
+# `replica` alias. Unset DB_REPLICA_* values fall back to the primary's.
+DATABASE_REPLICA_ALIAS = None
+if os.getenv("DB_REPLICA_HOST"):
+    DATABASE_REPLICA_ALIAS = 'replica'
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'NAME': os.getenv("DB_REPLICA_NAME", DATABASES['default']['NAME']),
+        'USER': os.getenv("DB_REPLICA_USER", DATABASES['default']['USER']),
+        'PASSWORD': os.getenv("DB_REPLICA_PASSWORD", DATABASES['default']['PASSWORD']),
+        'HOST': os.getenv("DB_REPLICA_HOST"),
+        'PORT': os.getenv("DB_REPLICA_PORT", DATABASES['default']['PORT']),
+        'OPTIONS': {**DATABASES['default']['OPTIONS']},
+        # Tests read the replica through the primary's test database
+        'TEST': {'MIRROR': 'default'},
+    }
+DATABASE_ROUTERS = ['utils.db_routing.ReplicaRouter']
+# Seconds a user's reads stay on the primary after they write, covering replication lag
+DATABASE_REPLICA_STICKY_SECONDS = int(os.getenv("DB_REPLICA_STICKY_SECONDS", 5))
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# Use Redis when REDIS_URL is set so cached state is shared across workers,
+# otherwise fall back to a per-process in-memory cache.
+
+REDIS_URL = os.getenv("REDIS_URL")
+
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -165,6 +263,16 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.IsAuthenticated',
     ),
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
+    # orjson-backed JSON, falling back to DRF's stdlib encoder when orjson is missing
+    'DEFAULT_RENDERER_CLASSES': (
+        'utils.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        'utils.renderers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ),
 }
 
 
@@ -174,6 +282,30 @@ SPECTACULAR_SETTINGS = {
     'VERSION': '0.1.0'
 }
 
+# Module progress settings
+MODULE_CATALOG_CACHE_TIMEOUT = int(os.getenv("MODULE_CATALOG_CACHE_TIMEOUT", 60 * 60))
+MODULE_PROGRESS_BATCH_MAX_EVENTS = int(os.getenv("MODULE_PROGRESS_BATCH_MAX_EVENTS", 100))
+
+# Module quizzes are graded on the server, a passing score completes the module
+MODULE_QUIZ_PASS_MARK = int(os.getenv("MODULE_QUIZ_PASS_MARK", 80))
+MODULE_QUIZ_CACHE_TIMEOUT = int(os.getenv("MODULE_QUIZ_CACHE_TIMEOUT", 60 * 60))
+
+# Video watch progress: heartbeats are buffered per worker and written in batches
+WATCH_PROGRESS_COMPLETION_THRESHOLD = float(os.getenv("WATCH_PROGRESS_COMPLETION_THRESHOLD", 0.9))
+WATCH_PROGRESS_FLUSH_INTERVAL = int(os.getenv("WATCH_PROGRESS_FLUSH_INTERVAL", 30))
+WATCH_PROGRESS_FLUSH_SIZE = int(os.getenv("WATCH_PROGRESS_FLUSH_SIZE", 500))
+# Longest video a heartbeat may report, in seconds; keeps positions inside the integer column
+WATCH_PROGRESS_MAX_DURATION = int(os.getenv("WATCH_PROGRESS_MAX_DURATION", 24 * 60 * 60))
+
+# Final quiz settings
+FINAL_QUIZ_MAX_ATTEMPTS = int(os.getenv("FINAL_QUIZ_MAX_ATTEMPTS", 5))
+FINAL_QUIZ_DURATION_MINUTES = int(os.getenv("FINAL_QUIZ_DURATION_MINUTES", 30))
+FINAL_QUIZ_GRACE_SECONDS = int(os.getenv("FINAL_QUIZ_GRACE_SECONDS", 30))
+FINAL_QUIZ_CACHE_TIMEOUT = int(os.getenv("FINAL_QUIZ_CACHE_TIMEOUT", 60 * 60))
+QUIZ_ANSWER_ARCHIVE_AFTER_DAYS = int(os.getenv("QUIZ_ANSWER_ARCHIVE_AFTER_DAYS", 180))
+# Questions sampled per (category, difficulty) group for each attempt, 0 issues the whole bank
+FINAL_QUIZ_QUESTIONS_PER_GROUP = int(os.getenv("FINAL_QUIZ_QUESTIONS_PER_GROUP", 0))
+
 # JWT settings
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=10),
@@ -217,3 +349,33 @@ CSRF_TRUSTED_ORIGINS = [
     'https://familiar-lethia-ferditech-4c835a92.koyeb.app',
     'https://cyberaware-frontend.vercel.app'
 ]
+
+# Request instrumentation (utils/instrumentation.py): Server-Timing headers and one JSON
+# log line per request on the `app.performance` logger, slow requests with their top SQL
+SERVER_TIMING_HEADER = os.getenv("SERVER_TIMING_HEADER", "true").lower() == "true"
+SLOW_REQUEST_THRESHOLD_MS = int(os.getenv("SLOW_REQUEST_THRESHOLD_MS", 500))
+SLOW_REQUEST_TOP_QUERIES = int(os.getenv("SLOW_REQUEST_TOP_QUERIES", 5))
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'app.performance': {
+            'handlers': ['console'],
+            # WARNING keeps only slow requests
+            'level': os.getenv("PERFORMANCE_LOG_LEVEL", "INFO"),
+            'propagate': False,
+        },
+    },
+}
+
+# Prometheus metrics at /metrics, readable with `Authorization: Bearer <METRICS_TOKEN>` or
+# from METRICS_ALLOWED_IPS (comma separated addresses or networks, as seen in REMOTE_ADDR).
+# Set PROMETHEUS_MULTIPROC_DIR to aggregate across gunicorn workers.
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+METRICS_ALLOWED_IPS = [ip.strip() for ip in os.getenv("METRICS_ALLOWED_IPS", "127.0.0.1,::1").split(",") if ip.strip()]
@@ -0,0 +1,123 @@
+"""
+Gunicorn settings, read from GUNICORN_* environment variables
+
+Start gunicorn from the project root with no application argument, the app is
+chosen here from the worker class:
+
+    gunicorn --config gunicorn.conf.py
+
+See the "Application Server" section of DEVELOPER_GUIDE.md for the profiles.
+"""
+import gc
+import importlib.util
+import os
+
+
+def env_int(name, default):
+    return int(os.getenv(name, default))
+
+
+def env_bool(name, default):
+    return os.getenv(name, str(default)).lower() == "true"
+
+
+def available_cpus():
+    # Respect CPU affinity (e.g. `docker run --cpuset-cpus`) where the platform exposes it
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+WORKER_CLASSES = {
+    "sync": "sync",
+    "gthread": "gthread",
+    "uvicorn": "uvicorn.workers.UvicornWorker",
+}
+
+worker_type = os.getenv("GUNICORN_WORKER_CLASS", "sync")
+if worker_type not in WORKER_CLASSES:
+    raise RuntimeError(f"Unknown GUNICORN_WORKER_CLASS {worker_type!r}, expected one of {', '.join(WORKER_CLASSES)}")
+if worker_type == "uvicorn" and importlib.util.find_spec("uvicorn") is None:
+    raise RuntimeError("GUNICORN_WORKER_CLASS=uvicorn requires uvicorn: pip install uvicorn")
+worker_class = WORKER_CLASSES[worker_type]
+
+# Uvicorn workers serve the ASGI application. An app named on the command line takes
+# precedence over this setting, so the command line must not name one.
+wsgi_app = "core.asgi:application" if worker_type == "uvicorn" else "core.wsgi:application"
+
+bind = os.getenv("GUNICORN_BIND", f"0.0.0.0:{os.getenv('PORT', '8000')}")
+
+# Sync workers block on I/O, so run more of them than CPUs. gthread and uvicorn
+# workers overlap I/O inside a process and need fewer.
+cpus = available_cpus()
+workers = env_int("GUNICORN_WORKERS", 2 * cpus + 1 if worker_type == "sync" else cpus + 1)
+threads = env_int("GUNICORN_THREADS", 4 if worker_type == "gthread" else 1)
+
+# Import the app once in the master so workers share its code pages copy-on-write
+# and boot without re-importing Django and DRF
+preload_app = env_bool("GUNICORN_PRELOAD", True)
+
+# The app imports these on first use to keep `manage.py` and worker boot fast. With
+# preload the master imports them up front, so they are shared too and the first PDF,
+# email or Mux call in each worker does not pay for the import.
+PRELOAD_MODULES = ["reportlab.platypus", "sendgrid", "mux_python"]
+
+# Recycle workers after a number of requests to bound memory growth, with jitter so
+# they do not all restart at once
+max_requests = env_int("GUNICORN_MAX_REQUESTS", 1000)
+max_requests_jitter = env_int("GUNICORN_MAX_REQUESTS_JITTER", 100)
+
+timeout = env_int("GUNICORN_TIMEOUT", 30)
+graceful_timeout = env_int("GUNICORN_GRACEFUL_TIMEOUT", 30)
+keepalive = env_int("GUNICORN_KEEPALIVE", 5)
+
+# Heartbeat files on a disk-backed overlay can stall workers in containers
+if os.path.isdir("/dev/shm"):
+    worker_tmp_dir = "/dev/shm"
+
+loglevel = os.getenv("GUNICORN_LOG_LEVEL", "info")
+accesslog = os.getenv("GUNICORN_ACCESS_LOG") or None
+errorlog = "-"
+
+
+def on_starting(server):
+    multiproc_dir = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+    if multiproc_dir:
+        # Samples left by a previous run would be added to this one's
+        os.makedirs(multiproc_dir, exist_ok=True)
+        for name in os.listdir(multiproc_dir):
+            if name.endswith(".db"):
+                os.remove(os.path.join(multiproc_dir, name))
+    if server.cfg.preload_app:
+        for module in PRELOAD_MODULES:
+            importlib.import_module(module)
+
+
+def pre_fork(server, worker):
+    # Close connections the master opened while preloading so workers never share a socket
+    if not server.cfg.preload_app:
+        return
+    from django.db import connections
+
+    connections.close_all()
+    # Move preloaded objects out of the collector's reach, so collections in a worker do
+    # not write to (and so copy) the pages it shares with the master
+    gc.freeze()
+
+
+def worker_exit(server, worker):
+    # Write heartbeats still buffered in this worker before it is recycled or stopped
+    from app.progress import watch_progress_buffer
+
+    try:
+        watch_progress_buffer.flush()
+    except Exception:
+        server.log.exception("Failed to flush buffered watch progress")
+
+
+def child_exit(server, worker):
+    # Let /metrics drop the live-only samples of a worker that is gone
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,126 @@
+import contextvars
+from contextlib import contextmanager
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from rest_framework.permissions import SAFE_METHODS
+
+RECENT_WRITE_CACHE_KEY = "db-recent-write:{user_id}"
+
+# Alias reads are sent to for the current request, None keeps them on the primary
+_read_alias = contextvars.ContextVar("read_alias", default=None)
+
+
+def replica_alias():
+    """
+    Return the replica database alias, or None when no replica is configured
+    """
+    return settings.DATABASE_REPLICA_ALIAS
+
+
+def mark_recent_write(user_id):
+    """
+    Keep the user's reads on the primary for DATABASE_REPLICA_STICKY_SECONDS so they see their own writes
+    """
+    cache.set(RECENT_WRITE_CACHE_KEY.format(user_id=user_id), True, settings.DATABASE_REPLICA_STICKY_SECONDS)
+
+
+def wrote_recently(user_id):
+    return cache.get(RECENT_WRITE_CACHE_KEY.format(user_id=user_id)) is not None
+
+
+def read_alias_for(request):
+    """
+    Return the alias a request's reads may use: the replica for safe methods unless the user wrote recently
+    Args:
+        request: The request object, after authentication
+    Returns:
+        str or None: The replica alias, or None to read from the primary
+    """
+    alias = replica_alias()
+    if not alias or request.method not in SAFE_METHODS:
+        return None
+    user = getattr(request, "user", None)
+    if user is not None and user.is_authenticated and wrote_recently(user.pk):
+        return None
+    return alias
+
+
+@contextmanager
+def reads_from(alias):
+    """
+    Route reads inside the block to `alias`, None keeps them on the primary
+    """
+    token = _read_alias.set(alias)
+    try:
+        yield
+    finally:
+        _read_alias.reset(token)
+
+
+class ReplicaRouter:
+    """
+    Send reads to the replica inside `reads_from` (set by ReplicaReadMixin), everything else to the primary
+    """
+
+    def db_for_read(self, model, **hints):
+        return _read_alias.get()
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # The replica is a copy of the primary, so objects from either may be related
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # The replica receives schema changes through replication
+        return db != replica_alias()
+
+
+class ReplicaReadMixin:
+    """
+    APIView mixin that serves safe-method requests from the replica
+    Only add it to views whose GET does not write, so read-your-own-writes is not needed inside the request.
+    """
+
+    def initial(self, request, *args, **kwargs):
+        # Authentication runs in super().initial, so the user is known before reads are routed
+        super().initial(request, *args, **kwargs)
+        self._read_alias_token = _read_alias.set(read_alias_for(request))
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        token = getattr(self, "_read_alias_token", None)
+        if token is not None:
+            _read_alias.reset(token)
+            self._read_alias_token = None
+        return super().finalize_response(request, response, *args, **kwargs)
+
+
+class ReplicaAdminMixin:
+    """
+    ModelAdmin mixin that reads changelists and reports from the replica on GET requests
+    """
+
+    def get_queryset(self, request):
+        queryset = super().get_queryset(request)
+        alias = read_alias_for(request)
+        return queryset.using(alias) if alias else queryset
+
+
+class PrimaryStickinessMiddleware:
+    """
+    Remember users who just made an unsafe request, so their next reads go to the primary instead of a lagging replica
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if request.method not in SAFE_METHODS and replica_alias():
+            # DRF copies the authenticated user onto the underlying request, so JWT users are seen here too
+            user = getattr(request, "user", None)
+            if user is not None and user.is_authenticated:
+                mark_recent_write(user.pk)
+        return response
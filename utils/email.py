@@ -1,12 +1,12 @@
 import os
-from sendgrid import SendGridAPIClient
-from sendgrid.helpers.mail import Mail
 import random
 from django.utils import timezone
 from datetime import timedelta
 from app.models import OTP
 from dotenv import load_dotenv
 from django.contrib.auth import get_user_model
+from utils.instrumentation import timed
+from utils.metrics import OTP_ISSUED, OTP_VERIFICATIONS
 
 load_dotenv()
 SENDGRID_API_KEY = os.getenv('SENDGRID_API_KEY')
@@ -18,6 +18,7 @@ def send_otp(user):
     expires_at = timezone.now() + timedelta(minutes=10)
     otp_obj = OTP.objects.create(user=user, code=otp_code, expires_at=expires_at)
     email_sent = send_otp_email(user.email, otp_code)
+    OTP_ISSUED.labels("verify_email", str(email_sent).lower()).inc()
     return email_sent, otp_obj
 
 
@@ -26,6 +27,7 @@ def send_reset_password_otp(user):
     expires_at = timezone.now() + timedelta(minutes=10)
     otp_obj = OTP.objects.create(user=user, code=otp_code, expires_at=expires_at)
     email_sent = send_reset_password_email(user.email, otp_code)
+    OTP_ISSUED.labels("reset_password", str(email_sent).lower()).inc()
     return email_sent, otp_obj
 
 
@@ -72,26 +74,39 @@ def render_email_template(title, message, code=None, note=None):
     '''
 
 
-def send_otp_email(to_email, otp_code):
-    html_content = render_email_template(
-        title="Email Verification",
-        message="Your verification code is:",
-        code=otp_code,
-        note="This code will expire in 10 minutes. If you didn't request this verification, please ignore this email."
-    )
+def send_email(to_email, subject, html_content):
+    """
+    Send an HTML email through SendGrid
+    Returns:
+        bool: Whether SendGrid accepted the message
+    """
+    # Imported on first use so processes that never send mail do not load the SendGrid client
+    from sendgrid import SendGridAPIClient
+    from sendgrid.helpers.mail import Mail
     message = Mail(
         from_email=MAIL_FROM,
         to_emails=to_email,
-        subject="Email Verification - CyberAware",
+        subject=subject,
         html_content=html_content
     )
     try:
         sg = SendGridAPIClient(SENDGRID_API_KEY)
-        response = sg.send(message)
+        with timed("sendgrid"):
+            response = sg.send(message)
         return response.status_code == 202
     except Exception as e:
         print(f"SendGrid error: {e}")
-        return False 
+        return False
+
+
+def send_otp_email(to_email, otp_code):
+    html_content = render_email_template(
+        title="Email Verification",
+        message="Your verification code is:",
+        code=otp_code,
+        note="This code will expire in 10 minutes. If you didn't request this verification, please ignore this email."
+    )
+    return send_email(to_email, "Email Verification - CyberAware", html_content)
     
 
 def send_reset_password_email(to_email, otp_code):
@@ -101,19 +116,7 @@ def send_reset_password_email(to_email, otp_code):
         code=otp_code,
         note="This code will expire in 10 minutes. If you didn't request this password reset, please ignore this email and your password will remain unchanged. <br><strong>Security Note:</strong> Never share this code with anyone."
     )
-    message = Mail(
-        from_email=MAIL_FROM,
-        to_emails=to_email,
-        subject="Reset Password - CyberAware",
-        html_content=html_content
-    )
-    try:
-        sg = SendGridAPIClient(SENDGRID_API_KEY)
-        response = sg.send(message)
-        return response.status_code == 202
-    except Exception as e:
-        print(f"SendGrid error: {e}")
-        return False 
+    return send_email(to_email, "Reset Password - CyberAware", html_content)
     
 
 def validate_otp(email, code=None, require_verified=True):
@@ -128,8 +131,11 @@ def validate_otp(email, code=None, require_verified=True):
 
     if code is not None:
         otp_obj = OTP.objects.filter(user=user, code=code, is_used=False).order_by('-expires_at').first()
+        purpose = "reset_password" if require_verified else "verify_email"
         if not otp_obj or not otp_obj.is_valid():
+            OTP_VERIFICATIONS.labels(purpose, "invalid").inc()
             return user, None, "Invalid, expired, or already used OTP."
+        OTP_VERIFICATIONS.labels(purpose, "valid").inc()
         return user, otp_obj, None
 
     return user, None, None
\ No newline at end of file
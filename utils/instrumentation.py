@@ -0,0 +1,145 @@
+import contextvars
+import heapq
+import json
+import logging
+import time
+from contextlib import ExitStack, contextmanager
+from django.conf import settings
+from django.db import connections
+from utils.metrics import EXTERNAL_CALL_DURATION, observe_request
+
+logger = logging.getLogger("app.performance")
+
+# Timings of the request being handled, None outside RequestTimingMiddleware
+_current = contextvars.ContextVar("request_timings", default=None)
+
+
+class RequestTimings:
+    """
+    Database and external call timings collected while handling one request
+    """
+
+    def __init__(self, top_queries):
+        self.db_queries = 0
+        self.db_seconds = 0.0
+        # name -> [calls, seconds]
+        self.spans = {}
+        self.top_queries = top_queries
+        # Min-heap of (seconds, order, sql) holding the slowest statements
+        self._slowest = []
+
+    def __call__(self, execute, sql, params, many, context):
+        # connection.execute_wrapper hook
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.record_query(sql, time.perf_counter() - start)
+
+    def record_query(self, sql, seconds):
+        self.db_queries += 1
+        self.db_seconds += seconds
+        if self.top_queries:
+            entry = (seconds, self.db_queries, sql)
+            if len(self._slowest) < self.top_queries:
+                heapq.heappush(self._slowest, entry)
+            else:
+                heapq.heappushpop(self._slowest, entry)
+
+    def record_span(self, name, seconds):
+        span = self.spans.setdefault(name, [0, 0.0])
+        span[0] += 1
+        span[1] += seconds
+
+    def slowest_queries(self):
+        return [(seconds, sql) for seconds, _, sql in sorted(self._slowest, reverse=True)]
+
+
+@contextmanager
+def timed(name):
+    """
+    Record the time spent in the block in the `external_call_duration_seconds` metric and,
+    inside a request, in the request's `name` span
+    Use it around external calls (SendGrid, Mux, PDF rendering).
+    """
+    timings = _current.get()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - start
+        EXTERNAL_CALL_DURATION.labels(name).observe(seconds)
+        if timings is not None:
+            timings.record_span(name, seconds)
+
+
+def server_timing(total_seconds, timings):
+    """
+    Format the Server-Timing header value: db, one entry per span, app (the remainder) and total
+    """
+    external = sum(seconds for _, seconds in timings.spans.values())
+    metrics = [f'db;dur={timings.db_seconds * 1000:.1f};desc="{timings.db_queries} queries"']
+    metrics += [f"{name};dur={seconds * 1000:.1f}" for name, (_, seconds) in timings.spans.items()]
+    metrics.append(f"app;dur={max(total_seconds - timings.db_seconds - external, 0) * 1000:.1f}")
+    metrics.append(f"total;dur={total_seconds * 1000:.1f}")
+    return ", ".join(metrics)
+
+
+class RequestTimingMiddleware:
+    """
+    Time each request, its database queries and its external calls
+    The timings are sent back in a Server-Timing header (SERVER_TIMING_HEADER), recorded
+    in the Prometheus metrics and logged as one JSON line on the `app.performance` logger.
+    Requests slower than SLOW_REQUEST_THRESHOLD_MS are logged as warnings with their
+    slowest SQL statements.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timings = RequestTimings(settings.SLOW_REQUEST_TOP_QUERIES)
+        token = _current.set(timings)
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(timings))
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        total = time.perf_counter() - start
+
+        if settings.SERVER_TIMING_HEADER:
+            header = server_timing(total, timings)
+            response["Server-Timing"] = f"{response['Server-Timing']}, {header}" if response.has_header("Server-Timing") else header
+            # Cross-origin pages can only read Server-Timing when the origin is allowed to
+            allowed_origin = response.get("Access-Control-Allow-Origin")
+            if allowed_origin:
+                response["Timing-Allow-Origin"] = allowed_origin
+        observe_request(request, response, total, timings)
+        self.log(request, response, total, timings)
+        return response
+
+    def log(self, request, response, total, timings):
+        slow = total * 1000 >= settings.SLOW_REQUEST_THRESHOLD_MS
+        level = logging.WARNING if slow else logging.INFO
+        if not logger.isEnabledFor(level):
+            return
+        match = getattr(request, "resolver_match", None)
+        record = {
+            "method": request.method,
+            "path": request.path,
+            "view": match.view_name if match else None,
+            "status": response.status_code,
+            "duration_ms": round(total * 1000, 1),
+            "db_queries": timings.db_queries,
+            "db_ms": round(timings.db_seconds * 1000, 1),
+            "spans": {name: {"calls": calls, "ms": round(seconds * 1000, 1)} for name, (calls, seconds) in timings.spans.items()},
+        }
+        if slow:
+            record["slow"] = True
+            record["top_queries"] = [
+                {"ms": round(seconds * 1000, 1), "sql": sql} for seconds, sql in timings.slowest_queries()
+            ]
+        logger.log(level, json.dumps(record), extra={"performance": record})
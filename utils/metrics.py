@@ -0,0 +1,89 @@
+import hmac
+import ipaddress
+import os
+from django.conf import settings
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Histogram, generate_latest, multiprocess
+
+# With PROMETHEUS_MULTIPROC_DIR set (before this module is imported), every process writes its
+# samples to files in that directory and /metrics aggregates them across gunicorn workers
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "Time to handle a request, by URL name",
+    ["view", "method", "status"],
+)
+REQUEST_DB_QUERIES = Histogram(
+    "http_request_db_queries",
+    "Database queries run by a request, by URL name",
+    ["view"],
+    buckets=(0, 1, 2, 5, 10, 20, 50, 100, 200, float("inf")),
+)
+REQUEST_DB_DURATION = Histogram(
+    "http_request_db_duration_seconds",
+    "Time a request spent in database queries, by URL name",
+    ["view"],
+)
+EXTERNAL_CALL_DURATION = Histogram(
+    "external_call_duration_seconds",
+    "Latency of calls timed with utils.instrumentation.timed (sendgrid, mux, mux-sign, pdf)",
+    ["operation"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, float("inf")),
+)
+OTP_ISSUED = Counter(
+    "otp_issued",
+    "One-time passwords issued, by purpose and whether the email was accepted",
+    ["purpose", "email_sent"],
+)
+OTP_VERIFICATIONS = Counter(
+    "otp_verifications",
+    "One-time password checks, by purpose and result",
+    ["purpose", "result"],
+)
+CACHE_LOOKUPS = Counter(
+    "cache_lookups",
+    "Lookups of cached data, by cache and hit or miss",
+    ["cache", "result"],
+)
+
+
+def observe_request(request, response, seconds, timings):
+    """
+    Record a finished request, called by RequestTimingMiddleware
+    """
+    match = getattr(request, "resolver_match", None)
+    view = match.view_name if match else "unmatched"
+    REQUEST_LATENCY.labels(view, request.method, str(response.status_code)).observe(seconds)
+    REQUEST_DB_QUERIES.labels(view).observe(timings.db_queries)
+    REQUEST_DB_DURATION.labels(view).observe(timings.db_seconds)
+
+
+def record_cache_lookup(cache_name, hit):
+    CACHE_LOOKUPS.labels(cache_name, "hit" if hit else "miss").inc()
+
+
+def render_metrics():
+    """
+    Return the metrics in the Prometheus text format
+    Returns:
+        tuple: (body, content type)
+    """
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+def metrics_access_allowed(request):
+    """
+    Allow requests carrying `Authorization: Bearer <METRICS_TOKEN>` or coming from METRICS_ALLOWED_IPS
+    """
+    authorization = request.headers.get("Authorization", "")
+    if settings.METRICS_TOKEN and authorization.startswith("Bearer "):
+        return hmac.compare_digest(authorization[len("Bearer "):], settings.METRICS_TOKEN)
+    try:
+        address = ipaddress.ip_address(request.META.get("REMOTE_ADDR", ""))
+    except ValueError:
+        return False
+    return any(address in ipaddress.ip_network(network, strict=False) for network in settings.METRICS_ALLOWED_IPS)
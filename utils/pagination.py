@@ -0,0 +1,24 @@
+from rest_framework.pagination import CursorPagination
+
+
+class IdCursorPagination(CursorPagination):
+    """
+    Keyset pagination over the primary key, so deep pages cost the same as the first one
+    """
+    ordering = 'id'
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+
+    def is_requested(self, request):
+        """
+        Pagination is opt-in so existing clients keep receiving the full list
+        """
+        return self.cursor_query_param in request.query_params or self.page_size_query_param in request.query_params
+
+    def get_paginated_data(self, data):
+        return {
+            "results": data,
+            "next": self.get_next_link(),
+            "previous": self.get_previous_link()
+        }
@@ -0,0 +1,35 @@
+import threading
+import time
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket limiting how often `acquire` returns
+    Args:
+        rate: Tokens added per second, 0 disables the limit
+        capacity: Maximum burst size, defaults to one second worth of tokens
+    """
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or max(rate, 1)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """
+        Block until a token is available
+        """
+        if not self.rate:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
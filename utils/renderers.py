@@ -0,0 +1,58 @@
+from rest_framework import renderers
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+if orjson is not None:
+    # Match DRF's stdlib output: "Z" for UTC datetimes and non-string dict keys coerced to strings
+    ORJSON_OPTIONS = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS
+
+# Types orjson does not know natively (Decimal, lazy translations, timedelta, QuerySets...)
+# are encoded exactly as DRF's encoder does, e.g. Decimal as a float
+_encode_default = JSONEncoder().default
+
+
+class ORJSONRenderer(renderers.JSONRenderer):
+    """
+    JSONRenderer that encodes with orjson
+    Falls back to DRF's stdlib encoding when orjson is not installed, when the output
+    must be indented (browsable API, `; indent=` in Accept), ASCII-only or non-compact,
+    or when orjson cannot encode the data.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (
+            orjson is None
+            or self.ensure_ascii
+            or not self.compact
+            or self.get_indent(accepted_media_type, renderer_context or {})
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+        if data is None:
+            return b''
+        try:
+            return orjson.dumps(data, default=_encode_default, option=ORJSON_OPTIONS)
+        except orjson.JSONEncodeError:
+            # e.g. integers wider than 64 bits, which the stdlib encodes fine
+            return super().render(data, accepted_media_type, renderer_context)
+
+
+class ORJSONParser(JSONParser):
+    """
+    JSONParser that decodes with orjson, falling back to the stdlib for non UTF-8 bodies
+    """
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', 'utf-8')
+        if orjson is None or encoding.lower().replace('-', '') != 'utf8':
+            return super().parse(stream, media_type, parser_context)
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError('JSON parse error - %s' % str(exc))